@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
 # from .routes.v1 import test_api as test_api_v1
+from .routes.private import db as private_db
+from .routes.private import metrics as private_metrics
+from .routes.private import password as private_password
 from .routes.v1 import auth as auth_v1
 from .routes.v1 import post as post_v1
 from .routes.v1 import user as user_v1
@@ -11,3 +14,6 @@ router = APIRouter(prefix="/api")
 router.include_router(user_v1.router, tags=["user"])
 router.include_router(auth_v1.router, tags=["auth"])
 router.include_router(post_v1.router, tags=["post"])
+router.include_router(private_db.router, tags=["private"])
+router.include_router(private_metrics.router, tags=["private"])
+router.include_router(private_password.router, tags=["private"])
@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 
 from app.api.dependencies.database import AsyncSession
 from app.core.config import settings
-from app.schemas.db.user import UserDB
+from app.schemas.db.user import UserPrincipalDB
 from app.services.auth import auth_check_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_URL)
@@ -11,7 +11,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_URL)
 
 async def access_control(
     request: Request, async_session: AsyncSession, token: str = Depends(oauth2_scheme)
-) -> UserDB | None:
+) -> UserPrincipalDB | None:
     async with async_session() as session:
         user = await auth_check_access_token(session=session, access_token=token)
 
@@ -6,11 +6,13 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from app.db.database import AsyncSessionLocal
+from app.db.routing import reset_primary_pin
 
 logger = logging.getLogger(__name__)
 
 
 async def get_session() -> AsyncIterator[async_sessionmaker]:
+    reset_primary_pin()
     try:
         yield AsyncSessionLocal
     except SQLAlchemyError as e:
@@ -0,0 +1,19 @@
+import hmac
+from typing import Annotated
+
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+
+async def private_access(
+    x_private_token: Annotated[str | None, Header()] = None
+) -> None:
+    if settings.PRIVATE_API_TOKEN is None:
+        if settings.PRIVATE_API_OPEN:
+            return
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    if x_private_token is None or not hmac.compare_digest(
+        x_private_token, settings.PRIVATE_API_TOKEN
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,45 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import Tracer, parse_traceparent
+
+
+class TracingMiddleware:
+    """Opens the root span of every request.
+
+    An incoming W3C traceparent header continues the caller's trace and
+    keeps its sampling decision. The span is renamed to the route template
+    once the router has matched it.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        remote_parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        with self.tracer.span(
+            method, kind="server", remote_parent=remote_parent
+        ) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    span.name = f"{method} {route}"
+                    span.attributes["http.route"] = route
+                span.attributes["http.method"] = method
+                span.attributes["http.status_code"] = status
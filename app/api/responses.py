@@ -0,0 +1,25 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    # DTOs are already validated, so their field dict is emitted as is;
+    # anything else keeps the jsonable_encoder behaviour
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """Encodes pydantic models straight from their fields with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
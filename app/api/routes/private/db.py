@@ -0,0 +1,18 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies.private import private_access
+from app.db.database import async_engine, async_read_engine
+from app.schemas.response.private import DbPoolStatsResponse
+
+router = APIRouter(prefix="/private/db", dependencies=[Depends(private_access)])
+
+
+@router.get("/pool", response_model=DbPoolStatsResponse)
+async def get_pool_stats():
+    # stats of this worker only, each worker process has its own pools
+    stats = asdict(async_engine.pool.stats())
+    if async_read_engine is not None:
+        stats["replica"] = asdict(async_read_engine.pool.stats())
+    return stats
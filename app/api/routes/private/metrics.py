@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies.private import private_access
+from app.core.metrics import collect_metrics
+from app.utils.metrics import render_prometheus
+
+router = APIRouter(prefix="/private", dependencies=[Depends(private_access)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        render_prometheus(await collect_metrics()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
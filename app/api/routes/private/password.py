@@ -0,0 +1,15 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies.private import private_access
+from app.schemas.response.private import PasswordHasherStatsResponse
+from app.services.password import password_hasher
+
+router = APIRouter(prefix="/private/password", dependencies=[Depends(private_access)])
+
+
+@router.get("/hasher", response_model=PasswordHasherStatsResponse)
+async def get_password_hasher_stats():
+    # stats of this worker only, each worker process has its own pool
+    return asdict(password_hasher.stats())
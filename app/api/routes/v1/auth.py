@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
@@ -6,14 +7,31 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.api.dependencies.auth import access_control
 from app.api.dependencies.database import AsyncSession
 from app.api.errors.run_time import NotFoundException
-from app.schemas.db.user import UserDB
-from app.schemas.response.auth import LoginTokenResponse
+from app.core.config import settings
+from app.schemas.db.user import UserPrincipalDB
+from app.schemas.request.auth import RefreshTokenInRequest
+from app.schemas.response.auth import AuthTokensResponse, LoginTokenResponse
 from app.schemas.response.user import UserGetResponse
-from app.services.auth import auth_logout_user_service, auth_user_service
+from app.selects.user import get_user_selector
+from app.services.auth import (
+    auth_logout_user_service,
+    auth_refresh_token_service,
+    auth_user_service,
+)
 
 router = APIRouter(prefix="/v1/auth")
 
 
+def _token_response(tokens: AuthTokensResponse) -> dict:
+    expires_in = tokens.access.expires_at - datetime.utcnow()
+    return {
+        "access_token": tokens.access.token,
+        "token_type": "bearer",
+        "refresh_token": tokens.refresh.token,
+        "expires_in": int(expires_in.total_seconds()),
+    }
+
+
 @router.post("/login", response_model=LoginTokenResponse)
 async def email_login(
     async_session: AsyncSession,
@@ -24,20 +42,32 @@ async def email_login(
             auth_response = await auth_user_service(
                 session=session, form_data=form_data
             )
-            return {
-                "access_token": auth_response.tokens.access.token,
-                "token_type": "bearer",
-            }
+            return _token_response(auth_response.tokens)
     except NotFoundException:
         raise HTTPException(status_code=404)
     except ValueError:
         return Response(status_code=status.HTTP_401_UNAUTHORIZED)
 
 
+@router.post("/refresh", response_model=LoginTokenResponse)
+async def refresh_token(
+    async_session: AsyncSession, body: RefreshTokenInRequest
+) -> LoginTokenResponse:
+    # no password hashing: one signature check and one update
+    try:
+        async with async_session() as session:
+            tokens = await auth_refresh_token_service(
+                session=session, refresh_token=body.refresh_token
+            )
+            return _token_response(tokens)
+    except ValueError:
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
 @router.put("/logout")
 async def logout(
     async_session: AsyncSession,
-    current_user: Annotated[UserDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
 ) -> None:
     try:
         async with async_session() as session:
@@ -53,9 +83,13 @@ async def logout(
 @router.get("/curent_user", response_model=UserGetResponse)
 async def curent_user(
     async_session: AsyncSession,
-    current_user: Annotated[UserDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
 ) -> UserGetResponse:
     try:
+        if settings.AUTH_STATELESS:
+            # the principal of a stateless token carries no names
+            async with async_session() as session:
+                return await get_user_selector(session=session, user_id=current_user.id)
         return current_user
     except NotFoundException:
         raise HTTPException(status_code=404)
@@ -1,54 +1,222 @@
-from typing import Annotated
+import io
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 
 from app.api.dependencies.auth import access_control
 from app.api.dependencies.database import AsyncSession
 from app.api.errors.run_time import NotFoundException
+from app.api.routing import FastJSONRoute
 from app.commands.post import delete_post_command
-from app.schemas.db.post import PostDB
-from app.schemas.request.post import CreatePostInRequest
-from app.schemas.response.post import PostGetResponse, PostsListResponse
-from app.services.post import create_post_service, update_post_service
-
-from app.selects.post import (  # isort: skip
+from app.core.config import settings
+from app.schemas.db.user import UserPrincipalDB
+from app.schemas.request.post import CreatePostInRequest, UpdatePostBatchItem
+from app.schemas.response.post import (
+    PostGetResponse,
+    PostsBatchCreateResponse,
+    PostsBatchResultResponse,
+    PostsImportResponse,
+    PostsListResponse,
+    PostsSearchResponse,
+)
+from app.selects.post import (
+    export_posts_selector,
     get_all_post_selector,
-    get_count_post_selector,
+    get_post_list_state_selector,
     get_post_selector,
+    get_post_version_selector,
+    search_posts_selector,
 )
+from app.services.post import (
+    create_post_service,
+    create_posts_service,
+    delete_posts_service,
+    import_posts_service,
+    update_post_service,
+    update_posts_service,
+)
+from app.utils.etag import etag_matches, make_etag, not_modified, set_etag
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.post_import import guess_import_format
 
-router = APIRouter(prefix="/v1/posts")
+router = APIRouter(prefix="/v1/posts", route_class=FastJSONRoute)
 
 
 @router.get("/", response_model=PostsListResponse)
 async def get_post_list(
     async_session: AsyncSession,
-    current_user: Annotated[PostDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+    response: Response,
     limit: int = 10,
     offset: int = 0,
+    after: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
+    try:
+        after_id = decode_cursor(after) if after else None
+    except ValueError as _:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from _
+
     async with async_session() as session:
-        return PostsListResponse(
-            posts=[
-                post
-                async for post in get_all_post_selector(
-                    session=session, user_id=current_user.id, limit=limit, offset=offset
-                )
-            ],
-            total=await get_count_post_selector(
+        # the version is read before the page, so a racing write can only make
+        # the ETag older than the body and cost the client one extra fetch
+        try:
+            state = await get_post_list_state_selector(
                 session=session, user_id=current_user.id
-            ),
+            )
+        except NotFoundException as _:
+            raise HTTPException(status_code=404) from _
+        etag = make_etag(current_user.id, state.posts_version, limit, offset, after_id)
+        if etag_matches(etag, if_none_match):
+            return not_modified(etag)
+
+        # one extra row tells whether there is a next page
+        posts = [
+            post
+            async for post in get_all_post_selector(
+                session=session,
+                user_id=current_user.id,
+                limit=limit + 1,
+                offset=offset,
+                after=after_id,
+            )
+        ]
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(posts[-1].id) if posts else None
+        set_etag(response, etag)
+        # posts are validated PostDB rows already, construct skips a second pass
+        return PostsListResponse.construct(
+            posts=posts, total=state.post_count, next_cursor=next_cursor
+        )
+
+
+@router.get("/search", response_model=PostsSearchResponse)
+async def search_posts(
+    async_session: AsyncSession,
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+    q: Annotated[str, Query(min_length=1, max_length=settings.POSTS_SEARCH_MAX_QUERY)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    async with async_session() as session:
+        posts = await search_posts_selector(
+            session=session,
+            user_id=current_user.id,
+            query=q,
+            limit=limit,
+            offset=offset,
         )
+    return PostsSearchResponse.construct(posts=posts)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_posts(
+    async_session: AsyncSession,
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+):
+    async def _ndjson_lines():
+        async with async_session() as session:
+            async for posts in export_posts_selector(
+                session=session,
+                user_id=current_user.id,
+                fetch_size=settings.POSTS_EXPORT_FETCH_SIZE,
+            ):
+                yield "".join(f"{post.json()}\n" for post in posts)
+
+    return StreamingResponse(_ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.post("/batch", response_model=PostsBatchCreateResponse)
+async def create_post_batch(
+    async_session: AsyncSession,
+    body: Annotated[
+        list[CreatePostInRequest], Body(max_items=settings.POSTS_BATCH_MAX_SIZE)
+    ],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+):
+    return await create_posts_service(
+        async_session=async_session, create_posts=body, user_id=current_user.id
+    )
+
+
+@router.patch("/batch", response_model=PostsBatchResultResponse)
+async def update_post_batch(
+    async_session: AsyncSession,
+    body: Annotated[
+        list[UpdatePostBatchItem], Body(max_items=settings.POSTS_BATCH_MAX_SIZE)
+    ],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+):
+    return await update_posts_service(
+        async_session=async_session, update_posts=body, user_id=current_user.id
+    )
+
+
+@router.delete("/batch", response_model=PostsBatchResultResponse)
+async def delete_post_batch(
+    async_session: AsyncSession,
+    ids: Annotated[
+        list[int], Body(embed=True, max_items=settings.POSTS_BATCH_MAX_SIZE)
+    ],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+):
+    return await delete_posts_service(
+        async_session=async_session, post_ids=ids, user_id=current_user.id
+    )
+
+
+@router.post("/import", response_model=PostsImportResponse)
+async def import_posts(
+    async_session: AsyncSession,
+    file: UploadFile,
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+    fmt: Annotated[Literal["ndjson", "csv"] | None, Query(alias="format")] = None,
+):
+    fmt = fmt or guess_import_format(file.filename, file.content_type)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", errors="replace", newline="")
+    try:
+        return await import_posts_service(
+            async_session=async_session,
+            stream=stream,
+            fmt=fmt,
+            user_id=current_user.id,
+        )
+    except ValueError as _:
+        raise HTTPException(status_code=400, detail=str(_)) from _
+    finally:
+        stream.detach()
 
 
 @router.get("/{post_id}", response_model=PostGetResponse)
 async def get_post(
     post_id: int,
     async_session: AsyncSession,
-    current_user: Annotated[PostDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> PostGetResponse:
     try:
         async with async_session() as session:
+            # the version probe lets a matching poll skip loading the row
+            version = await get_post_version_selector(
+                session=session, user_id=current_user.id, post_id=post_id
+            )
+            etag = make_etag(current_user.id, post_id, version)
+            if etag_matches(etag, if_none_match):
+                return not_modified(etag)
+            set_etag(response, etag)
             return await get_post_selector(
                 session=session, user_id=current_user.id, post_id=post_id
             )
@@ -61,7 +229,7 @@ async def update_post(
     async_session: AsyncSession,
     body: CreatePostInRequest,
     post_id: int,
-    current_user: Annotated[PostDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
 ):
     try:
         return await update_post_service(
@@ -78,7 +246,7 @@ async def update_post(
 async def create_post(
     async_session: AsyncSession,
     body: CreatePostInRequest,
-    current_user: Annotated[PostDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
 ):
     return await create_post_service(
         async_session=async_session, create_post=body, user_id=current_user.id
@@ -89,7 +257,7 @@ async def create_post(
 async def delete_post(
     async_session: AsyncSession,
     post_id: int,
-    current_user: Annotated[PostDB, Depends(access_control)],
+    current_user: Annotated[UserPrincipalDB, Depends(access_control)],
 ):
     try:
         async with async_session() as session:
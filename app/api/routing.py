@@ -0,0 +1,192 @@
+import inspect
+from functools import lru_cache, wraps
+from types import UnionType
+from typing import Any, Callable, Union, get_args, get_origin
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, parse_obj_as
+
+from app.api.responses import FastJSONResponse
+
+_SUB_RESPONSE = "fast_json_sub_response"
+
+
+def _model_of(annotation: Any) -> type[BaseModel] | None:
+    """The model validating an annotation, seen through lists and Optional."""
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return annotation
+    if get_origin(annotation) in (list, tuple, set, Union, UnionType):
+        for arg in get_args(annotation):
+            model = _model_of(arg)
+            if model is not None:
+                return model
+    return None
+
+
+@lru_cache(maxsize=None)
+def _nested_models(model: type[BaseModel]) -> dict[str, type[BaseModel]]:
+    nested = {
+        name: _model_of(field.outer_type_) for name, field in model.__fields__.items()
+    }
+    return {name: nested_model for name, nested_model in nested.items() if nested_model}
+
+
+@lru_cache(maxsize=None)
+def _declares(model: type[BaseModel], dto: type[BaseModel]) -> bool:
+    return dto.__fields__.keys() <= model.__fields__.keys()
+
+
+def _has_aliases(model: type[BaseModel]) -> bool:
+    pending, seen = [model], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            # models may refer to themselves
+            continue
+        seen.add(current)
+        if any(field.alias != name for name, field in current.__fields__.items()):
+            return True
+        pending.extend(_nested_models(current).values())
+    return False
+
+
+def _is_response_model(value: Any, response_model: Any) -> bool:
+    """Whether value is already an instance of response_model (or a list of
+    its model), which FastAPI would not validate again either."""
+    if inspect.isclass(response_model):
+        return type(value) is response_model
+    if get_origin(response_model) is list and isinstance(value, list):
+        (model,) = get_args(response_model)
+        return all(type(item) is model for item in value)
+    return False
+
+
+def _exposes_only(value: Any, model: type[BaseModel] | None) -> bool:
+    """Whether value holds no field that validating it as model would drop."""
+    if model is None:
+        return True
+    if isinstance(value, (list, tuple, set)):
+        classes = {type(item) for item in value}
+        if not _nested_models(model) and all(
+            issubclass(cls, BaseModel) for cls in classes
+        ):
+            # rows of a page share a class or two, checked once each
+            return all(_declares(model, cls) for cls in classes)
+        return all(_exposes_only(item, model) for item in value)
+    if isinstance(value, BaseModel):
+        if not _declares(model, type(value)):
+            return False
+        value = value.__dict__
+    elif isinstance(value, dict):
+        if not value.keys() <= model.__fields__.keys():
+            return False
+    else:
+        return True
+    return all(
+        _exposes_only(value[name], nested_model)
+        for name, nested_model in _nested_models(model).items()
+        if name in value
+    )
+
+
+def _find_response_param(signature: inspect.Signature) -> str | None:
+    for name, param in signature.parameters.items():
+        if inspect.isclass(param.annotation) and issubclass(param.annotation, Response):
+            return name
+    return None
+
+
+class FastJSONRoute(APIRoute):
+    """Route class that renders the endpoint result with FastJSONResponse.
+
+    The endpoint result is returned as a ready Response, so FastAPI skips
+    its jsonable_encoder pass. Anything but an instance of the
+    response_model (or a list of its model) is validated through the model
+    first, as is an instance carrying a value with a field the model lacks,
+    such as a DB row with an internal column. Routes setting
+    response_model_include/exclude*, or by_alias on a model with aliases,
+    keep the default FastAPI path. Enable it per router with
+    APIRouter(route_class=FastJSONRoute).
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        response_class = kwargs.get("response_class")
+        if response_class is None or isinstance(response_class, DefaultPlaceholder):
+            kwargs["response_class"] = FastJSONResponse
+        super().__init__(
+            path,
+            self._wrap_endpoint(endpoint, kwargs["response_class"], kwargs),
+            **kwargs,
+        )
+
+    @staticmethod
+    def _wrap_endpoint(
+        endpoint: Callable[..., Any], response_class: type, kwargs: dict[str, Any]
+    ) -> Callable[..., Any]:
+        response_model = kwargs.get("response_model")
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = response_model.value
+        model = _model_of(response_model)
+        if (
+            getattr(endpoint, "__fast_json__", False)
+            or not inspect.iscoroutinefunction(endpoint)
+            or not issubclass(response_class, FastJSONResponse)
+            or kwargs.get("response_model_include") is not None
+            or kwargs.get("response_model_exclude") is not None
+            or kwargs.get("response_model_exclude_unset")
+            or kwargs.get("response_model_exclude_defaults")
+            or kwargs.get("response_model_exclude_none")
+            or (
+                kwargs.get("response_model_by_alias", True)
+                and model is not None
+                and _has_aliases(model)
+            )
+        ):
+            # include_router rebuilds routes from already wrapped endpoints;
+            # the others need FastAPI's own serialization
+            return endpoint
+        signature = inspect.signature(endpoint)
+        response_param = _find_response_param(signature)
+        if response_param is None:
+            # FastAPI only hands out the sub-response (headers, status) to
+            # endpoints that ask for it
+            response_param = _SUB_RESPONSE
+            signature = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        _SUB_RESPONSE,
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Response,
+                    ),
+                ]
+            )
+        default_status = kwargs.get("status_code") or 200
+
+        @wraps(endpoint)
+        async def fast_endpoint(**values: Any) -> Any:
+            sub_response = (
+                values.pop(_SUB_RESPONSE)
+                if response_param == _SUB_RESPONSE
+                else values[response_param]
+            )
+            content = await endpoint(**values)
+            if isinstance(content, Response):
+                return content
+            if response_model is not None and not (
+                _is_response_model(content, response_model)
+                and _exposes_only(content, model)
+            ):
+                content = parse_obj_as(response_model, jsonable_encoder(content))
+            response = response_class(
+                content, status_code=sub_response.status_code or default_status
+            )
+            response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        fast_endpoint.__signature__ = signature
+        fast_endpoint.__fast_json__ = True
+        return fast_endpoint
@@ -0,0 +1,74 @@
+import argparse
+from dataclasses import replace
+from time import perf_counter
+
+from app.services.password import PasswordHashParams, make_password
+
+# scrypt memory per hash is 128 * N * r bytes; past this the pool of
+# password hasher workers could exhaust the container
+SCRYPT_MAX_MEMORY = 256 * 1024 * 1024
+
+
+def measure(params: PasswordHashParams, rounds: int = 3) -> float:
+    """Best of a few runs, in seconds; the best is the least disturbed."""
+    timings = []
+    for _ in range(rounds):
+        started = perf_counter()
+        make_password("calibration", params)
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def calibrate_pbkdf2(target: float, rounds: int = 3) -> PasswordHashParams:
+    """Iterations taking about target seconds; PBKDF2 is linear in them."""
+    params = PasswordHashParams(scheme="pbkdf2-sha256", iterations=10000)
+    for _ in range(3):
+        seconds = measure(params, rounds)
+        iterations = max(round(params.iterations * target / seconds, -3), 1000)
+        params = replace(params, iterations=int(iterations))
+    return params
+
+
+def calibrate_scrypt(
+    target: float, r: int = 8, p: int = 1, rounds: int = 3
+) -> PasswordHashParams:
+    """The largest power of two N whose hash stays within target seconds."""
+    params = PasswordHashParams(scheme="scrypt", log_n=10, r=r, p=p)
+    while 128 * 2 ** (params.log_n + 1) * r <= SCRYPT_MAX_MEMORY:
+        candidate = replace(params, log_n=params.log_n + 1)
+        if measure(candidate, rounds) > target:
+            break
+        params = candidate
+    return params
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Pick password hash parameters for a target latency on "
+        "this machine and print them as settings."
+    )
+    parser.add_argument(
+        "--scheme", choices=("pbkdf2-sha256", "scrypt"), default="pbkdf2-sha256"
+    )
+    parser.add_argument("--target-ms", type=float, default=250, help="time of one hash")
+    parser.add_argument("--scrypt-r", type=int, default=8)
+    parser.add_argument("--scrypt-p", type=int, default=1)
+    args = parser.parse_args()
+
+    target = args.target_ms / 1000
+    if args.scheme == "scrypt":
+        params = calibrate_scrypt(target, r=args.scrypt_r, p=args.scrypt_p)
+    else:
+        params = calibrate_pbkdf2(target)
+    print(f"PASSWORD_HASH_SCHEME={params.scheme}")
+    if params.scheme == "scrypt":
+        print(f"PASSWORD_SCRYPT_LOG_N={params.log_n}")
+        print(f"PASSWORD_SCRYPT_R={params.r}")
+        print(f"PASSWORD_SCRYPT_P={params.p}")
+    else:
+        print(f"PASSWORD_PBKDF2_ITERATIONS={params.iterations}")
+    print(f"# {measure(params) * 1000:.0f} ms per hash, {params.encode()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from dataclasses import dataclass
+from typing import Any
 
 from app.api.dependencies.database import AsyncSession
+from app.core.cache import selector_cache
 from app.db.repositories.post import post
+from app.db.tables.post import Post
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
@@ -26,9 +29,36 @@ class CreatePostCommand:
 create_post_command = CreatePostCommand()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CreatePostsCommand:
+    _create_rows = post.create_many
+
+    async def __call__(
+        self, session: AsyncSession, user_id: int, rows: list[dict[str, Any]]
+    ) -> list[Post]:
+        return await self._create_rows(session=session, user_id=user_id, rows=rows)
+
+
+create_posts_command = CreatePostsCommand()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CopyPostsCommand:
+    _copy_rows = post.copy_many
+
+    async def __call__(
+        self, session: AsyncSession, user_id: int, rows: list[tuple]
+    ) -> int:
+        return await self._copy_rows(session=session, user_id=user_id, rows=rows)
+
+
+copy_posts_command = CopyPostsCommand()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class UpdatePostCommand:
     _update_row = post.update
+    _cache = selector_cache
 
     async def __call__(
         self,
@@ -38,13 +68,16 @@ class UpdatePostCommand:
         user_id: int,
         description: str | None = None,
     ) -> int | None:
-        return await self._update_row(
+        result = await self._update_row(
             session=session,
             post_id=post_id,
             title=title,
             user_id=user_id,
             description=description,
         )
+        # the repository has committed, a reader refilling now sees the write
+        await self._cache.invalidate("post", (user_id, post_id))
+        return result
 
 
 update_post_command = UpdatePostCommand()
@@ -53,11 +86,65 @@ update_post_command = UpdatePostCommand()
 @dataclass(frozen=True, slots=True, kw_only=True)
 class DeletePostCommand:
     _delete_row = post.delete
+    _cache = selector_cache
 
     async def __call__(
         self, session: AsyncSession, post_id: int, user_id: int
     ) -> int | None:
-        return await self._delete_row(session=session, post_id=post_id, user_id=user_id)
+        result = await self._delete_row(
+            session=session, post_id=post_id, user_id=user_id
+        )
+        await self._cache.invalidate("post", (user_id, post_id))
+        return result
 
 
 delete_post_command = DeletePostCommand()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class UpdatePostsCommand:
+    _update_rows = post.update_many
+    _cache = selector_cache
+
+    async def __call__(
+        self, session: AsyncSession, user_id: int, rows: list[dict[str, Any]]
+    ) -> list[int]:
+        updated = await self._update_rows(session=session, user_id=user_id, rows=rows)
+        await self._cache.invalidate(
+            "post", *((user_id, post_id) for post_id in updated)
+        )
+        return updated
+
+
+update_posts_command = UpdatePostsCommand()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class DeletePostsCommand:
+    _delete_rows = post.delete_many
+    _cache = selector_cache
+
+    async def __call__(
+        self, session: AsyncSession, user_id: int, post_ids: list[int]
+    ) -> list[int]:
+        deleted = await self._delete_rows(
+            session=session, user_id=user_id, post_ids=post_ids
+        )
+        await self._cache.invalidate(
+            "post", *((user_id, post_id) for post_id in deleted)
+        )
+        return deleted
+
+
+delete_posts_command = DeletePostsCommand()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RebuildPostCountersCommand:
+    _rebuild_counts = post.rebuild_counts
+
+    async def __call__(self, session: AsyncSession, user_id: int | None = None) -> int:
+        return await self._rebuild_counts(session=session, user_id=user_id)
+
+
+rebuild_post_counters_command = RebuildPostCountersCommand()
@@ -2,13 +2,16 @@ from dataclasses import dataclass
 from datetime import datetime
 
 from app.api.dependencies.database import AsyncSession
+from app.core.cache import principal_cache, selector_cache
 from app.db.repositories.user import user
 from app.db.repositories.user_session import user_session
+from app.utils.cache import digest_key
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
 class CreateUserCommand:
     _create_user = user.create
+    _cache = selector_cache
 
     async def __call__(
         self,
@@ -18,49 +21,125 @@ class CreateUserCommand:
         last_name: str,
         hashed_password: bytes,
     ) -> int | None:
-        return await self._create_user(
+        user_id = await self._create_user(
             session=session,
             email=email,
             first_name=first_name,
             last_name=last_name,
             hashed_password=hashed_password,
         )
+        # a previous account under this id may still be cached
+        if user_id:
+            await self._cache.invalidate("user", (user_id,))
+        return user_id
 
 
 create_user_command = CreateUserCommand()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class UpdateUserPasswordCommand:
+    _update_password = user.update_password
+
+    async def __call__(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        hashed_password: bytes,
+        new_hashed_password: bytes,
+    ) -> bool:
+        # no cached selector result carries the hash
+        return await self._update_password(
+            session=session,
+            user_id=user_id,
+            hashed_password=hashed_password,
+            new_hashed_password=new_hashed_password,
+        )
+
+
+update_user_password_command = UpdateUserPasswordCommand()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class CreateUserSessionCommand:
     _create_user_session = user_session.create
+    _principal_cache = principal_cache
 
     async def __call__(
-        self, session: AsyncSession, user_id: int, token: str, expires_at: datetime
+        self,
+        session: AsyncSession,
+        user_id: int,
+        token: str,
+        expires_at: datetime,
+        refresh_token_hash: str | None = None,
+        refresh_family: str | None = None,
     ) -> int | None:
-        return await self._create_user_session(
+        user_session_id = await self._create_user_session(
             session=session,
             user_id=user_id,
             token=token,
             expires_at=expires_at,
+            refresh_token_hash=refresh_token_hash,
+            refresh_family=refresh_family,
         )
+        # A re-login within the same second reissues an identical token,
+        # so drop whatever verdict is cached for it
+        self._principal_cache.invalidate(digest_key(token))
+        return user_session_id
 
 
 create_user_session_command = CreateUserSessionCommand()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RotateUserSessionCommand:
+    _rotate_user_session = user_session.rotate
+    _principal_cache = principal_cache
+
+    async def __call__(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        refresh_token_hash: str,
+        token: str,
+        new_refresh_token_hash: str,
+        expires_at: datetime,
+    ) -> int | None:
+        user_session_id = await self._rotate_user_session(
+            session=session,
+            user_id=user_id,
+            refresh_token_hash=refresh_token_hash,
+            token=token,
+            new_refresh_token_hash=new_refresh_token_hash,
+            expires_at=expires_at,
+        )
+        if user_session_id is not None:
+            # the replaced access token must stop resolving from the cache,
+            # in this worker only; see AUTH_CACHE_TTL
+            self._principal_cache.invalidate_tag(user_id)
+        return user_session_id
+
+
+rotate_user_session_command = RotateUserSessionCommand()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class DeleteUserSessionCommand:
     _delete_user_session = user_session.delete_session
+    _principal_cache = principal_cache
 
     async def __call__(
         self,
         session: AsyncSession,
         user_id: int,
     ) -> int | None:
-        return await self._delete_user_session(
+        result = await self._delete_user_session(
             session=session,
             user_id=user_id,
         )
+        # Only this worker's cache; see AUTH_CACHE_TTL for the other workers
+        self._principal_cache.invalidate_tag(user_id)
+        return result
 
 
 delete_user_session_command = DeleteUserSessionCommand()
@@ -0,0 +1,49 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.config import settings
+from app.utils.cache import (
+    CacheBackend,
+    LocalCacheBackend,
+    LRUTTLCache,
+    RedisCacheBackend,
+    SelectorCache,
+)
+
+# Resolved principals keyed by the token digest, tagged with the user id
+principal_cache = LRUTTLCache(
+    maxsize=settings.AUTH_CACHE_MAXSIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+
+def _selector_cache_backend() -> CacheBackend | None:
+    if settings.SELECTOR_CACHE_BACKEND == "local":
+        return LocalCacheBackend(
+            maxsize=settings.SELECTOR_CACHE_MAXSIZE, ttl=settings.SELECTOR_CACHE_TTL
+        )
+    if settings.SELECTOR_CACHE_BACKEND == "redis":
+        # blocking: a request waits for a free connection instead of failing
+        pool = BlockingConnectionPool.from_url(
+            settings.SELECTOR_CACHE_REDIS_URL,
+            max_connections=settings.SELECTOR_CACHE_REDIS_POOL_SIZE,
+            timeout=settings.SELECTOR_CACHE_REDIS_TIMEOUT,
+            socket_timeout=settings.SELECTOR_CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.SELECTOR_CACHE_REDIS_TIMEOUT,
+        )
+        return RedisCacheBackend(Redis.from_pool(pool))
+    return None
+
+
+# Selector results by kind ("post", "user"); commands drop the entries of
+# the rows they write
+selector_cache = SelectorCache(
+    backend=_selector_cache_backend(),
+    ttl=settings.SELECTOR_CACHE_TTL,
+    prefix=settings.SELECTOR_CACHE_PREFIX,
+    tombstone_ttl=settings.SELECTOR_CACHE_TOMBSTONE_TTL,
+)
+
+
+async def close_selector_cache() -> None:
+    if selector_cache.backend is not None:
+        await selector_cache.backend.close()
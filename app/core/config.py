@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseSettings, PostgresDsn, validator
 
@@ -14,11 +14,106 @@ class SettingsSchema(BaseSettings):
     POSTGRES_PORT: str = '5432'
 
     SQLALCHEMY_DATABASE_URL: PostgresDsn | None = None
+    # Per worker; the server sees up to (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_USE_LIFO: bool = False
+    DB_POOL_PRE_PING: bool = True
+    # psycopg prepares a statement server side once it ran this many times on
+    # a connection, keeping the DB_PREPARED_MAX most recent; 0 prepares at
+    # once, None never does
+    DB_PREPARE_THRESHOLD: int | None = 5
+    DB_PREPARED_MAX: int = 100
+    # Behind PgBouncer in transaction mode consecutive transactions may run on
+    # different server connections, which lack each other's prepared statements
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Compiled SQL kept per engine, keyed by statement structure
+    DB_QUERY_CACHE_SIZE: int = 500
+    # Optional streaming replica serving the selectors, same pool settings
+    SQLALCHEMY_READ_DATABASE_URL: PostgresDsn | None = None
+    # A replica further behind than this many seconds serves no reads
+    DB_READ_MAX_LAG: float = 5
+    DB_READ_HEALTH_INTERVAL: float = 5
+    # Header token for /api/private; without one the routes answer 403
+    # unless PRIVATE_API_OPEN leaves access control to the network layer
+    PRIVATE_API_TOKEN: str | None = None
+    PRIVATE_API_OPEN: bool = False
+
     SECRET_KEY: str = "&3l_-av%7g^a7y4@*+75vu@525w4sn(hz^lu@t03ds"
     ALGORITHM: str = 'HS256'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     TOKEN_URL: str = "/api/v1/auth/login"
 
+    # Hashing runs in a worker pool; None workers means os.cpu_count()
+    PASSWORD_HASHER_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASHER_WORKERS: int | None = None
+    # Parameters of new hashes; a login with a hash made otherwise rehashes
+    # it. app/calibrate_password_hash.py picks them for a target latency
+    PASSWORD_HASH_SCHEME: Literal['pbkdf2-sha256', 'scrypt'] = 'pbkdf2-sha256'
+    PASSWORD_PBKDF2_ITERATIONS: int = 400000
+    # scrypt N = 2 ** LOG_N; memory is 128 * N * R bytes per hash in flight
+    PASSWORD_SCRYPT_LOG_N: int = 15
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+
+    # Authorize requests from the access token claims alone, without reading
+    # user_sessions; logouts reach other workers through the revocation file
+    # within AUTH_REVOCATION_SYNC_INTERVAL. Tokens issued before it was
+    # enabled are refused, and deactivating a user takes effect at login
+    AUTH_STATELESS: bool = False
+    # Shared by the workers of a host and kept across restarts; required with
+    # AUTH_STATELESS, as a worker's memory alone loses logouts
+    AUTH_REVOCATION_FILE: str | None = None
+    AUTH_REVOCATION_SYNC_INTERVAL: float = 1
+
+    # Per-worker cache of resolved access tokens; TTL of 0 disables it.
+    # Logout and refresh clear it in the worker handling them only, so
+    # the other workers keep accepting the token for up to AUTH_CACHE_TTL
+    AUTH_CACHE_TTL: float = 30
+    AUTH_CACHE_NEGATIVE_TTL: float = 5
+    AUTH_CACHE_MAXSIZE: int = 10000
+
+    # Read-through cache of GetPost/GetUsers. 'local' is per worker and only
+    # safe with one worker: the others miss its invalidations
+    SELECTOR_CACHE_BACKEND: Literal['none', 'local', 'redis'] = 'none'
+    SELECTOR_CACHE_TTL: float = 60
+    # How long an invalidated key refuses refills; bounds a read that started
+    # before the write
+    SELECTOR_CACHE_TOMBSTONE_TTL: float = 5
+    SELECTOR_CACHE_MAXSIZE: int = 10000
+    SELECTOR_CACHE_PREFIX: str = 'fastapiproject:'
+    SELECTOR_CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+    SELECTOR_CACHE_REDIS_POOL_SIZE: int = 10
+    SELECTOR_CACHE_REDIS_TIMEOUT: float = 0.5
+
+    METRICS_ENABLED: bool = True
+    # Shared directory for hypercorn workers; each flushes its snapshot there
+    # and /api/private/metrics serves the sum of all live workers
+    METRICS_MULTIPROCESS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5
+
+    # Share of requests traced; 0 leaves the app uninstrumented, without
+    # middleware or wrapped layers and repositories
+    TRACING_SAMPLE_RATE: float = 0
+    TRACING_EXPORTER: Literal['file', 'memory'] = 'file'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SERVICE_NAME: str = 'fastapiproject'
+
+    POSTS_BATCH_MAX_SIZE: int = 1000
+    POSTS_EXPORT_FETCH_SIZE: int = 1000
+    # Rows per COPY round-trip; each chunk is committed on its own
+    POSTS_IMPORT_CHUNK_SIZE: int = 5000
+    POSTS_IMPORT_MAX_REJECTS: int = 1000
+    POSTS_SEARCH_MAX_QUERY: int = 256
+
+    @validator("AUTH_REVOCATION_FILE", always=True)
+    def require_revocation_file(cls, v: str | None, values: dict[str, Any]) -> Any:
+        if values.get("AUTH_STATELESS") and not v:
+            raise ValueError("AUTH_STATELESS requires AUTH_REVOCATION_FILE")
+        return v
+
     @validator("SQLALCHEMY_DATABASE_URL", pre=True)
     def assemble_db_connection(cls, v: str | None, values: dict[str, Any]) -> Any:
         if isinstance(v, str):
@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+from typing import Any
+
+from app.core.cache import principal_cache, selector_cache
+from app.core.config import settings
+from app.utils.metrics import (
+    RouteMetrics,
+    merge_snapshots,
+    read_snapshots,
+    write_snapshot,
+)
+
+request_metrics = RouteMetrics()
+
+_flush_task: asyncio.Task | None = None
+
+
+def _snapshot() -> dict[str, Any]:
+    snapshot = request_metrics.snapshot()
+    principal = principal_cache.stats()
+    snapshot["caches"] = [["principal", principal.hits, principal.misses, 0]] + [
+        [f"selector.{kind}", stats.hits, stats.misses, stats.errors]
+        for kind, stats in selector_cache.stats().items()
+    ]
+    return snapshot
+
+
+async def collect_metrics() -> dict[str, Any]:
+    if settings.METRICS_MULTIPROCESS_DIR is None:
+        return _snapshot()
+    # the file work runs in a thread, off the event loop
+    await asyncio.to_thread(
+        write_snapshot, settings.METRICS_MULTIPROCESS_DIR, _snapshot()
+    )
+    # a live worker rewrites its file every interval; the counters of older
+    # ones are folded into the retired totals
+    snapshots = await asyncio.to_thread(
+        read_snapshots,
+        settings.METRICS_MULTIPROCESS_DIR,
+        max_age=settings.METRICS_FLUSH_INTERVAL * 12,
+    )
+    return merge_snapshots(snapshots)
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+        await asyncio.to_thread(
+            write_snapshot, settings.METRICS_MULTIPROCESS_DIR, _snapshot()
+        )
+
+
+async def start_metrics_flush() -> None:
+    global _flush_task
+    if settings.METRICS_MULTIPROCESS_DIR is not None and _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_periodically())
+
+
+async def stop_metrics_flush() -> None:
+    global _flush_task
+    if _flush_task is None:
+        return
+    _flush_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await _flush_task
+    _flush_task = None
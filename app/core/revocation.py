@@ -0,0 +1,33 @@
+import asyncio
+import contextlib
+
+from app.core.config import settings
+from app.utils.revocation import RevocationList
+
+# Cutoffs of stateless access tokens, fed by logins and logouts
+revocation_list = RevocationList(settings.AUTH_REVOCATION_FILE)
+
+_sync_task: asyncio.Task | None = None
+
+
+async def _sync_periodically() -> None:
+    while True:
+        await revocation_list.sync()
+        await asyncio.sleep(settings.AUTH_REVOCATION_SYNC_INTERVAL)
+
+
+async def start_revocation_sync() -> None:
+    global _sync_task
+    if _sync_task is None:
+        await revocation_list.compact()
+        _sync_task = asyncio.create_task(_sync_periodically())
+
+
+async def stop_revocation_sync() -> None:
+    global _sync_task
+    if _sync_task is None:
+        return
+    _sync_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await _sync_task
+    _sync_task = None
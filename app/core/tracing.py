@@ -0,0 +1,125 @@
+import dataclasses
+import importlib
+import inspect
+import pkgutil
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.repositories.base import BaseRepository
+from app.utils.tracing import InMemoryExporter, OTLPFileExporter, Tracer, traced
+
+LAYER_PACKAGES = ("app.services", "app.commands", "app.selects")
+REPOSITORY_PACKAGE = "app.db.repositories"
+SQL_STATEMENT_MAX_LENGTH = 2048
+
+
+def _get_exporter() -> Any:
+    if settings.TRACING_EXPORTER == "memory":
+        return InMemoryExporter()
+    return OTLPFileExporter(settings.TRACING_FILE, settings.TRACING_SERVICE_NAME)
+
+
+tracer = Tracer(exporter=_get_exporter(), sample_rate=settings.TRACING_SAMPLE_RATE)
+
+
+def _import_modules(package_name: str) -> list[Any]:
+    package = importlib.import_module(package_name)
+    return [
+        importlib.import_module(f"{package_name}.{module_info.name}")
+        for module_info in pkgutil.iter_modules(package.__path__)
+    ]
+
+
+def instrument_repository(cls: type) -> None:
+    for name, func in list(vars(cls).items()):
+        if name.startswith("__") or not callable(func):
+            continue
+        setattr(
+            cls,
+            name,
+            traced(
+                tracer, func, f"{cls.__name__}.{name}", **{"app.layer": "repository"}
+            ),
+        )
+
+
+def instrument_layers() -> None:
+    """Wraps __call__ of the service, command and select dataclasses and the
+    methods of the repositories; only called when tracing is enabled, so
+    with a sample rate of 0 nothing is wrapped."""
+    for module in _import_modules(REPOSITORY_PACKAGE):
+        for cls in vars(module).values():
+            if (
+                isinstance(cls, type)
+                and cls.__module__ == module.__name__
+                and issubclass(cls, BaseRepository)
+            ):
+                instrument_repository(cls)
+
+    for package_name in LAYER_PACKAGES:
+        layer = package_name.rsplit(".", 1)[-1]
+        for module in _import_modules(package_name):
+            for cls in vars(module).values():
+                if not (
+                    isinstance(cls, type)
+                    and cls.__module__ == module.__name__
+                    and dataclasses.is_dataclass(cls)
+                ):
+                    continue
+                for name, value in list(vars(cls).items()):
+                    # bound at import time, before the repository was wrapped
+                    if inspect.ismethod(value) and isinstance(
+                        value.__self__, BaseRepository
+                    ):
+                        setattr(cls, name, getattr(value.__self__, value.__name__))
+                if "__call__" in vars(cls):
+                    cls.__call__ = traced(
+                        tracer, cls.__call__, cls.__name__, **{"app.layer": layer}
+                    )
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if not tracer.is_tracing():
+        return
+    span = tracer.start_span(
+        "db.query",
+        kind="client",
+        attributes={
+            "db.system": "postgresql",
+            "db.operation": statement.split(None, 1)[0].upper() if statement else "",
+            "db.statement": statement[:SQL_STATEMENT_MAX_LENGTH],
+        },
+    )
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        span = spans.pop()
+        span.attributes["db.rows"] = cursor.rowcount
+        tracer.end_span(span)
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    spans = connection.info.get("trace_spans") if connection is not None else None
+    if spans:
+        span = spans.pop()
+        span.error = repr(exception_context.original_exception)
+        tracer.end_span(span)
+
+
+def instrument_engine() -> None:
+    # listening on the Engine class covers every engine, the test ones too
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
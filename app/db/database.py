@@ -1,16 +1,70 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncPool
+from app.db.routing import ReplicaHealth, RoutingSession
+
+
+def _prepare_threshold() -> int | None:
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        return None
+    return settings.DB_PREPARE_THRESHOLD
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    connection_record.driver_connection.prepared_max = settings.DB_PREPARED_MAX
+
+
+def _create_engine(url: Any) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        connect_args={"prepare_threshold": _prepare_threshold()},
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    event.listen(engine.sync_engine, "connect", _on_connect)
+    return engine
 
-async_engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
+
+async_engine = _create_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+async_read_engine: AsyncEngine | None = None
+replica_health = ReplicaHealth(
+    max_lag=settings.DB_READ_MAX_LAG, retry_after=settings.DB_READ_HEALTH_INTERVAL
 )
+if settings.SQLALCHEMY_READ_DATABASE_URL:
+    async_read_engine = _create_engine(settings.SQLALCHEMY_READ_DATABASE_URL)
+    event.listen(
+        async_read_engine.sync_engine, "handle_error", replica_health.on_engine_error
+    )
 
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
+    sync_session_class=RoutingSession,
+    info={
+        "replica": async_read_engine.sync_engine if async_read_engine else None,
+        "replica_health": replica_health,
+    },
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
     future=True,
 )
+
+
+async def start_replica_probe() -> None:
+    if async_read_engine is not None:
+        replica_health.start(async_read_engine, settings.DB_READ_HEALTH_INTERVAL)
+
+
+async def stop_replica_probe() -> None:
+    await replica_health.stop()
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from app.utils.stats import LatencyRecorder, LatencySnapshot
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PoolStats:
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait: LatencySnapshot
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """Queue of idle connections timing each get, i.e. the wait for one."""
+
+    recorder: LatencyRecorder
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        started = perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            self.recorder.record(perf_counter() - started)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait.
+
+    There is no pool event fired before a checkout starts waiting, so the
+    wait is timed on the queue of idle connections: a checkout that opens
+    a new connection instead is not queued, and its connect time is not
+    part of the wait. Everything else is counted by events.
+    """
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self._wait = self._pool.recorder = LatencyRecorder()
+        event.listen(self, "checkout", self._on_checkout)
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def _do_get(self):
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+            max_overflow=self._max_overflow,
+            checkouts=self.checkouts,
+            connects=self.connects,
+            invalidations=self.invalidations,
+            timeouts=self.timeouts,
+            wait=self._wait.snapshot(),
+        )
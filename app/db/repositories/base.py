@@ -1,6 +1,10 @@
 from typing import Type, TypeVar
 
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
 from app.db.tables.base import Base
+from app.utils.pg import pg_search
 
 ModelType = TypeVar("ModelType", bound=Base)
 
@@ -8,3 +12,14 @@ ModelType = TypeVar("ModelType", bound=Base)
 class BaseRepository:
     def __init__(self, model: Type[ModelType]) -> None:
         self.model = model
+
+    async def search(
+        self, session: Session, query_filter, *where, with_total: bool = True
+    ) -> tuple[list[ModelType], int | None]:
+        return await pg_search(
+            session,
+            query_filter,
+            self.model,
+            statement=select(self.model).where(*where),
+            with_total=with_total,
+        )
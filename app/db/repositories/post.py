@@ -1,41 +1,192 @@
-from typing import List
+from typing import Any, AsyncIterator, List
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    select,
+    table,
+    text,
+    type_coerce,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.db.repositories.base import BaseRepository, ModelType
-from app.db.tables.post import Post
+from app.db.tables.post import SEARCH_CONFIG, Post
+from app.db.tables.user import User
+
+# Per-connection staging table for COPY imports, emptied on every commit
+import_staging = table(
+    "post_import_staging",
+    column("title", String),
+    column("description", String),
+    column("create_at", DateTime),
+)
+# ts_headline markers; the only markup in a headline, the note text is
+# HTML-escaped before ts_headline copies it
+SEARCH_HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+HTML_ESCAPES = (
+    ("&", "&amp;"),
+    ("<", "&lt;"),
+    (">", "&gt;"),
+    ('"', "&quot;"),
+    ("'", "&#x27;"),
+)
+CREATE_IMPORT_STAGING = text(
+    "CREATE TEMP TABLE IF NOT EXISTS post_import_staging "
+    "(title varchar(150), description varchar, create_at timestamp) "
+    "ON COMMIT DELETE ROWS"
+)
+
+
+def _html_escape(expression: Any) -> Any:
+    # & first, so the entities added after it are not escaped again
+    for char, entity in HTML_ESCAPES:
+        expression = func.replace(expression, char, entity)
+    return expression
 
 
 class PostRepository(BaseRepository):
     async def get(self, session: Session, post_id: int, user_id: int) -> ModelType:
-        stmt = select(self.model).where(
-            self.model.id == post_id, self.model.user_id == user_id
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(model)
+            .where(model.id == post_id, model.user_id == user_id)
+            .order_by(model.id)
         )
-        return await session.scalar(stmt.order_by(self.model.id))
+        return await session.scalar(stmt)
 
     async def list(
-        self, session: Session, user_id: int, limit: int, offset: int
+        self,
+        session: Session,
+        user_id: int,
+        limit: int,
+        offset: int = 0,
+        after: int | None = None,
     ) -> List[ModelType]:
+        model = self.model
+        stmt = lambda_stmt(lambda: select(model).where(model.user_id == user_id))
+        if after is not None:
+            # keyset page: seeks past the cursor instead of skipping rows
+            stmt += lambda s: s.where(model.id > after)
+        else:
+            stmt += lambda s: s.offset(offset)
+        stmt += lambda s: s.limit(limit).order_by(model.id)
+        # a page is small: a plain execute can use a prepared statement, the
+        # server side cursor of stream_scalars never does and costs two more
+        # round-trips (DECLARE and CLOSE)
+        for row in await session.scalars(stmt):
+            yield row
+
+    async def stream(
+        self, session: Session, user_id: int, fetch_size: int
+    ) -> AsyncIterator[List[Row]]:
+        # yield_per makes psycopg use a server-side cursor fetching fetch_size rows
         stmt = (
-            select(self.model)
+            select(
+                self.model.id,
+                self.model.title,
+                self.model.description,
+                self.model.create_at,
+            )
             .where(self.model.user_id == user_id)
-            .offset(offset)
+            .order_by(self.model.id)
+            .execution_options(yield_per=fetch_size)
+        )
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def search_text(
+        self, session: Session, user_id: int, query: str, limit: int, offset: int = 0
+    ) -> List[Row]:
+        ts_query = func.websearch_to_tsquery(
+            type_coerce(SEARCH_CONFIG, REGCONFIG), query
+        )
+        rank = func.ts_rank(self.model.search_vector, ts_query)
+        # the GIN index finds the matches, only the page is ranked into order
+        page = (
+            select(self.model.id, rank.label("rank"))
+            .where(
+                self.model.user_id == user_id,
+                self.model.search_vector.bool_op("@@")(ts_query),
+            )
+            .order_by(rank.desc(), self.model.id.desc())
             .limit(limit)
+            .offset(offset)
+            .subquery()
         )
-        stream = await session.stream_scalars(stmt.order_by(self.model.id))
-        async for row in stream:
-            yield row
+        # ts_headline re-parses the text, so it runs on the page rows only
+        headline = func.ts_headline(
+            type_coerce(SEARCH_CONFIG, REGCONFIG),
+            _html_escape(func.concat_ws(" ", self.model.title, self.model.description)),
+            ts_query,
+            SEARCH_HEADLINE_OPTIONS,
+        )
+        stmt = (
+            select(
+                self.model.id,
+                self.model.title,
+                self.model.description,
+                self.model.create_at,
+                page.c.rank,
+                headline.label("headline"),
+            )
+            .join(page, page.c.id == self.model.id)
+            .order_by(page.c.rank.desc(), self.model.id.desc())
+        )
+        return (await session.execute(stmt)).all()
 
-    async def count(
-        self,
-        session: Session,
-        user_id: int,
-    ) -> ModelType:
-        stmt = select(func.count(self.model.id)).where(self.model.user_id == user_id)
+    async def get_version(
+        self, session: Session, post_id: int, user_id: int
+    ) -> int | None:
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(model.version).where(
+                model.id == post_id, model.user_id == user_id
+            )
+        )
         return await session.scalar(stmt)
 
+    async def list_state(self, session: Session, user_id: int) -> Row | None:
+        # one user row answers both the list ETag and the total
+        stmt = lambda_stmt(
+            lambda: select(User.posts_version, User.post_count).where(
+                User.id == user_id
+            )
+        )
+        return (await session.execute(stmt)).first()
+
+    async def rebuild_counts(self, session: Session, user_id: int | None = None) -> int:
+        counted = (
+            select(func.count(self.model.id))
+            .where(self.model.user_id == User.id)
+            .scalar_subquery()
+        )
+        stmt = update(User).where(User.post_count != counted)
+        if user_id is not None:
+            stmt = stmt.where(User.id == user_id)
+        result = await session.execute(
+            stmt.values(post_count=counted, posts_version=User.posts_version + 1)
+        )
+        await session.commit()
+        return result.rowcount
+
     async def create(
         self,
         session: Session,
@@ -50,19 +201,90 @@ class PostRepository(BaseRepository):
         )
         session.add(row_data)
         try:
+            await session.flush()
+            await self._touch_posts(session, user_id=user_id, delta=1)
             await session.commit()
         except IntegrityError:
             return None
         return row_data.id
 
+    async def create_many(
+        self, session: Session, user_id: int, rows: List[dict[str, Any]]
+    ) -> List[ModelType]:
+        if not rows:
+            return []
+        # executemany with RETURNING is sent as one multi-row INSERT ... RETURNING;
+        # render_nulls keeps rows with a missing description in the same batch
+        stmt = (
+            insert(self.model)
+            .returning(self.model, sort_by_parameter_order=True)
+            .execution_options(render_nulls=True)
+        )
+        result = await session.scalars(
+            stmt, [{**row, "user_id": user_id} for row in rows]
+        )
+        created = result.all()
+        await self._touch_posts(session, user_id=user_id, delta=len(created))
+        await session.commit()
+        return created
+
+    async def copy_many(self, session: Session, user_id: int, rows: List[tuple]) -> int:
+        # COPY cannot set user_id per call, so rows land in the staging table
+        # and one INSERT ... SELECT moves them into post with ownership set
+        connection = await session.connection()
+        await connection.execute(CREATE_IMPORT_STAGING)
+        raw_connection = await connection.get_raw_connection()
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(
+                "COPY post_import_staging (title, description, create_at) FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+        stmt = insert(self.model).from_select(
+            ["title", "description", "create_at", "user_id"],
+            select(
+                import_staging.c.title,
+                import_staging.c.description,
+                func.coalesce(import_staging.c.create_at, func.now()),
+                literal(user_id, Integer),
+            ),
+        )
+        await connection.execute(stmt)
+        # the staging table holds exactly this chunk and the move is all or
+        # nothing; psycopg does not keep a rowcount for INSERT ... SELECT here
+        await self._touch_posts(session, user_id=user_id, delta=len(rows))
+        await session.commit()
+        return len(rows)
+
     async def delete(self, session: Session, post_id: int, user_id: int) -> bool:
         stmt = delete(self.model).where(
             self.model.user_id == user_id, self.model.id == post_id
         )
         result = await session.execute(stmt)
+        if result.rowcount:
+            await self._touch_posts(session, user_id=user_id, delta=-result.rowcount)
         await session.commit()
         return result
 
+    async def delete_many(
+        self, session: Session, user_id: int, post_ids: List[int]
+    ) -> List[int]:
+        # one array parameter keeps a single statement shape for any batch size
+        stmt = (
+            delete(self.model)
+            .where(
+                self.model.user_id == user_id,
+                self.model.id == any_(bindparam("post_ids", type_=ARRAY(Integer))),
+            )
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = (await session.scalars(stmt, {"post_ids": post_ids})).all()
+        if deleted:
+            await self._touch_posts(session, user_id=user_id, delta=-len(deleted))
+        await session.commit()
+        return deleted
+
     async def update(
         self,
         session: Session,
@@ -74,11 +296,58 @@ class PostRepository(BaseRepository):
         stmt = (
             update(self.model)
             .where(self.model.user_id == user_id, self.model.id == post_id)
-            .values(title=title, description=description)
+            .values(
+                title=title, description=description, version=self.model.version + 1
+            )
         )
-        await session.execute(stmt)
+        result = await session.execute(stmt)
+        if result.rowcount:
+            await self._touch_posts(session, user_id=user_id)
         await session.commit()
         return post_id
 
+    async def update_many(
+        self, session: Session, user_id: int, rows: List[dict[str, Any]]
+    ) -> List[int]:
+        if not rows:
+            return []
+        batch = values(
+            column("id", Integer),
+            column("title", String),
+            column("description", String),
+            name="batch",
+        ).data([(row["id"], row["title"], row["description"]) for row in rows])
+        stmt = (
+            update(self.model)
+            .where(self.model.id == batch.c.id, self.model.user_id == user_id)
+            .values(
+                title=batch.c.title,
+                description=batch.c.description,
+                version=self.model.version + 1,
+            )
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = (await session.scalars(stmt)).all()
+        if updated:
+            await self._touch_posts(session, user_id=user_id)
+        await session.commit()
+        return updated
+
+    async def _touch_posts(
+        self, session: Session, user_id: int, delta: int = 0
+    ) -> None:
+        # must run in the same transaction as the write it accounts for;
+        # posts_version changes on every write and backs the list ETag
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                post_count=User.post_count + delta,
+                posts_version=User.posts_version + 1,
+            )
+        )
+        await session.execute(stmt)
+
 
 post = PostRepository(Post)
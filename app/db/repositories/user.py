@@ -1,6 +1,6 @@
 from typing import List
 
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
@@ -11,12 +11,20 @@ from app.schemas.db.user import UserDB
 
 class UserRepository(BaseRepository):
     async def get(self, session: Session, user_id: int) -> ModelType:
-        stmt = select(self.model).where(self.model.id == user_id)
-        return await session.scalar(stmt.order_by(self.model.id))
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(model).where(model.id == user_id).order_by(model.id)
+        )
+        return await session.scalar(stmt)
 
-    async def get_by_email(self, session: Session, email: str) -> UserDB:
-        stmt = select(self.model).where(self.model.email == email)
-        data = await session.scalar(stmt.order_by(self.model.id))
+    async def get_by_email(self, session: Session, email: str) -> UserDB | None:
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(model).where(model.email == email).order_by(model.id)
+        )
+        data = await session.scalar(stmt)
+        if data is None:
+            return None
         return UserDB.from_orm(data)
 
     async def list(self, session: Session) -> List[ModelType]:
@@ -46,5 +54,25 @@ class UserRepository(BaseRepository):
             return None
         return user_data.id
 
+    async def update_password(
+        self,
+        session: Session,
+        user_id: int,
+        hashed_password: bytes,
+        new_hashed_password: bytes,
+    ) -> bool:
+        # only over the hash that was verified, never over a newer one
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == user_id,
+                self.model.hashed_password == hashed_password,
+            )
+            .values(hashed_password=new_hashed_password)
+        )
+        result = await session.execute(stmt)
+        await session.commit()
+        return bool(result.rowcount)
+
 
 user = UserRepository(User)
@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, lambda_stmt, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.errors.run_time import NotFoundException
 from app.db.repositories.base import BaseRepository, ModelType
+from app.db.tables.user import User
 from app.db.tables.user_session import UserSession
+from app.schemas.db.user import UserPrincipalDB
 from app.schemas.db.user_session import UserSessionDB
 
 
@@ -16,26 +19,101 @@ class UserSessionRepository(BaseRepository):
         return await session.scalar(stmt.order_by(self.model.id))
 
     async def get_by_user(self, session: Session, user_id: int) -> UserSessionDB:
-        stmt = select(self.model).where(self.model.user_id == user_id)
-        data = await session.scalar(stmt.order_by(self.model.id))
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(model).where(model.user_id == user_id).order_by(model.id)
+        )
+        data = await session.scalar(stmt)
         if not data:
             raise NotFoundException
         return UserSessionDB.from_orm(data)
 
+    async def get_principal(
+        self, session: Session, email: str, access_token: str
+    ) -> UserPrincipalDB | None:
+        model = self.model
+        stmt = lambda_stmt(
+            lambda: select(
+                User.id, User.email, User.is_active, User.first_name, User.last_name
+            )
+            .join(
+                model,
+                (model.user_id == User.id) & (model.access_token == access_token),
+            )
+            .where(User.email == email)
+        )
+        data = (await session.execute(stmt)).first()
+        if not data:
+            return None
+        return UserPrincipalDB.from_orm(data)
+
     async def create(
-        self, session: Session, user_id: int, token: str, expires_at: datetime
+        self,
+        session: Session,
+        user_id: int,
+        token: str,
+        expires_at: datetime,
+        refresh_token_hash: str | None = None,
+        refresh_family: str | None = None,
     ) -> int | None:
-        user_session_data = self.model(
-            user_id=user_id,
-            access_token=token,
-            expires_at=expires_at,
+        # user_id is unique: a concurrent login replaces the session instead
+        # of failing on the index
+        stmt = (
+            insert(self.model)
+            .values(
+                user_id=user_id,
+                access_token=token,
+                expires_at=expires_at,
+                refresh_token_hash=refresh_token_hash,
+                refresh_family=refresh_family,
+            )
+            .on_conflict_do_update(
+                index_elements=[self.model.user_id],
+                set_={
+                    "access_token": token,
+                    "create_at": func.now(),
+                    "expires_at": expires_at,
+                    "refresh_token_hash": refresh_token_hash,
+                    "refresh_family": refresh_family,
+                },
+            )
+            .returning(self.model.id)
         )
-        session.add(user_session_data)
         try:
-            await session.flush()
+            return await session.scalar(stmt)
         except IntegrityError:
             return None
-        return user_session_data.id
+
+    async def rotate(
+        self,
+        session: Session,
+        user_id: int,
+        refresh_token_hash: str,
+        token: str,
+        new_refresh_token_hash: str,
+        expires_at: datetime,
+    ) -> int | None:
+        """Swaps the tokens of the session if refresh_token_hash is still
+        the current one and the user is active; None otherwise."""
+        model = self.model
+        stmt = (
+            update(model)
+            .where(
+                model.user_id == user_id,
+                model.refresh_token_hash == refresh_token_hash,
+                User.id == model.user_id,
+                User.is_active,
+            )
+            .values(
+                access_token=token,
+                refresh_token_hash=new_refresh_token_hash,
+                expires_at=expires_at,
+            )
+            .returning(model.id)
+        )
+        result = await session.scalar(stmt)
+        await session.commit()
+        return result
 
     async def delete_session(self, session: Session, user_id: int) -> bool:
         stmt = delete(self.model).where(self.model.user_id == user_id)
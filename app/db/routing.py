@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import dataclasses
+import importlib
+import inspect
+import logging
+import pkgutil
+from contextvars import ContextVar
+from functools import wraps
+from time import monotonic
+from typing import Any, Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# set while a selector runs: its statements may be served by the replica
+_reading: ContextVar[bool] = ContextVar("reading", default=False)
+# set once the request wrote, so its later reads see that write
+_pinned: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+# lag is 0 when the replica has replayed all it received, otherwise an idle
+# primary would make the age of the last replayed transaction look like lag
+REPLICA_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def pin_to_primary() -> None:
+    """Sends every following query of the current request to the primary."""
+    _pinned.set(True)
+
+
+def reset_primary_pin() -> None:
+    """Called as a request starts; servers run each request in a fresh
+    context, but in-process clients may reuse one across requests."""
+    _pinned.set(False)
+
+
+def is_pinned_to_primary() -> bool:
+    return _pinned.get()
+
+
+class ReplicaHealth:
+    """Whether the replica may serve reads: reachable and not lagging more
+    than max_lag seconds. Probed periodically, marked down on disconnects."""
+
+    def __init__(self, max_lag: float, retry_after: float) -> None:
+        self.max_lag = max_lag
+        self.retry_after = retry_after
+        self.lag: float | None = None
+        self._down_until = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return monotonic() >= self._down_until
+
+    def mark_down(self, reason: str) -> None:
+        if self.healthy:
+            logger.warning("read replica disabled: %s", reason)
+        self._down_until = monotonic() + self.retry_after
+
+    def mark_up(self) -> None:
+        if not self.healthy:
+            logger.warning("read replica enabled again")
+        self._down_until = 0.0
+
+    async def probe(self, engine: AsyncEngine) -> bool:
+        try:
+            async with engine.connect() as connection:
+                self.lag = float(await connection.scalar(REPLICA_LAG) or 0)
+        except Exception as e:
+            self.lag = None
+            self.mark_down(f"{type(e).__name__}: {e}")
+            return False
+        if self.lag > self.max_lag:
+            self.mark_down(f"lag {self.lag:.1f}s over {self.max_lag}s")
+            return False
+        self.mark_up()
+        return True
+
+    def on_engine_error(self, exception_context) -> None:
+        # a broken connection marks the replica down at once instead of
+        # failing reads until the next probe
+        if exception_context.is_disconnect:
+            self.mark_down(repr(exception_context.original_exception))
+
+    async def _probe_periodically(self, engine: AsyncEngine, interval: float) -> None:
+        while True:
+            await self.probe(engine)
+            await asyncio.sleep(interval)
+
+    def start(self, engine: AsyncEngine, interval: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_periodically(engine, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+class RoutingSession(Session):
+    """Sends selector reads to the replica and everything else to the primary.
+
+    The replica engine and its ReplicaHealth come through session info, so
+    one sessionmaker configures both. Writes pin the request to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any) -> Engine:
+        if self._flushing or isinstance(clause, UpdateBase):
+            _pinned.set(True)
+        elif _reading.get() and not _pinned.get():
+            replica = self.info.get("replica")
+            health = self.info.get("replica_health")
+            if replica is not None and (health is None or health.healthy):
+                return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def reads_from_replica(func: Callable) -> Callable:
+    """Lets the queries of a coroutine or async generator function go to
+    the replica, unless the request is pinned to the primary."""
+    if getattr(func, "__replica__", False):
+        return func
+
+    if inspect.isasyncgenfunction(func):
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    # only while the generator body runs, not between items
+                    token = _reading.set(True)
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _reading.reset(token)
+                    yield item
+            finally:
+                await iterator.aclose()
+
+    elif inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _reading.set(True)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _reading.reset(token)
+
+    else:
+        return func
+
+    wrapper.__replica__ = True
+    return wrapper
+
+
+def route_selects(package_name: str = "app.selects") -> None:
+    """Routes the __call__ of every select dataclass to the replica.
+
+    A selector that must read its own writes across requests (the session
+    token lookup right after login) opts out with `_use_primary = True`.
+    """
+    package = importlib.import_module(package_name)
+    for module_info in pkgutil.iter_modules(package.__path__):
+        module = importlib.import_module(f"{package_name}.{module_info.name}")
+        for cls in vars(module).values():
+            if (
+                isinstance(cls, type)
+                and cls.__module__ == module.__name__
+                and dataclasses.is_dataclass(cls)
+                and "__call__" in vars(cls)
+                and not getattr(cls, "_use_primary", False)
+            ):
+                cls.__call__ = reads_from_replica(cls.__call__)
@@ -3,7 +3,8 @@ from __future__ import annotations
 import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, func
+from sqlalchemy import Computed, ForeignKey, Index, String, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -11,15 +12,35 @@ from .base import Base
 if TYPE_CHECKING:
     from .user import User
 
+# 'simple' does no stemming or stop words: notes are written in several
+# languages and a language specific config would mangle the others
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
+
 
 class Post(Base):
     __tablename__ = "post"
+    __table_args__ = (
+        # every post query is scoped to its owner and pages by id
+        Index("ix_post_user_id_id", "user_id", "id"),
+        Index("ix_post_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(150))
     description: Mapped[str | None]
     create_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
     user_id: Mapped[int] = mapped_column(
         "user_id", ForeignKey("user.id"), nullable=False
     )
+    # kept by Postgres on every write; deferred so row loads never carry it
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(SEARCH_VECTOR, persisted=True),
+        deferred=True,
+    )
     user: Mapped[User] = relationship("User", back_populates="posts")
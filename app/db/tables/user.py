@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import String
+from sqlalchemy import String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -9,12 +9,14 @@ from .base import Base
 class User(Base):
     __tablename__ = "user"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(unique=True, index=True)
     hashed_password: Mapped[bytes]
     is_active: Mapped[bool] = mapped_column(default=True)
     first_name: Mapped[str | None] = mapped_column(String(30))
     last_name: Mapped[str | None] = mapped_column(String(30))
+    post_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    posts_version: Mapped[int] = mapped_column(default=0, server_default=text("0"))
     session: Mapped[UserSession] = relationship(
         "UserSession",
         uselist=False,
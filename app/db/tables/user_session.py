@@ -11,10 +11,18 @@ from .base import Base
 class UserSession(Base):
     __tablename__ = "user_sessions"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    access_token: Mapped[str] = mapped_column(String(255))
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # stateless tokens carry a generation claim on top of the email
+    access_token: Mapped[str] = mapped_column(String(1024))
+    # sha256 of the refresh token issued with access_token; a refresh must
+    # present exactly this one, an older one means it leaked
+    refresh_token_hash: Mapped[str | None] = mapped_column(String(64))
+    # set by each login and kept by refreshes, so a refresh token of an
+    # earlier login is told apart from a reused one
+    refresh_family: Mapped[str | None] = mapped_column(String(32))
     create_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
     expires_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    # one session per user; looked up on every authenticated request
     user_id: Mapped[int] = mapped_column(
-        "user_id", ForeignKey("user.id"), nullable=False
+        "user_id", ForeignKey("user.id"), nullable=False, unique=True, index=True
     )
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import sys
+from time import perf_counter
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.schemas.response.post import PostsImportResponse
+from app.selects.user import get_user_by_email_selector
+from app.services.post import import_posts_service
+from app.utils.post_import import IMPORT_FORMATS, guess_import_format
+
+
+async def import_posts(
+    path: str, email: str, fmt: str | None, chunk_size: int
+) -> PostsImportResponse:
+    async with AsyncSessionLocal() as session:
+        user = await get_user_by_email_selector(session=session, email=email)
+    if user is None:
+        raise SystemExit(f"User {email} not found")
+
+    started = perf_counter()
+
+    def _progress(report: PostsImportResponse) -> None:
+        rate = report.imported / max(perf_counter() - started, 1e-9)
+        print(
+            f"line {report.lines}: {report.imported} imported, "
+            f"{report.rejected} rejected, {rate:.0f} rows/s",
+            file=sys.stderr,
+        )
+
+    if path == "-":
+        stream = open(sys.stdin.fileno(), encoding="utf-8", newline="", closefd=False)
+    else:
+        stream = open(path, encoding="utf-8", newline="")
+    with stream:
+        return await import_posts_service(
+            async_session=AsyncSessionLocal,
+            stream=stream,
+            fmt=fmt or guess_import_format(path, None),
+            user_id=user.id,
+            chunk_size=chunk_size,
+            on_progress=_progress,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import notes from NDJSON or CSV")
+    parser.add_argument("path", help="file to import, - for stdin")
+    parser.add_argument("--email", required=True, help="owner of the notes")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, dest="fmt")
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.POSTS_IMPORT_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(import_posts(args.path, args.email, args.fmt, args.chunk_size))
+    for reject in report.rejects:
+        print(f"line {reject.line}: {reject.error}", file=sys.stderr)
+    print(
+        f"Imported {report.imported} note(s) from {report.lines} line(s), "
+        f"{report.rejected} rejected"
+    )
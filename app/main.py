@@ -1,7 +1,16 @@
 from fastapi import FastAPI
 
 from app.api.api import router as api_router
+from app.api.middleware.metrics import MetricsMiddleware
+from app.api.middleware.tracing import TracingMiddleware
+from app.core.cache import close_selector_cache
 from app.core.config import settings
+from app.core.metrics import request_metrics, start_metrics_flush, stop_metrics_flush
+from app.core.revocation import start_revocation_sync, stop_revocation_sync
+from app.core.tracing import instrument_engine, instrument_layers, tracer
+from app.db.database import start_replica_probe, stop_replica_probe
+from app.db.routing import route_selects
+from app.services.password import password_hasher
 
 
 def get_application() -> FastAPI:
@@ -10,6 +19,26 @@ def get_application() -> FastAPI:
     )
 
     application.include_router(api_router)
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware, metrics=request_metrics)
+        application.add_event_handler("startup", start_metrics_flush)
+        application.add_event_handler("shutdown", stop_metrics_flush)
+    if settings.AUTH_STATELESS:
+        application.add_event_handler("startup", start_revocation_sync)
+        application.add_event_handler("shutdown", stop_revocation_sync)
+    if settings.SQLALCHEMY_READ_DATABASE_URL:
+        # before tracing, which would hide the select coroutines behind spans
+        route_selects()
+        application.add_event_handler("startup", start_replica_probe)
+        application.add_event_handler("shutdown", stop_replica_probe)
+    if settings.TRACING_SAMPLE_RATE > 0:
+        instrument_layers()
+        instrument_engine()
+        application.add_middleware(TracingMiddleware, tracer=tracer)
+        if settings.TRACING_EXPORTER == "file":
+            application.add_event_handler("shutdown", tracer.exporter.close)
+    application.add_event_handler("shutdown", password_hasher.shutdown)
+    application.add_event_handler("shutdown", close_selector_cache)
 
     return application
 
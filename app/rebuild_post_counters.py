@@ -0,0 +1,14 @@
+import asyncio
+
+from app.commands.post import rebuild_post_counters_command
+from app.db.database import AsyncSessionLocal
+
+
+async def rebuild_post_counters() -> int:
+    async with AsyncSessionLocal() as session:
+        return await rebuild_post_counters_command(session=session)
+
+
+if __name__ == "__main__":
+    fixed = asyncio.run(rebuild_post_counters())
+    print(f"Post counters rebuilt, {fixed} user(s) were out of sync")
@@ -11,3 +11,16 @@ class PostDB(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PostSearchDB(PostDB):
+    rank: float
+    headline: str
+
+
+class PostListStateDB(BaseModel):
+    posts_version: int
+    post_count: int
+
+    class Config:
+        orm_mode = True
@@ -12,3 +12,14 @@ class UserDB(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class UserPrincipalDB(BaseModel):
+    id: int
+    email: str
+    is_active: bool
+    first_name: str | None
+    last_name: str | None
+
+    class Config:
+        orm_mode = True
@@ -5,6 +5,7 @@ class UserSessionDB(BaseModel):
     id: int
     access_token: str
     user_id: int
+    refresh_family: str | None = None
 
     class Config:
         orm_mode = True
@@ -4,3 +4,7 @@ from pydantic import BaseModel, EmailStr
 class LoginInRequest(BaseModel):
     email: EmailStr
     password: str
+
+
+class RefreshTokenInRequest(BaseModel):
+    refresh_token: str
@@ -1,6 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, constr
 
 
 class CreatePostInRequest(BaseModel):
     title: str | None
     description: str | None
+
+
+class CreatePostBatchItem(BaseModel):
+    title: constr(min_length=1, max_length=150)
+    description: str | None
+
+
+class UpdatePostBatchItem(BaseModel):
+    id: int
+    title: constr(min_length=1, max_length=150)
+    description: str | None
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class SearchQueryFilter(BaseModel):
+    filter_fields: list[str] = []
+    values: list[str] = []
+    ops: list[str] = []
+    sort_fields: list[str] = []
+    directions: list[str] = []
+    offset: int | None = None
+    limit: int | None = None
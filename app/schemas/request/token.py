@@ -15,6 +15,8 @@ class Token(BaseModel):
 
     # custom fields
     email: str | None
+    # issue time in microseconds, checked against the revocation list
+    gen: int | None = None
     settings: dict[str, Any] = dict()
 
     @property
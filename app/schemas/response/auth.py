@@ -23,3 +23,6 @@ class AuthResponse(BaseModel):
 class LoginTokenResponse(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
+    # seconds until access_token expires
+    expires_in: int
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel
 
@@ -13,6 +14,7 @@ class PostsList(BaseModel):
 class PostsListResponse(BaseModel):
     posts: list[PostsList]
     total: int
+    next_cursor: str | None = None
 
 
 class PostGetResponse(BaseModel):
@@ -20,3 +22,39 @@ class PostGetResponse(BaseModel):
     title: str | None
     description: str | None
     create_at: datetime
+
+
+class PostSearchHit(PostGetResponse):
+    rank: float
+    headline: str
+
+
+class PostsSearchResponse(BaseModel):
+    posts: list[PostSearchHit]
+
+
+class BatchItemError(BaseModel):
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class PostsBatchCreateResponse(BaseModel):
+    posts: list[PostGetResponse]
+    errors: list[BatchItemError]
+
+
+class PostsBatchResultResponse(BaseModel):
+    affected: list[int]
+    not_found: list[int]
+
+
+class ImportRejectResponse(BaseModel):
+    line: int
+    error: str
+
+
+class PostsImportResponse(BaseModel):
+    lines: int = 0
+    imported: int = 0
+    rejected: int = 0
+    rejects: list[ImportRejectResponse] = []
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+
+
+class LatencyResponse(BaseModel):
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class PoolStatsResponse(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait: LatencyResponse
+
+
+class DbPoolStatsResponse(PoolStatsResponse):
+    replica: PoolStatsResponse | None = None
+
+
+class PasswordHasherStatsResponse(BaseModel):
+    executor: str
+    workers: int
+    in_flight: int
+    queue_depth: int
+    wait: LatencyResponse
+    hashing: LatencyResponse
+    total: LatencyResponse
@@ -3,8 +3,9 @@ from typing import AsyncIterator
 
 from app.api.dependencies.database import AsyncSession
 from app.api.errors.run_time import NotFoundException
+from app.core.cache import selector_cache
 from app.db.repositories.post import post
-from app.schemas.db.post import PostDB
+from app.schemas.db.post import PostDB, PostListStateDB, PostSearchDB
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
@@ -12,10 +13,15 @@ class GetAllPosts:
     _get_list = post.list
 
     async def __call__(
-        self, session: AsyncSession, limit: int, offset: int, user_id: int
+        self,
+        session: AsyncSession,
+        limit: int,
+        offset: int,
+        user_id: int,
+        after: int | None = None,
     ) -> AsyncIterator[PostDB]:
         async for row_data in self._get_list(
-            session=session, limit=limit, offset=offset, user_id=user_id
+            session=session, limit=limit, offset=offset, user_id=user_id, after=after
         ):
             yield PostDB.from_orm(row_data)
 
@@ -24,30 +30,89 @@ get_all_post_selector = GetAllPosts()
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
-class GetCountPost:
-    _get_row = post.count
+class ExportPosts:
+    _stream = post.stream
 
-    async def __call__(self, session: AsyncSession, user_id: int) -> int:
-        row_data = await self._get_row(session=session, user_id=user_id)
-        return int(row_data) | 0
+    async def __call__(
+        self, session: AsyncSession, user_id: int, fetch_size: int
+    ) -> AsyncIterator[list[PostDB]]:
+        async for rows in self._stream(
+            session=session, user_id=user_id, fetch_size=fetch_size
+        ):
+            yield [PostDB.from_orm(row_data) for row_data in rows]
+
+
+export_posts_selector = ExportPosts()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class SearchPosts:
+    _search = post.search_text
 
+    async def __call__(
+        self, session: AsyncSession, user_id: int, query: str, limit: int, offset: int
+    ) -> list[PostSearchDB]:
+        rows = await self._search(
+            session=session, user_id=user_id, query=query, limit=limit, offset=offset
+        )
+        return [PostSearchDB.from_orm(row_data) for row_data in rows]
 
-get_count_post_selector = GetCountPost()
+
+search_posts_selector = SearchPosts()
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
 class GetPost:
     _get_row = post.get
+    # a lagging replica would refill the cache with the row just invalidated
+    _use_primary = True
+    _cache = selector_cache
 
     async def __call__(
         self, session: AsyncSession, post_id: int, user_id: int
     ) -> PostDB | None:
+        # keyed by owner too: another user's id must miss and reach the query
+        cached = await self._cache.get(PostDB, "post", user_id, post_id)
+        if cached is not None:
+            return cached
         row_data = await self._get_row(
             session=session, post_id=post_id, user_id=user_id
         )
         if not row_data:
             raise NotFoundException()
-        return PostDB.from_orm(row_data)
+        post_data = PostDB.from_orm(row_data)
+        await self._cache.set(post_data, "post", user_id, post_id)
+        return post_data
 
 
 get_post_selector = GetPost()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class GetPostVersion:
+    _get_version = post.get_version
+
+    async def __call__(self, session: AsyncSession, post_id: int, user_id: int) -> int:
+        version = await self._get_version(
+            session=session, post_id=post_id, user_id=user_id
+        )
+        if version is None:
+            raise NotFoundException()
+        return version
+
+
+get_post_version_selector = GetPostVersion()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class GetPostListState:
+    _get_state = post.list_state
+
+    async def __call__(self, session: AsyncSession, user_id: int) -> PostListStateDB:
+        row_data = await self._get_state(session=session, user_id=user_id)
+        if not row_data:
+            raise NotFoundException()
+        return PostListStateDB.from_orm(row_data)
+
+
+get_post_list_state_selector = GetPostListState()
@@ -3,8 +3,9 @@ from typing import AsyncIterator
 
 from app.api.dependencies.database import AsyncSession
 from app.api.errors.run_time import NotFoundException
+from app.core.cache import selector_cache
 from app.db.repositories.user import user
-from app.schemas.db.user import UserDB
+from app.schemas.db.user import UserDB, UserPrincipalDB
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
@@ -22,13 +23,25 @@ get_all_users_selector = GetAllUsers()
 @dataclass(frozen=True, slots=True, kw_only=True)
 class GetUsers:
     _get_user = user.get
-
-    async def __call__(self, session: AsyncSession, user_id: int) -> UserDB | None:
+    # a lagging replica would refill the cache with the row just invalidated
+    _use_primary = True
+    _cache = selector_cache
+
+    async def __call__(
+        self, session: AsyncSession, user_id: int
+    ) -> UserPrincipalDB | None:
+        # without the password hash: whoever can write the shared cache
+        # must not be able to plant one
+        cached = await self._cache.get(UserPrincipalDB, "user", user_id)
+        if cached is not None:
+            return cached
         user_data = await self._get_user(session=session, user_id=user_id)
         if not user_data:
             raise NotFoundException()
         # TODO: add if none
-        return UserDB.from_orm(user_data)
+        user_data = UserPrincipalDB.from_orm(user_data)
+        await self._cache.set(user_data, "user", user_id)
+        return user_data
 
 
 get_user_selector = GetUsers()
@@ -37,6 +50,8 @@ get_user_selector = GetUsers()
 @dataclass(frozen=True, slots=True, kw_only=True)
 class GetUsersByEmail:
     _get_user_by_email = user.get_by_email
+    # login right after sign-up must find the new account
+    _use_primary = True
 
     async def _get_user_data(self, session: AsyncSession, email):
         user_data = await self._get_user_by_email(session=session, email=email)
@@ -45,6 +60,7 @@ class GetUsersByEmail:
         return user_data
 
     async def __call__(self, session: AsyncSession, email: str) -> UserDB | None:
+        # never cached: login checks the hash it returns
         user_data = await self._get_user_data(session=session, email=email)
         if not user_data:
             return None
@@ -1,10 +1,9 @@
 from dataclasses import dataclass
 
 from app.api.dependencies.database import AsyncSession
-from app.api.errors.run_time import NotFoundException, UserNotActiveException
-from app.db.repositories.user import user
+from app.api.errors.run_time import NotFoundException
 from app.db.repositories.user_session import user_session
-from app.schemas.db.user import UserDB
+from app.schemas.db.user import UserPrincipalDB
 from app.schemas.db.user_session import UserSessionDB
 
 
@@ -26,23 +25,35 @@ class GetUserSession:
 get_user_session_selector = GetUserSession()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class GetUserSessionByUser:
+    _get_user_session_by_user = user_session.get_by_user
+    # decides whether a refresh token was reused, a lagging copy could tell
+    # a replaced session from the current one
+    _use_primary = True
+
+    async def __call__(self, session: AsyncSession, user_id: int) -> UserSessionDB:
+        return await self._get_user_session_by_user(session=session, user_id=user_id)
+
+
+get_user_session_by_user_selector = GetUserSessionByUser()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class GetUsersByToken:
-    _get_user_by_email = user.get_by_email
-    _get_user_session = user_session.get_by_user
+    _get_principal = user_session.get_principal
+    # a token is looked up right after login, before a replica may have it
+    _use_primary = True
 
     async def __call__(
         self, session: AsyncSession, username: str, access_token: str
-    ) -> UserDB | None:
-        user_data = await self._get_user_by_email(session=session, email=username)
-        if not user_data:
-            raise NotFoundException
-        user_session = await self._get_user_session(
-            session=session, user_id=user_data.id
+    ) -> UserPrincipalDB | None:
+        principal = await self._get_principal(
+            session=session, email=username, access_token=access_token
         )
-        if not user_session or user_session.access_token != access_token:
-            raise UserNotActiveException
-        return UserDB.from_orm(user_data)
+        if not principal:
+            raise NotFoundException
+        return principal
 
 
 get_user_by_token_selector = GetUsersByToken()
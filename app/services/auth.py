@@ -1,18 +1,32 @@
+import secrets
 from dataclasses import dataclass
 from datetime import datetime
+from time import time_ns
 
 from fastapi.security import OAuth2PasswordRequestForm
+from jwt import InvalidTokenError
 
 from app.api.dependencies.database import AsyncSession
 from app.api.errors.run_time import NotFoundException, UserNotActiveException
-from app.commands.user import delete_user_session_command
-from app.schemas.db.user import UserDB
-from app.schemas.response.auth import AuthResponse
+from app.commands.user import (
+    delete_user_session_command,
+    rotate_user_session_command,
+    update_user_password_command,
+)
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.schemas.db.user import UserPrincipalDB
+from app.schemas.response.auth import AuthResponse, AuthTokensResponse
 from app.selects.user import get_user_by_email_selector
-from app.selects.user_session import get_user_by_token_selector
+from app.selects.user_session import (
+    get_user_by_token_selector,
+    get_user_session_by_user_selector,
+)
 from app.services.jwt import jwt_service
-from app.services.password import hash_password
+from app.services.password import password_hasher
 from app.services.user import create_user_session_service
+from app.utils.cache import MISSING, digest_key
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
@@ -21,6 +35,11 @@ class AuthUserService:
     _jwt_service = jwt_service
     _create_user_session = create_user_session_service
     _delete_user_session = delete_user_session_command
+    _verify_password = password_hasher.verify_password
+    _needs_rehash = password_hasher.needs_rehash
+    _make_password = password_hasher.make_password
+    _update_password = update_user_password_command
+    _revocations = revocation_list
 
     async def __call__(
         self, session: AsyncSession, form_data: OAuth2PasswordRequestForm
@@ -30,58 +49,194 @@ class AuthUserService:
         )
         if not user_data:
             raise ValueError()  # Использовать кастомную
-        if not self._check_password(
-            password=form_data.password,
-            salt=user_data.hashed_password[:32],
-            hashed_password=user_data.hashed_password[32:],
+        if not await self._verify_password(
+            form_data.password, user_data.hashed_password
         ):
             raise ValueError()  # Использовать кастомную
+        if settings.AUTH_STATELESS and not user_data.is_active:
+            # stateless tokens are not checked against the user row later
+            raise ValueError()
+        if self._needs_rehash(user_data.hashed_password):
+            # the only moment the plain password is at hand
+            await self._update_password(
+                session=session,
+                user_id=user_data.id,
+                hashed_password=user_data.hashed_password,
+                new_hashed_password=await self._make_password(form_data.password),
+            )
 
         when = datetime.utcnow()
+        # only stateless tokens carry one: a token issued without it was
+        # never entered in the revocation list when its session ended
+        generation = time_ns() // 1000 if settings.AUTH_STATELESS else None
+        family = secrets.token_urlsafe(12)
         tokens = self._jwt_service.generate_tokens_pair(
             user_id=user_data.id,
             email=user_data.email,
             when=when,
+            generation=generation,
+            family=family,
         )
+        if settings.AUTH_STATELESS:
+            # one session per user, as with user_sessions: the new token
+            # replaces whatever was issued before
+            await self._revocations.revoke(
+                user_id=user_data.id,
+                before=generation,
+                ttl=self._jwt_service.access_token_exp_delta.total_seconds(),
+            )
         await self._delete_user_session(session=session, user_id=user_data.id)
         await self._create_user_session(
             session=session,
             user_id=user_data.id,
             token=tokens.access.token,
             expires_at=tokens.access.expires_at,
+            refresh_token_hash=digest_key(tokens.refresh.token).hex(),
+            refresh_family=family,
         )
         return AuthResponse(user=user_data, tokens=tokens)
 
-    @staticmethod
-    def _check_password(password: str, salt: bytes, hashed_password: bytes) -> bool:
-        return hash_password(password, salt) == hashed_password
-
 
 auth_user_service = AuthUserService()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class AuthRefreshTokenService:
+    """Trades a refresh token for a new pair without the password.
+
+    Each refresh token is good for one refresh: the session stores the hash
+    of the current one and the swap only succeeds against it. A valid but
+    already used token of the current login means two parties hold the
+    session, so it is ended; one of an earlier login is just refused.
+    """
+
+    _jwt_service = jwt_service
+    _get_user_session = get_user_session_by_user_selector
+    _rotate_user_session = rotate_user_session_command
+    _delete_user_session = delete_user_session_command
+    _revocations = revocation_list
+
+    async def __call__(
+        self, session: AsyncSession, refresh_token: str
+    ) -> AuthTokensResponse:
+        try:
+            user_id, email, family = self._jwt_service.decode_refresh_token(
+                refresh_token
+            )
+        except InvalidTokenError:
+            raise ValueError()
+
+        generation = time_ns() // 1000 if settings.AUTH_STATELESS else None
+        tokens = self._jwt_service.generate_tokens_pair(
+            user_id=user_id,
+            email=email,
+            when=datetime.utcnow(),
+            generation=generation,
+            family=family,
+        )
+        ttl = self._jwt_service.access_token_exp_delta.total_seconds()
+        user_session_id = await self._rotate_user_session(
+            session=session,
+            user_id=user_id,
+            refresh_token_hash=digest_key(refresh_token).hex(),
+            token=tokens.access.token,
+            new_refresh_token_hash=digest_key(tokens.refresh.token).hex(),
+            expires_at=tokens.access.expires_at,
+        )
+        if user_session_id is None:
+            await self._end_if_reused(session, user_id, family, ttl)
+            raise ValueError()
+        if settings.AUTH_STATELESS:
+            await self._revocations.revoke(user_id=user_id, before=generation, ttl=ttl)
+        return tokens
+
+    async def _end_if_reused(
+        self, session: AsyncSession, user_id: int, family: str, ttl: float
+    ) -> None:
+        try:
+            current = await self._get_user_session(session=session, user_id=user_id)
+        except NotFoundException:
+            # logged out
+            return
+        if current.refresh_family != family:
+            # replaced by a newer login
+            return
+        await self._delete_user_session(session=session, user_id=user_id)
+        if settings.AUTH_STATELESS:
+            await self._revocations.revoke(
+                user_id=user_id, before=time_ns() // 1000 + 1, ttl=ttl
+            )
+
+
+auth_refresh_token_service = AuthRefreshTokenService()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class AuthCheckAccessTokenService:
     _jwt_service = jwt_service
     _get_user_by_token = get_user_by_token_selector
+    _cache = principal_cache
+    _revocations = revocation_list
+
+    def _from_claims(self, access_token: str) -> UserPrincipalDB | None:
+        try:
+            payload = self._jwt_service.decode_payload(access_token)
+        except InvalidTokenError:
+            return None
+        generation = payload.get("gen")
+        if generation is None:
+            # issued before the stateless mode was enabled
+            return None
+        user_id = int(payload["sub"])
+        if self._revocations.is_revoked(user_id, generation):
+            return None
+        # the names are not in the token; /curent_user reads them
+        return UserPrincipalDB(
+            id=user_id,
+            email=payload["email"],
+            is_active=True,
+            first_name=None,
+            last_name=None,
+        )
 
     async def __call__(
         self, session: AsyncSession, access_token: str | None = None
-    ) -> UserDB | None:
-        username, expire_time = self._jwt_service.decode_token(access_token)
-        if username and expire_time and access_token:
+    ) -> UserPrincipalDB | None:
+        if not access_token:
+            return None
+        if settings.AUTH_STATELESS:
+            return self._from_claims(access_token)
+        cache_key = digest_key(access_token)
+        user = self._cache.get(cache_key, MISSING)
+        if user is not MISSING:
+            return user
+
+        try:
+            username, expire_time = self._jwt_service.decode_token(access_token)
+        except InvalidTokenError:
+            username, expire_time = None, None
+        user = None
+        if username and expire_time:
             if expire_time > int(datetime.utcnow().timestamp()):
                 try:
                     user = await self._get_user_by_token(
                         session=session, username=username, access_token=access_token
                     )
-                    if user and user.is_active:
-                        return user
-                    else:
+                    if not user.is_active:
                         raise UserNotActiveException
-                except NotFoundException:
-                    return None
-        return None
+                except (NotFoundException, UserNotActiveException):
+                    user = None
+
+        if user is None:
+            self._cache.set(cache_key, None, ttl=settings.AUTH_CACHE_NEGATIVE_TTL)
+        else:
+            self._cache.set(
+                cache_key,
+                user,
+                ttl=expire_time - datetime.utcnow().timestamp(),
+                tags=(user.id,),
+            )
+        return user
 
 
 auth_check_access_token = AuthCheckAccessTokenService()
@@ -90,9 +245,17 @@ auth_check_access_token = AuthCheckAccessTokenService()
 @dataclass(frozen=True, slots=True, kw_only=True)
 class AuthLogoutUserService:
     _logout_user = delete_user_session_command
+    _jwt_service = jwt_service
+    _revocations = revocation_list
 
     async def __call__(self, session: AsyncSession, user_id: str | None = None):
         await self._logout_user(session=session, user_id=user_id)
+        if settings.AUTH_STATELESS:
+            await self._revocations.revoke(
+                user_id=user_id,
+                before=time_ns() // 1000 + 1,
+                ttl=self._jwt_service.access_token_exp_delta.total_seconds(),
+            )
         return None
 
 
@@ -1,3 +1,4 @@
+import secrets
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Optional
@@ -30,6 +31,7 @@ class JWTService:
         when: datetime,
         email: str,
         exp_delta: timedelta,
+        generation: int | None = None,
     ) -> Token:
         return Token(
             exp=when + exp_delta,
@@ -38,6 +40,7 @@ class JWTService:
             aud=[],
             sub=user_id,
             email=email,
+            gen=generation,
         )
 
     def generate_access_token(
@@ -45,12 +48,14 @@ class JWTService:
         user_id: int,
         when: datetime,
         email: str,
+        generation: int | None = None,
     ) -> Token:
         return self.generate_token(
             exp_delta=self.access_token_exp_delta,
             when=when,
             user_id=user_id,
             email=email,
+            generation=generation,
         )
 
     def generate_refresh_token(
@@ -71,11 +76,14 @@ class JWTService:
         user_id: int,
         when: datetime,
         email: str,
+        generation: int | None = None,
+        family: str | None = None,
     ) -> AuthTokensResponse:
         access_token = self.generate_access_token(
             user_id=user_id,
             when=when,
             email=email,
+            generation=generation,
         )
         refresh_token = self.generate_refresh_token(
             user_id=user_id,
@@ -91,7 +99,13 @@ class JWTService:
                 token=self.encode_payload(
                     {
                         "sub": str(refresh_token.sub),
-                        **refresh_token.dict(include={"exp", "nbf", "iat", "aud"}),
+                        **refresh_token.dict(
+                            include={"exp", "nbf", "iat", "aud", "email"}
+                        ),
+                        "typ": "refresh",
+                        "fam": family,
+                        # two refreshes within a second must differ
+                        "jti": secrets.token_urlsafe(16),
                     }
                 ),
                 expires_at=refresh_token.exp,
@@ -99,7 +113,8 @@ class JWTService:
         )
 
     def encode_token(self, token: Token) -> str:
-        payload = token.dict(exclude={"sub"})
+        exclude = {"sub"} if token.gen is not None else {"sub", "gen"}
+        payload = token.dict(exclude=exclude)
         return self.encode_payload(payload={**payload, "sub": str(token.sub)})
 
     def encode_payload(self, payload: dict[str, Any]) -> str:
@@ -108,16 +123,28 @@ class JWTService:
             key=self.jwt_secret_key,
         )
 
+    def decode_payload(self, token: str) -> dict[str, Any]:
+        """Claims of a token with a valid signature, exp and nbf."""
+        return jwt.decode(
+            jwt=token,
+            key=self.jwt_secret_key,
+            algorithms=self.jwt_algorithms,
+        )
+
+    def decode_refresh_token(self, token: str) -> tuple[int, str, str]:
+        """User id, email and family of a refresh token; raises
+        InvalidTokenError for anything else, access tokens included."""
+        payload = self.decode_payload(token)
+        if payload.get("typ") != "refresh" or not payload.get("fam"):
+            raise jwt.exceptions.InvalidTokenError("not a refresh token")
+        return int(payload["sub"]), payload["email"], payload["fam"]
+
     def decode_token(self, token: str):
         username = None
         expire_time = None
 
         try:
-            payload = jwt.decode(
-                jwt=token,
-                key=self.jwt_secret_key,
-                algorithms=self.jwt_algorithms,
-            )
+            payload = self.decode_payload(token)
             username: Optional[str] = payload.get("email")
             expire_time: Optional[datetime] = payload.get("exp")
 
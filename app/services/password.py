@@ -1,15 +1,74 @@
+import asyncio
+import hmac
 import os
 import string
-from hashlib import pbkdf2_hmac
+from base64 import b64decode, b64encode
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from hashlib import pbkdf2_hmac, scrypt
 from random import choices
-from typing import Callable
+from time import perf_counter
+from typing import Any, Callable
 
+from app.core.config import settings
+from app.utils.stats import LatencyRecorder, LatencySnapshot
 
-def _generate_salt() -> bytes:
-    return os.urandom(32)
+SCHEMES = ('pbkdf2-sha256', 'scrypt')
+SALT_SIZE = 16
+DIGEST_SIZE = 32
+# salt[:32] + PBKDF2-SHA256(100000 iterations, dklen=128), no parameters
+LEGACY_SALT_SIZE = 32
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PasswordHashParams:
+    """Algorithm and cost; only the fields of the scheme are encoded."""
+
+    scheme: str = 'pbkdf2-sha256'
+    iterations: int = 400000
+    # scrypt: cost N = 2**log_n, block size r, parallelism p
+    log_n: int = 15
+    r: int = 8
+    p: int = 1
+
+    def encode(self) -> str:
+        if self.scheme == 'scrypt':
+            return f'ln={self.log_n},r={self.r},p={self.p}'
+        return f'i={self.iterations}'
+
+
+def _b64encode(data: bytes) -> str:
+    return b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return b64decode(data + '=' * (-len(data) % 4))
+
+
+def _derive(password: str, salt: bytes, params: PasswordHashParams) -> bytes:
+    if params.scheme == 'scrypt':
+        n = 2**params.log_n
+        return scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=params.r,
+            p=params.p,
+            # what OpenSSL allocates for these parameters, plus slack
+            maxmem=128 * params.r * (n + params.p + 2) + 1024 * 1024,
+            dklen=DIGEST_SIZE,
+        )
+    return pbkdf2_hmac(
+        hash_name='sha256',
+        password=password.encode(),
+        salt=salt,
+        iterations=params.iterations,
+        dklen=DIGEST_SIZE,
+    )
 
 
 def hash_password(password: str, salt: bytes) -> bytes:
+    """Digest of the legacy format, kept to verify hashes written by it."""
     return pbkdf2_hmac(
         hash_name='sha256',
         password=password.encode(),
@@ -19,10 +78,55 @@ def hash_password(password: str, salt: bytes) -> bytes:
     )
 
 
-def generate_hashed_pair(password: str) -> tuple[bytes, bytes]:
-    salt = _generate_salt()
-    hashed_password = hash_password(password, salt)
-    return hashed_password, salt
+def make_password(password: str, params: PasswordHashParams) -> bytes:
+    """$<scheme>$<parameters>$<salt>$<digest>, as in the PHC string format."""
+    salt = os.urandom(SALT_SIZE)
+    digest = _derive(password, salt, params)
+    return (
+        f'${params.scheme}${params.encode()}${_b64encode(salt)}${_b64encode(digest)}'
+    ).encode()
+
+
+def parse_password(
+    hashed_password: bytes,
+) -> tuple[PasswordHashParams, bytes, bytes] | None:
+    """Parameters, salt and digest of a hash; None for the legacy format."""
+    if not hashed_password.startswith(tuple(f'${s}$'.encode() for s in SCHEMES)):
+        return None
+    try:
+        _, scheme, encoded_params, salt, digest = hashed_password.decode().split('$')
+        values = dict(item.split('=') for item in encoded_params.split(','))
+        if scheme == 'scrypt':
+            params = PasswordHashParams(
+                scheme=scheme,
+                log_n=int(values['ln']),
+                r=int(values['r']),
+                p=int(values['p']),
+            )
+        else:
+            params = PasswordHashParams(scheme=scheme, iterations=int(values['i']))
+        return params, _b64decode(salt), _b64decode(digest)
+    except (ValueError, KeyError):
+        return None
+
+
+def verify_password(password: str, hashed_password: bytes) -> bool:
+    parsed = parse_password(hashed_password)
+    if parsed is None:
+        salt = hashed_password[:LEGACY_SALT_SIZE]
+        digest = hash_password(password, salt)
+        return hmac.compare_digest(digest, hashed_password[LEGACY_SALT_SIZE:])
+    params, salt, digest = parsed
+    return hmac.compare_digest(_derive(password, salt, params), digest)
+
+
+def needs_rehash(hashed_password: bytes, params: PasswordHashParams) -> bool:
+    """Whether a hash was made with other parameters than the current ones."""
+    parsed = parse_password(hashed_password)
+    if parsed is None:
+        return True
+    current, _, _ = parsed
+    return current.scheme != params.scheme or current.encode() != params.encode()
 
 
 def generate_new_password(length: int) -> str:
@@ -31,3 +135,105 @@ def generate_new_password(length: int) -> str:
 
 
 PasswordHasher = Callable[[str], tuple[bytes, bytes]]
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    # Runs inside the worker, so the elapsed time excludes the queue wait
+    started = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - started
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PasswordHasherStats:
+    executor: str
+    workers: int
+    in_flight: int
+    queue_depth: int
+    wait: LatencySnapshot
+    hashing: LatencySnapshot
+    total: LatencySnapshot
+
+
+class AsyncPasswordHasher:
+    """Runs the password hashing in a worker pool so logins never block the
+    event loop."""
+
+    def __init__(
+        self,
+        executor: str = 'thread',
+        workers: int | None = None,
+        params: PasswordHashParams = PasswordHashParams(),
+    ) -> None:
+        self.params = params
+        self.executor_type = executor
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._wait = LatencyRecorder()
+        self._hashing = LatencyRecorder()
+        self._total = LatencyRecorder()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hasher'
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        started = perf_counter()
+        try:
+            result, hashing = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, *args
+            )
+        finally:
+            self._in_flight -= 1
+        total = perf_counter() - started
+        self._hashing.record(hashing)
+        self._wait.record(max(total - hashing, 0.0))
+        self._total.record(total)
+        return result
+
+    async def make_password(self, password: str) -> bytes:
+        return await self._run(make_password, password, self.params)
+
+    async def verify_password(self, password: str, hashed_password: bytes) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        return needs_rehash(hashed_password, self.params)
+
+    def stats(self) -> PasswordHasherStats:
+        return PasswordHasherStats(
+            executor=self.executor_type,
+            workers=self.workers,
+            in_flight=self._in_flight,
+            queue_depth=max(self._in_flight - self.workers, 0),
+            wait=self._wait.snapshot(),
+            hashing=self._hashing.snapshot(),
+            total=self._total.snapshot(),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = AsyncPasswordHasher(
+    executor=settings.PASSWORD_HASHER_EXECUTOR,
+    workers=settings.PASSWORD_HASHER_WORKERS,
+    params=PasswordHashParams(
+        scheme=settings.PASSWORD_HASH_SCHEME,
+        iterations=settings.PASSWORD_PBKDF2_ITERATIONS,
+        log_n=settings.PASSWORD_SCRYPT_LOG_N,
+        r=settings.PASSWORD_SCRYPT_R,
+        p=settings.PASSWORD_SCRYPT_P,
+    ),
+)
@@ -1,10 +1,34 @@
+import asyncio
 from dataclasses import dataclass
+from typing import Callable, TextIO
+
+from pydantic import ValidationError
 
 from app.api.dependencies.database import AsyncSession
-from app.commands.post import create_post_command, update_post_command
+from app.commands.post import (
+    copy_posts_command,
+    create_post_command,
+    create_posts_command,
+    delete_posts_command,
+    update_post_command,
+    update_posts_command,
+)
+from app.core.config import settings
 from app.schemas.db.post import PostDB
-from app.schemas.request.post import CreatePostInRequest
+from app.schemas.request.post import (
+    CreatePostBatchItem,
+    CreatePostInRequest,
+    UpdatePostBatchItem,
+)
+from app.schemas.response.post import (
+    BatchItemError,
+    ImportRejectResponse,
+    PostsBatchCreateResponse,
+    PostsBatchResultResponse,
+    PostsImportResponse,
+)
 from app.selects.post import get_post_selector
+from app.utils.post_import import parse_import_stream, take_import_chunk
 
 
 @dataclass(frozen=True, slots=True, kw_only=True)
@@ -33,6 +57,80 @@ class CreatePostService:
 create_post_service = CreatePostService()
 
 
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CreatePostsService:
+    _create_rows = create_posts_command
+
+    async def __call__(
+        self,
+        async_session: AsyncSession,
+        create_posts: list[CreatePostInRequest],
+        user_id: int,
+    ) -> PostsBatchCreateResponse:
+        if not user_id:
+            raise ValueError()
+        rows, errors = [], []
+        for index, create_post in enumerate(create_posts):
+            try:
+                rows.append(CreatePostBatchItem.parse_obj(create_post.dict()).dict())
+            except ValidationError as e:
+                errors.append(BatchItemError(index=index, errors=e.errors()))
+
+        async with async_session() as session:
+            created = await self._create_rows(
+                session=session, user_id=user_id, rows=rows
+            )
+        return PostsBatchCreateResponse(
+            posts=[PostDB.from_orm(row_data) for row_data in created], errors=errors
+        )
+
+
+create_posts_service = CreatePostsService()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ImportPostsService:
+    _copy_rows = copy_posts_command
+
+    async def __call__(
+        self,
+        async_session: AsyncSession,
+        stream: TextIO,
+        fmt: str,
+        user_id: int,
+        chunk_size: int = settings.POSTS_IMPORT_CHUNK_SIZE,
+        on_progress: Callable[[PostsImportResponse], None] | None = None,
+    ) -> PostsImportResponse:
+        if not user_id:
+            raise ValueError()
+        parsed = parse_import_stream(stream, fmt)
+        report = PostsImportResponse()
+        async with async_session() as session:
+            # parsing is CPU bound, so it runs in a thread while the loop serves
+            # other requests; every chunk is a separate COPY and commit
+            while chunk := await asyncio.to_thread(
+                take_import_chunk, parsed, chunk_size
+            ):
+                if chunk.rows:
+                    report.imported += await self._copy_rows(
+                        session=session, user_id=user_id, rows=chunk.rows
+                    )
+                report.lines = chunk.last_line
+                report.rejected += len(chunk.rejects)
+                report.rejects.extend(
+                    ImportRejectResponse(line=reject.line, error=reject.error)
+                    for reject in chunk.rejects[
+                        : settings.POSTS_IMPORT_MAX_REJECTS - len(report.rejects)
+                    ]
+                )
+                if on_progress is not None:
+                    on_progress(report)
+        return report
+
+
+import_posts_service = ImportPostsService()
+
+
 @dataclass(frozen=True, slots=True, kw_only=True)
 class UpdatePostService:
     _update_row = update_post_command
@@ -62,3 +160,51 @@ class UpdatePostService:
 
 
 update_post_service = UpdatePostService()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class UpdatePostsService:
+    _update_rows = update_posts_command
+
+    async def __call__(
+        self,
+        async_session: AsyncSession,
+        update_posts: list[UpdatePostBatchItem],
+        user_id: int,
+    ) -> PostsBatchResultResponse:
+        if not user_id:
+            raise ValueError()
+        # the last patch of a repeated id wins
+        rows = {item.id: item.dict() for item in update_posts}
+        async with async_session() as session:
+            updated = await self._update_rows(
+                session=session, user_id=user_id, rows=list(rows.values())
+            )
+        return PostsBatchResultResponse(
+            affected=sorted(updated), not_found=sorted(rows.keys() - set(updated))
+        )
+
+
+update_posts_service = UpdatePostsService()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class DeletePostsService:
+    _delete_rows = delete_posts_command
+
+    async def __call__(
+        self, async_session: AsyncSession, post_ids: list[int], user_id: int
+    ) -> PostsBatchResultResponse:
+        if not user_id:
+            raise ValueError()
+        post_ids = sorted(set(post_ids))
+        async with async_session() as session:
+            deleted = await self._delete_rows(
+                session=session, user_id=user_id, post_ids=post_ids
+            )
+        return PostsBatchResultResponse(
+            affected=sorted(deleted), not_found=sorted(set(post_ids) - set(deleted))
+        )
+
+
+delete_posts_service = DeletePostsService()
@@ -0,0 +1,296 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Hashable, Iterable, Protocol, TypeVar
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def digest_key(value: str) -> bytes:
+    return hashlib.sha256(value.encode()).digest()
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class LRUTTLCache:
+    """In-process LRU cache whose entries also expire after a TTL.
+
+    Entries may carry tags so that everything derived from one owner
+    (e.g. all tokens of a user) can be dropped with a single call.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._data: OrderedDict[Hashable, tuple[float, Any, tuple]] = OrderedDict()
+        self._tags: dict[Hashable, set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key holds a live entry; unlike get, not counted."""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self._timer()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._timer():
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        tags: Iterable[Hashable] = (),
+    ) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if key in self._data:
+            self._pop(key)
+        tags = tuple(tags)
+        self._data[key] = (self._timer() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._pop(next(iter(self._data)))
+
+    def invalidate(self, key: Hashable) -> None:
+        if key in self._data:
+            self._pop(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        for key in self._tags.pop(tag, ()):
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+    def _pop(self, key: Hashable) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Sets key only when it holds nothing; False when it did."""
+        ...
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class LocalCacheBackend:
+    """Per process; a write seen by one worker does not reach the others,
+    which serve their copy until the TTL runs out."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if key in self._cache:
+            return False
+        self._cache.set(key, value, ttl=ttl)
+        return True
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None:
+        for key in keys:
+            self._cache.set(key, value, ttl=ttl)
+
+    async def close(self) -> None:
+        # holds no connections
+        pass
+
+
+class RedisCacheBackend:
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        reply = await self.client.set(key, value, px=max(int(ttl * 1000), 1), nx=True)
+        return reply is not None
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None:
+        # one round-trip; no MULTI, each SET stands on its own
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, value, px=max(int(ttl * 1000), 1))
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"$b64": base64.b64encode(value).decode()}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+
+def _decode_object(data: dict) -> Any:
+    if data.keys() == {"$b64"}:
+        return base64.b64decode(data["$b64"])
+    return data
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class KindStats:
+    hits: int
+    misses: int
+    errors: int
+
+
+# What an invalidated key holds; no JSON document is empty
+TOMBSTONE = b""
+
+
+class SelectorCache:
+    """Read-through cache for selector results, shared through a backend.
+
+    Keys are built from a kind and the ids that scope the row, owner first,
+    so one user's entries can never answer another user's lookup. A failing
+    backend counts as a miss: the database stays the source of truth.
+
+    Invalidation leaves a tombstone for tombstone_ttl seconds and refills
+    only set keys holding nothing, so a reader that fetched the row before
+    a write and stores it after the invalidation cannot bring the old row
+    back. Such a read must finish within tombstone_ttl.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None,
+        ttl: float,
+        prefix: str = "",
+        tombstone_ttl: float = 5,
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.tombstone_ttl = tombstone_ttl
+        self._stats: dict[str, list[int]] = {}
+
+    def key(self, kind: str, *parts: Any) -> str:
+        return ":".join((f"{self.prefix}{kind}", *map(str, parts)))
+
+    def _count(self, kind: str, index: int) -> None:
+        self._stats.setdefault(kind, [0, 0, 0])[index] += 1
+
+    async def get(self, model: type[ModelT], kind: str, *parts: Any) -> ModelT | None:
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(self.key(kind, *parts))
+        except Exception as e:
+            logger.warning("cache get failed: %r", e)
+            self._count(kind, 2)
+            return None
+        if not raw:
+            # absent or a tombstone
+            self._count(kind, 1)
+            return None
+        self._count(kind, 0)
+        return model.parse_obj(json.loads(raw, object_hook=_decode_object))
+
+    async def set(self, value: BaseModel, kind: str, *parts: Any) -> None:
+        if self.backend is None:
+            return
+        raw = json.dumps(value.dict(), default=_encode_default).encode()
+        try:
+            await self.backend.add(self.key(kind, *parts), raw, self.ttl)
+        except Exception as e:
+            logger.warning("cache set failed: %r", e)
+            self._count(kind, 2)
+
+    async def invalidate(self, kind: str, *keys: tuple) -> None:
+        """Replaces the entries of kind for every tuple of key parts given
+        with tombstones."""
+        if self.backend is None or not keys:
+            return
+        try:
+            await self.backend.set_many(
+                [self.key(kind, *parts) for parts in keys],
+                TOMBSTONE,
+                self.tombstone_ttl,
+            )
+        except Exception as e:
+            # the entry outlives the write by at most the TTL
+            logger.warning("cache invalidation failed: %r", e)
+            self._count(kind, 2)
+
+    def stats(self) -> dict[str, KindStats]:
+        return {
+            kind: KindStats(hits=hits, misses=misses, errors=errors)
+            for kind, (hits, misses, errors) in self._stats.items()
+        }
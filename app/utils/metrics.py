@@ -0,0 +1,195 @@
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Counters of workers that exited; not matched by the metrics-* glob
+RETIRED_FILE = "retired-metrics.json"
+LOCK_FILE = "metrics.lock"
+
+
+class RouteMetrics:
+    """Request counters and latency histograms keyed by route template.
+
+    Plain ints and lists without locks: every update happens on the event
+    loop of one worker, and workers are separate processes.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.in_flight = 0
+        self._requests: dict[tuple[str, str, str], int] = {}
+        # per bucket counts (not cumulative), then +Inf, then the sum
+        self._durations: dict[tuple[str, str], list[float]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, f"{status // 100}xx")
+        self._requests[key] = self._requests.get(key, 0) + 1
+        histogram = self._durations.get((method, route))
+        if histogram is None:
+            histogram = self._durations[(method, route)] = [0] * (
+                len(self.buckets) + 1
+            ) + [0.0]
+        histogram[bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "buckets": list(self.buckets),
+            "in_flight": self.in_flight,
+            "requests": [[*key, count] for key, count in self._requests.items()],
+            "durations": [
+                [*key, *histogram] for key, histogram in self._durations.items()
+            ],
+        }
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    merged = {"buckets": list(DEFAULT_BUCKETS), "in_flight": 0}
+    requests: dict[tuple, int] = {}
+    durations: dict[tuple, list[float]] = {}
+    caches: dict[str, list[int]] = {}
+    for snapshot in snapshots:
+        merged["buckets"] = snapshot["buckets"]
+        merged["in_flight"] += snapshot["in_flight"]
+        for *key, count in snapshot["requests"]:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + count
+        for method, route, *histogram in snapshot["durations"]:
+            total = durations.setdefault((method, route), [0] * len(histogram))
+            for i, value in enumerate(histogram):
+                total[i] += value
+        for name, *counts in snapshot.get("caches", ()):
+            total = caches.setdefault(name, [0] * len(counts))
+            for i, value in enumerate(counts):
+                total[i] += value
+    merged["requests"] = [[*key, count] for key, count in requests.items()]
+    merged["durations"] = [[*key, *histogram] for key, histogram in durations.items()]
+    merged["caches"] = [[name, *counts] for name, counts in caches.items()]
+    return merged
+
+
+def _write_atomically(path: Path, snapshot: dict[str, Any]) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(snapshot))
+    # readers never see a half written file
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(directory: str, snapshot: dict[str, Any]) -> None:
+    _write_atomically(Path(directory) / f"metrics-{os.getpid()}.json", snapshot)
+
+
+def _load(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _retire(
+    directory: Path, expired: list[Path], max_age: float
+) -> dict[str, Any] | None:
+    """Folds the snapshots of exited workers into the retired totals and
+    removes their files; an flock keeps two scrapes from folding one twice."""
+    retired_path = directory / RETIRED_FILE
+    if not expired:
+        return _load(retired_path)
+    fd = os.open(directory / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        retired = _load(retired_path)
+        folded = []
+        for path in expired:
+            try:
+                if time.time() - path.stat().st_mtime <= max_age:
+                    # flushed again meanwhile
+                    continue
+            except FileNotFoundError:
+                # folded by another worker
+                continue
+            snapshot = _load(path)
+            if snapshot is not None:
+                folded.append(snapshot)
+            path.unlink(missing_ok=True)
+        if folded:
+            retired = merge_snapshots([retired, *folded] if retired else folded)
+            # a gauge, gone with the worker
+            retired["in_flight"] = 0
+            _write_atomically(retired_path, retired)
+        return retired
+    finally:
+        os.close(fd)
+
+
+def read_snapshots(directory: str, max_age: float) -> list[dict[str, Any]]:
+    """Snapshots of the live workers, plus the totals of exited ones, so
+    that merged counters never go down (Prometheus would see a reset)."""
+    snapshots, expired, now = [], [], time.time()
+    for path in Path(directory).glob("metrics-*.json"):
+        try:
+            if now - path.stat().st_mtime > max_age:
+                # a worker that stopped flushing has exited
+                expired.append(path)
+                continue
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    retired = _retire(Path(directory), expired, max_age)
+    if retired is not None:
+        snapshots.append(retired)
+    return snapshots
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def render_prometheus(snapshot: dict[str, Any]) -> str:
+    lines = [
+        "# HELP http_requests_total Requests by route template and status class.",
+        "# TYPE http_requests_total counter",
+    ]
+    for method, route, status, count in sorted(snapshot["requests"]):
+        labels = _labels(method=method, route=route, status=status)
+        lines.append(f"http_requests_total{labels} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency, by route template.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    bounds = [*(str(float(bound)) for bound in snapshot["buckets"]), "+Inf"]
+    for method, route, *histogram in sorted(snapshot["durations"]):
+        cumulative = 0
+        for bound, count in zip(bounds, histogram[:-1]):
+            cumulative += count
+            labels = _labels(method=method, route=route, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"http_request_duration_seconds_sum{labels} {histogram[-1]!r}")
+        lines.append(f"http_request_duration_seconds_count{labels} {cumulative}")
+
+    lines += [
+        "# HELP http_requests_in_flight Requests currently being handled.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {snapshot['in_flight']}",
+    ]
+
+    caches = sorted(snapshot.get("caches", ()))
+    for metric, help_text, index in (
+        ("cache_hits_total", "Lookups answered by the cache.", 1),
+        ("cache_misses_total", "Lookups that went to the database.", 2),
+        ("cache_errors_total", "Failed cache backend calls, served uncached.", 3),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for row in caches:
+            lines.append(f"{metric}{_labels(cache=row[0])} {row[index]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,17 @@
+import base64
+import binascii
+
+
+def encode_cursor(row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, row_id = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError(cursor)
+        return int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as _:
+        raise ValueError(f"Invalid cursor: {cursor}") from _
@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.exc import ArgumentError
 from sqlalchemy.sql.sqltypes import Boolean, Integer
 
@@ -108,8 +108,8 @@ class OrderByBuilder:
             yield cls.get_order_by_by_field(model, field, direction)
 
 
-async def pg_search(pg_session, query_filter, model):
-    statement = select(model)
+def build_search_statement(model, query_filter, statement=None):
+    statement = select(model) if statement is None else statement
 
     for filter_ in FilterBuilder.get_filter(
         model, query_filter.filter_fields, query_filter.values, query_filter.ops
@@ -121,16 +121,38 @@ async def pg_search(pg_session, query_filter, model):
     ):
         statement = statement.order_by(order_by)
 
-    execute_result = await pg_session.execute(statement)
-    count = len([i for i in execute_result.scalars()])
+    return statement
 
-    if query_filter.offset:
-        statement = statement.offset(query_filter.offset)
 
-    if query_filter.limit:
-        statement = statement.limit(query_filter.limit)
+def _count_statement(statement):
+    return select(func.count()).select_from(statement.order_by(None).subquery())
+
+
+async def pg_search(pg_session, query_filter, model, statement=None, with_total=True):
+    """Fetch one page and, optionally, the total in a single round trip.
 
-    execute_result = await pg_session.execute(statement)
-    items = [i for i in execute_result.scalars()]
+    The total rides along as an uncorrelated scalar subquery, so Postgres
+    counts with a plain aggregate while the page itself stops at LIMIT.
+    """
+    statement = build_search_statement(model, query_filter, statement)
+    page = statement
+    if with_total:
+        page = page.add_columns(_count_statement(statement).scalar_subquery())
 
-    return items, count
+    if query_filter.offset:
+        page = page.offset(query_filter.offset)
+
+    if query_filter.limit:
+        page = page.limit(query_filter.limit)
+
+    rows = (await pg_session.execute(page)).all()
+    items = [row[0] for row in rows]
+
+    if not with_total:
+        return items, None
+    if rows:
+        return items, rows[0][-1]
+    if not query_filter.offset:
+        return items, 0
+    # the page is past the end, so there was no row to carry the total
+    return items, await pg_session.scalar(_count_statement(statement))
@@ -0,0 +1,146 @@
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+
+class RevocationList:
+    """Per user cutoffs for stateless tokens: a token whose generation is
+    below the cutoff of its user is revoked.
+
+    An entry only matters until the last token it revokes has expired, so
+    each one carries that time and is dropped after it; the list never holds
+    more than the users who logged in or out within one token lifetime.
+
+    With a path, revocations are appended to a JSON lines file that every
+    worker replays on start and tails with sync(), so a logout handled by
+    one worker reaches the others within a sync interval and survives
+    restarts. Writers and the compaction hold an flock on the file; the file
+    work runs in a thread, off the event loop.
+    """
+
+    def __init__(self, path: str | None = None, timer: Callable = time.time) -> None:
+        self.path = Path(path) if path else None
+        self.timer = timer
+        # user id -> (lowest valid generation, unix time the entry expires)
+        self._cutoffs: dict[int, tuple[int, float]] = {}
+        # the loop applies revocations while a thread replays the file
+        self._lock = threading.Lock()
+        self._inode: int | None = None
+        self._offset = 0
+        self._lines = 0
+
+    def __len__(self) -> int:
+        return len(self._cutoffs)
+
+    def is_revoked(self, user_id: int, generation: int) -> bool:
+        entry = self._cutoffs.get(user_id)
+        # an expired entry only covers tokens which expired themselves
+        return entry is not None and generation < entry[0]
+
+    async def revoke(self, user_id: int, before: int, ttl: float) -> None:
+        """Revokes the tokens of user_id with a generation below before;
+        ttl is the lifetime of the tokens, which bounds that of the entry."""
+        expires_at = self.timer() + ttl
+        # in effect in this worker before the write
+        self._apply(user_id, before, expires_at)
+        if self.path is not None:
+            line = json.dumps({"user_id": user_id, "before": before, "exp": expires_at})
+            await asyncio.to_thread(self._append, f"{line}\n".encode())
+
+    def _apply(self, user_id: int, before: int, expires_at: float) -> None:
+        with self._lock:
+            current = self._cutoffs.get(user_id)
+            if current is not None:
+                before = max(before, current[0])
+                expires_at = max(expires_at, current[1])
+            self._cutoffs[user_id] = (before, expires_at)
+
+    def _open_locked(self, flags: int) -> int:
+        # a compaction may replace the file between open and flock
+        while True:
+            fd = os.open(self.path, flags | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                return fd
+            os.close(fd)
+
+    def _append(self, line: bytes) -> None:
+        fd = self._open_locked(os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _read(self, fd: int) -> None:
+        stat = os.fstat(fd)
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # replaced by another worker's compaction; replaying is harmless
+            self._inode, self._offset = stat.st_ino, 0
+            self._lines = 0
+        data = os.pread(fd, stat.st_size - self._offset, self._offset)
+        # a line still being written is read on the next sync
+        data = data[: data.rfind(b"\n") + 1]
+        self._offset += len(data)
+        now = self.timer()
+        for line in data.splitlines():
+            self._lines += 1
+            try:
+                entry = json.loads(line)
+                if entry["exp"] > now:
+                    self._apply(entry["user_id"], entry["before"], entry["exp"])
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    async def sync(self) -> None:
+        """Reads the revocations of other workers and drops expired entries."""
+        now = self.timer()
+        with self._lock:
+            for user_id, (_, expires_at) in list(self._cutoffs.items()):
+                if expires_at <= now:
+                    del self._cutoffs[user_id]
+        if self.path is not None:
+            await asyncio.to_thread(self._sync)
+
+    async def compact(self) -> None:
+        """Rewrites the file with the live entries only."""
+        if self.path is not None:
+            await asyncio.to_thread(self._compact)
+
+    def _sync(self) -> None:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            self._read(fd)
+        finally:
+            os.close(fd)
+        if self._lines > 2 * len(self._cutoffs) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        fd = self._open_locked(os.O_RDONLY)
+        try:
+            self._read(fd)
+            now = self.timer()
+            with self._lock:
+                cutoffs = list(self._cutoffs.items())
+            lines = [
+                json.dumps({"user_id": user_id, "before": before, "exp": expires_at})
+                for user_id, (before, expires_at) in cutoffs
+                if expires_at > now
+            ]
+            data = "".join(f"{line}\n" for line in lines).encode()
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.path)
+            self._inode = os.stat(self.path).st_ino
+            self._offset, self._lines = len(data), len(lines)
+        finally:
+            # unlocks; writers waiting on the old file reopen the new one
+            os.close(fd)
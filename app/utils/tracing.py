@@ -0,0 +1,300 @@
+import inspect
+import json
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from random import getrandbits, random
+from time import time_ns
+from typing import Any, Callable, Iterator
+
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass(slots=True, kw_only=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    kind: str = "internal"
+    sampled: bool = True
+    # the first span of this process in the trace; its end exports the trace
+    local_root: bool = False
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """W3C trace context: 00-<trace id>-<parent id>-<flags>."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class InMemoryExporter:
+    """Collector stand-in keeping the latest finished spans."""
+
+    def __init__(self, maxlen: int = 10000) -> None:
+        self.spans: deque[Span] = deque(maxlen=maxlen)
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+class OTLPFileExporter:
+    """Appends one OTLP/JSON ExportTraceServiceRequest per trace and line,
+    the format read by the OpenTelemetry collector otlpjsonfile receiver.
+
+    Requests are encoded by the caller and written by a background thread,
+    so the event loop never waits on the disk; when the writer falls more
+    than max_queue traces behind, new traces are dropped and counted.
+    """
+
+    def __init__(self, path: str, service_name: str, max_queue: int = 10000) -> None:
+        self.path = Path(path)
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self.dropped = 0
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+
+    def _span(self, span: Span) -> dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": 0},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        if span.error:
+            otlp_span["status"] = {"code": 2, "message": span.error}
+        return otlp_span
+
+    def export(self, spans: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app"},
+                            "spans": [self._span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._write, name="otlp-file-exporter", daemon=True
+            )
+            self._thread.start()
+        try:
+            self._queue.put_nowait(json.dumps(request) + "\n")
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            while True:
+                lines = [self._queue.get()]
+                # whatever queued up meanwhile goes out with one flush
+                while not self._queue.empty():
+                    lines.append(self._queue.get_nowait())
+                file.writelines(line for line in lines if line is not None)
+                file.flush()
+                if None in lines:
+                    return
+
+    def close(self) -> None:
+        """Writes the queued traces and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+class Tracer:
+    """Head-sampled tracer keeping the active span in a context variable.
+
+    The sampling decision is taken once per trace, at its root; spans below
+    an unsampled root are not created at all. Child spans are buffered until
+    their local root ends and exported with it; a child ending after that,
+    in a streaming response or a task left running, is exported on its own.
+    """
+
+    def __init__(self, exporter: Any, sample_rate: float) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._pending: dict[str, list[Span]] = {}
+        # local roots not ended yet, per trace
+        self._open: dict[str, int] = {}
+
+    def is_tracing(self) -> bool:
+        parent = current_span.get()
+        if parent is None:
+            return self.sample_rate > 0
+        return parent.sampled
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: dict[str, Any] | None = None,
+        remote_parent: tuple[str, str, bool] | None = None,
+    ) -> Span:
+        parent = current_span.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = (
+                parent.trace_id,
+                parent.span_id,
+                parent.sampled,
+            )
+        elif remote_parent is not None:
+            trace_id, parent_id, sampled = remote_parent
+        else:
+            trace_id, parent_id = f"{getrandbits(128) or 1:032x}", None
+            sampled = random() < self.sample_rate
+        if parent is None and sampled:
+            self._open[trace_id] = self._open.get(trace_id, 0) + 1
+        return Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=f"{getrandbits(64) or 1:016x}",
+            parent_id=parent_id,
+            kind=kind,
+            sampled=sampled,
+            local_root=parent is None,
+            start_ns=time_ns(),
+            attributes=attributes or {},
+        )
+
+    def end_span(self, span: Span) -> None:
+        if not span.sampled:
+            return
+        span.end_ns = time_ns()
+        trace_id = span.trace_id
+        if not span.local_root:
+            if trace_id in self._open:
+                self._pending.setdefault(trace_id, []).append(span)
+            else:
+                self.exporter.export([span])
+            return
+        # another request of the same trace may still be running here
+        if self._open.get(trace_id, 1) > 1:
+            self._open[trace_id] -= 1
+            self._pending.setdefault(trace_id, []).append(span)
+            return
+        self._open.pop(trace_id, None)
+        spans = self._pending.pop(trace_id, [])
+        spans.append(span)
+        self.exporter.export(spans)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: dict[str, Any] | None = None,
+        remote_parent: tuple[str, str, bool] | None = None,
+    ) -> Iterator[Span]:
+        span = self.start_span(name, kind, attributes, remote_parent)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            self.end_span(span)
+
+
+def traced(tracer: Tracer, func: Callable, name: str, **attributes: Any) -> Callable:
+    """Wraps a coroutine or async generator function in a span.
+
+    When nothing is being traced the wrapper hands back the original
+    coroutine or generator, so the cost is one function call.
+    """
+    if getattr(func, "__traced__", False):
+        return func
+
+    if inspect.isasyncgenfunction(func):
+
+        async def _iterate(args: tuple, kwargs: dict) -> Any:
+            span = tracer.start_span(name, attributes=dict(attributes))
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    # active only while the generator body runs, the caller
+                    # between two items is not part of this span
+                    token = current_span.set(span)
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except BaseException as e:
+                        span.error = f"{type(e).__name__}: {e}"
+                        raise
+                    finally:
+                        current_span.reset(token)
+                    yield item
+            finally:
+                await iterator.aclose()
+                tracer.end_span(span)
+
+    elif inspect.iscoroutinefunction(func):
+
+        async def _iterate(args: tuple, kwargs: dict) -> Any:
+            with tracer.span(name, attributes=dict(attributes)):
+                return await func(*args, **kwargs)
+
+    else:
+        return func
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not tracer.is_tracing():
+            return func(*args, **kwargs)
+        return _iterate(args, kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
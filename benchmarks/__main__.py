@@ -0,0 +1,85 @@
+"""Benchmark suite for the API hot paths.
+
+    python -m benchmarks --suite all --output results.json
+    python -m benchmarks --baseline benchmarks/baseline.json
+
+micro times single functions (JWT, PBKDF2, from_orm, serialization); e2e
+drives the ASGI app through httpx against a Postgres database given by
+--database-url or BENCH_DATABASE_URL; statements compares the psycopg
+prepare modes on the hot repository queries. Latencies are reported in ms.
+
+benchmarks/baseline.json is a run of the whole suite with the default
+iterations against a local Postgres; latencies depend on the host, so
+record a baseline on the machine the comparison runs on.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from benchmarks.harness import compare, dump_results, load_json, save_json
+
+
+async def run(args: argparse.Namespace) -> list:
+    results = []
+    if args.suite in ("micro", "all"):
+        from benchmarks.micro import run_micro
+
+        results += await run_micro(args.iterations)
+    if args.suite in ("e2e", "all"):
+        from benchmarks.e2e import run_e2e
+
+        results += await run_e2e(args.database_url, args.iterations)
+    if args.suite in ("statements", "all"):
+        from benchmarks.statements import run_statements
+
+        results += await run_statements(args.database_url, args.iterations)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--suite", choices=("micro", "e2e", "statements", "all"), default="all"
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL") or os.getenv("TEST_DATABASE_URL"),
+    )
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative p50/p95 growth reported as a regression",
+    )
+    args = parser.parse_args()
+    if args.suite != "micro" and not args.database_url:
+        parser.error(f"{args.suite} needs --database-url or BENCH_DATABASE_URL")
+
+    current = dump_results(asyncio.run(run(args)))
+    if args.output:
+        save_json(args.output, current)
+
+    if args.baseline:
+        lines, regressed = compare(current, load_json(args.baseline), args.threshold)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+
+    print(
+        f"{'benchmark':<36} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    )
+    for name, result in current["results"].items():
+        print(
+            f"{name:<36} {result['ops_per_s']:>10.1f} {result['p50']:>10.3f}"
+            f" {result['p95']:>10.3f} {result['p99']:>10.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import itertools
+
+import httpx
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.dependencies.database import get_session
+from app.core.config import settings
+from app.db.tables.base import Base
+from app.db.tables.post import Post
+from app.db.tables.user import User
+from app.db.tables.user_session import UserSession
+from app.main import get_application
+from app.schemas.request.user import CreateUserInRequest
+from app.services.user import create_user_service
+from benchmarks.harness import BenchResult, bench
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+POSTS_URL = "/api/v1/posts/"
+
+
+async def _cleanup(sessionmaker: async_sessionmaker) -> None:
+    # only the benchmark user's rows are touched, never the whole database
+    async with sessionmaker() as session:
+        user_id = await session.scalar(select(User.id).where(User.email == BENCH_EMAIL))
+        if user_id is not None:
+            await session.execute(delete(Post).where(Post.user_id == user_id))
+            await session.execute(
+                delete(UserSession).where(UserSession.user_id == user_id)
+            )
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+
+
+def _checked(status_code: int):
+    def check(response: httpx.Response) -> httpx.Response:
+        if response.status_code != status_code:
+            raise RuntimeError(
+                f"{response.request.method} {response.request.url}: "
+                f"{response.status_code} {response.text[:200]}"
+            )
+        return response
+
+    return check
+
+
+async def run_e2e(
+    database_url: str, iterations: int, seed_posts: int = 1000
+) -> list[BenchResult]:
+    """Drives the ASGI app in process through httpx against database_url.
+
+    Tables are created when missing; the benchmark user and its rows are
+    removed before and after the run.
+    """
+    engine = create_async_engine(database_url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await _cleanup(sessionmaker)
+
+    app = get_application()
+
+    async def _get_session():
+        yield sessionmaker
+
+    app.dependency_overrides[get_session] = _get_session
+    ok = _checked(200)
+    results = []
+    try:
+        await create_user_service(
+            async_session=sessionmaker,
+            create_user=CreateUserInRequest(
+                first_name="Bench",
+                last_name="Bench",
+                email=BENCH_EMAIL,
+                password=BENCH_PASSWORD,
+            ),
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            login_data = {"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+
+            async def login():
+                return ok(await client.post(settings.TOKEN_URL, data=login_data))
+
+            results.append(
+                await bench("e2e.login", login, max(iterations // 50, 5), warmup=1)
+            )
+            refresh_data = {"refresh_token": (await login()).json()["refresh_token"]}
+
+            async def refresh():
+                response = ok(
+                    await client.post("/api/v1/auth/refresh", json=refresh_data)
+                )
+                # every refresh token is good for one refresh only
+                refresh_data["refresh_token"] = response.json()["refresh_token"]
+                return response
+
+            results.append(await bench("e2e.refresh", refresh, iterations))
+            token = (await refresh()).json()["access_token"]
+            client.headers["Authorization"] = f"Bearer {token}"
+
+            async def current_user():
+                ok(await client.get("/api/v1/auth/curent_user"))
+
+            results.append(await bench("e2e.auth", current_user, iterations))
+
+            created = []
+
+            async def create():
+                response = await client.post(
+                    POSTS_URL, json={"title": "Bench title", "description": "Bench"}
+                )
+                created.append(ok(response).json()["id"])
+
+            results.append(await bench("e2e.post.create", create, iterations))
+
+            batch = [{"title": f"Seed {i}"} for i in range(seed_posts)]
+            size = settings.POSTS_BATCH_MAX_SIZE
+            for start in range(0, seed_posts, size):
+                end = start + size
+                chunk = batch[start:end]
+                ok(await client.post(f"{POSTS_URL}batch", json=chunk))
+
+            post_ids = itertools.cycle(created)
+
+            async def get():
+                ok(await client.get(f"{POSTS_URL}{next(post_ids)}"))
+
+            results.append(await bench("e2e.post.get", get, iterations))
+
+            for limit, offset in itertools.product((10, 100), (0, seed_posts)):
+                params = {"limit": limit, "offset": offset}
+
+                async def page(params=params):
+                    ok(await client.get(POSTS_URL, params=params))
+
+                results.append(
+                    await bench(
+                        f"e2e.post.list[limit={limit},offset={offset}]",
+                        page,
+                        iterations,
+                    )
+                )
+
+            async def update():
+                ok(
+                    await client.patch(
+                        f"{POSTS_URL}{next(post_ids)}",
+                        json={"title": "Bench title 2", "description": None},
+                    )
+                )
+
+            results.append(await bench("e2e.post.update", update, iterations))
+
+            deletable = iter(created)
+
+            async def remove():
+                ok(await client.delete(f"{POSTS_URL}{next(deletable)}"))
+
+            # every delete consumes one post made by the create benchmark
+            results.append(
+                await bench("e2e.post.delete", remove, len(created) - 3, warmup=3)
+            )
+    finally:
+        await _cleanup(sessionmaker)
+        await engine.dispose()
+    return results
@@ -0,0 +1,102 @@
+import inspect
+import json
+import platform
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from app.utils.stats import percentile
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class BenchResult:
+    name: str
+    iterations: int
+    ops_per_s: float
+    # milliseconds
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+
+
+async def bench(
+    name: str,
+    func: Callable[[], Any | Awaitable[Any]],
+    iterations: int,
+    warmup: int = 3,
+) -> BenchResult:
+    """Times func one call at a time; awaitable results are awaited."""
+    for _ in range(warmup):
+        if inspect.isawaitable(result := func()):
+            await result
+
+    samples = []
+    started = perf_counter()
+    for _ in range(iterations):
+        call_started = perf_counter()
+        if inspect.isawaitable(result := func()):
+            await result
+        samples.append(perf_counter() - call_started)
+    elapsed = perf_counter() - started
+
+    samples.sort()
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        ops_per_s=round(iterations / elapsed, 1),
+        mean=round(sum(samples) / iterations * 1000, 4),
+        p50=round(percentile(samples, 0.50) * 1000, 4),
+        p95=round(percentile(samples, 0.95) * 1000, 4),
+        p99=round(percentile(samples, 0.99) * 1000, 4),
+    )
+
+
+def dump_results(results: list[BenchResult]) -> dict[str, Any]:
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> tuple[list[str], list[str]]:
+    """Returns (report lines, regressed names); a benchmark regresses when
+    its p50 or p95 grows by more than threshold (0.1 = 10%)."""
+    lines = [f"{'benchmark':<36} {'p50 ms':>10} {'Δp50':>8} {'p95 ms':>10} {'Δp95':>8}"]
+    regressed = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            lines.append(f"{name:<36} {result['p50']:>10.3f} {'new':>8}")
+            continue
+        deltas = [
+            (result[key] - base[key]) / base[key] if base[key] else 0.0
+            for key in ("p50", "p95")
+        ]
+        flag = ""
+        if max(deltas) > threshold:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        lines.append(
+            f"{name:<36} {result['p50']:>10.3f} {deltas[0]:>+8.1%}"
+            f" {result['p95']:>10.3f} {deltas[1]:>+8.1%}{flag}"
+        )
+    return lines, regressed
+
+
+def load_json(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,330 @@
+"""Load generator driving the API with a weighted mix of note-taking traffic.
+
+    python -m benchmarks.loadgen benchmarks/scenarios/notes_mix.toml \\
+        --base-url http://localhost:8000
+    python -m benchmarks.loadgen benchmarks/scenarios/notes_mix.toml --in-process
+
+Each virtual user owns an account (one session per user is kept by the
+API, so sharing accounts would revoke each other's tokens), logs in once
+through /api/v1/auth/login and reuses the token until the scenario's
+occasional "refresh" action renews it (or "login", paying for PBKDF2). Per endpoint latency percentiles and
+error rates are printed every report interval.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import httpx
+
+from app.utils.stats import percentile
+
+ACTIONS = ("list", "get", "create", "update", "delete", "login", "refresh")
+POSTS_URL = "/api/v1/posts/"
+LOGIN_URL = "/api/v1/auth/login"
+REFRESH_URL = "/api/v1/auth/refresh"
+USERS_URL = "/api/v1/users/"
+EMAIL_TEMPLATE = "loadgen-{n}@example.com"
+PASSWORD = "loadgen-password"
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class Scenario:
+    name: str
+    users: int
+    duration: float
+    ramp_up: float
+    think_time: tuple[float, float]
+    weights: dict[str, float]
+    list_limits: tuple[int, ...] = (10,)
+    report_interval: float = 5
+    email_template: str = EMAIL_TEMPLATE
+    password: str = PASSWORD
+
+    @classmethod
+    def load(cls, path: str) -> "Scenario":
+        raw = Path(path).read_bytes()
+        data = (
+            tomllib.loads(raw.decode()) if path.endswith(".toml") else json.loads(raw)
+        )
+        unknown = set(data.get("weights", {})) - set(ACTIONS)
+        if unknown:
+            raise ValueError(f"unknown actions in weights: {sorted(unknown)}")
+        return cls(
+            name=data.get("name", Path(path).stem),
+            users=data["users"],
+            duration=data["duration"],
+            ramp_up=data.get("ramp_up", 0),
+            think_time=tuple(data.get("think_time", (0, 0))),
+            weights=data["weights"],
+            list_limits=tuple(data.get("list_limits", (10,))),
+            report_interval=data.get("report_interval", 5),
+            email_template=data.get("email_template", EMAIL_TEMPLATE),
+            password=data.get("password", PASSWORD),
+        )
+
+
+@dataclass(slots=True)
+class EndpointWindow:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    """Per endpoint samples, cut into report intervals."""
+
+    def __init__(self) -> None:
+        self.window: dict[str, EndpointWindow] = {}
+        self.total: dict[str, EndpointWindow] = {}
+
+    def record(self, endpoint: str, seconds: float, error: bool) -> None:
+        for windows in (self.window, self.total):
+            window = windows.setdefault(endpoint, EndpointWindow())
+            window.latencies.append(seconds)
+            window.errors += error
+
+    def cut(self) -> dict[str, EndpointWindow]:
+        window, self.window = self.window, {}
+        return window
+
+
+def summarize(windows: dict[str, EndpointWindow], seconds: float) -> dict[str, Any]:
+    summary = {}
+    for endpoint, window in sorted(windows.items()):
+        samples = sorted(window.latencies)
+        summary[endpoint] = {
+            "count": len(samples),
+            "rps": round(len(samples) / seconds, 1) if seconds else 0.0,
+            "error_rate": round(window.errors / len(samples), 4),
+            "p50": round(percentile(samples, 0.50) * 1000, 2),
+            "p95": round(percentile(samples, 0.95) * 1000, 2),
+            "p99": round(percentile(samples, 0.99) * 1000, 2),
+        }
+    return summary
+
+
+def print_summary(title: str, summary: dict[str, Any]) -> None:
+    print(title, file=sys.stderr)
+    for endpoint, row in summary.items():
+        print(
+            f"  {endpoint:<16} {row['count']:>7} req {row['rps']:>8.1f} rps"
+            f"  p50 {row['p50']:>8.2f}  p95 {row['p95']:>8.2f}"
+            f"  p99 {row['p99']:>8.2f} ms  errors {row['error_rate']:.2%}",
+            file=sys.stderr,
+        )
+
+
+class VirtualUser:
+    def __init__(
+        self, n: int, client: httpx.AsyncClient, scenario: Scenario, recorder: Recorder
+    ) -> None:
+        self.client = client
+        self.scenario = scenario
+        self.recorder = recorder
+        self.email = scenario.email_template.format(n=n)
+        self.headers: dict[str, str] = {}
+        self.refresh_token: str | None = None
+        self.post_ids: list[int] = []
+        self.random = random.Random(n)
+
+    async def _request(
+        self, endpoint: str, method: str, url: str, expected: int = 200, **kwargs: Any
+    ) -> httpx.Response | None:
+        started = perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, headers=self.headers, **kwargs
+            )
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, perf_counter() - started, True)
+            return None
+        error = response.status_code != expected
+        self.recorder.record(endpoint, perf_counter() - started, error)
+        return None if error else response
+
+    async def login(self) -> bool:
+        data = {"username": self.email, "password": self.scenario.password}
+        self.headers = {}
+        response = await self._request("login", "POST", LOGIN_URL, data=data)
+        if response is None:
+            return False
+        self._use_tokens(response.json())
+        return True
+
+    def _use_tokens(self, tokens: dict[str, Any]) -> None:
+        self.headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        self.refresh_token = tokens["refresh_token"]
+
+    async def refresh(self) -> None:
+        body = {"refresh_token": self.refresh_token}
+        self.headers = {}
+        response = await self._request("refresh", "POST", REFRESH_URL, json=body)
+        if response is None:
+            # the session ended; log in again like a client would
+            await self.login()
+            return
+        self._use_tokens(response.json())
+
+    async def sign_up(self) -> None:
+        # accounts survive between runs, so only missing ones are created
+        data = {"username": self.email, "password": self.scenario.password}
+        response = await self.client.post(LOGIN_URL, data=data)
+        if response.status_code == 200:
+            return
+        response = await self.client.post(
+            USERS_URL,
+            json={
+                "email": self.email,
+                "password": self.scenario.password,
+                "first_name": "Load",
+                "last_name": "Generator",
+            },
+        )
+        response.raise_for_status()
+
+    async def list(self) -> None:
+        params = {"limit": self.random.choice(self.scenario.list_limits)}
+        response = await self._request("list", "GET", POSTS_URL, params=params)
+        if response is not None and not self.post_ids:
+            self.post_ids = [post["id"] for post in response.json()["posts"]]
+
+    async def get(self) -> None:
+        if not self.post_ids:
+            return await self.create()
+        post_id = self.random.choice(self.post_ids)
+        await self._request("get", "GET", f"{POSTS_URL}{post_id}")
+
+    async def create(self) -> None:
+        body = {"title": "Load test note", "description": "x" * 200}
+        response = await self._request("create", "POST", POSTS_URL, json=body)
+        if response is not None:
+            self.post_ids.append(response.json()["id"])
+
+    async def update(self) -> None:
+        if not self.post_ids:
+            return await self.create()
+        post_id = self.random.choice(self.post_ids)
+        body = {"title": "Edited note", "description": "y" * 200}
+        await self._request("update", "PATCH", f"{POSTS_URL}{post_id}", json=body)
+
+    async def delete(self) -> None:
+        if not self.post_ids:
+            return await self.create()
+        post_id = self.post_ids.pop(self.random.randrange(len(self.post_ids)))
+        await self._request("delete", "DELETE", f"{POSTS_URL}{post_id}")
+
+    async def run(self, start_delay: float, stop_at: float) -> None:
+        await asyncio.sleep(start_delay)
+        if not await self.login():
+            return
+        actions = list(self.scenario.weights)
+        weights = list(self.scenario.weights.values())
+        while perf_counter() < stop_at:
+            action = self.random.choices(actions, weights)[0]
+            await getattr(self, action)()
+            await asyncio.sleep(self.random.uniform(*self.scenario.think_time))
+
+
+async def _report(recorder: Recorder, interval: float, intervals: list) -> None:
+    started = perf_counter()
+    while True:
+        await asyncio.sleep(interval)
+        summary = summarize(recorder.cut(), interval)
+        elapsed = round(perf_counter() - started, 1)
+        intervals.append({"t": elapsed, "endpoints": summary})
+        print_summary(f"t={elapsed}s", summary)
+
+
+async def run_scenario(scenario: Scenario, client: httpx.AsyncClient) -> dict[str, Any]:
+    recorder = Recorder()
+    users = [VirtualUser(n, client, scenario, recorder) for n in range(scenario.users)]
+    semaphore = asyncio.Semaphore(8)
+
+    async def sign_up(user: VirtualUser) -> None:
+        async with semaphore:
+            await user.sign_up()
+
+    await asyncio.gather(*(sign_up(user) for user in users))
+
+    intervals: list[dict[str, Any]] = []
+    reporter = asyncio.create_task(
+        _report(recorder, scenario.report_interval, intervals)
+    )
+    started = perf_counter()
+    stop_at = started + scenario.ramp_up + scenario.duration
+    step = scenario.ramp_up / scenario.users
+    try:
+        await asyncio.gather(
+            *(user.run(i * step, stop_at) for i, user in enumerate(users))
+        )
+    finally:
+        reporter.cancel()
+    total = summarize(recorder.total, perf_counter() - started)
+    print_summary("total", total)
+    return {"scenario": scenario.name, "intervals": intervals, "total": total}
+
+
+def _in_process_transport(database_url: str | None) -> httpx.ASGITransport:
+    from app.api.dependencies.database import get_session
+    from app.main import get_application
+
+    app = get_application()
+    if database_url:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        sessionmaker = async_sessionmaker(
+            create_async_engine(database_url), expire_on_commit=False, autoflush=False
+        )
+
+        async def _get_session():
+            yield sessionmaker
+
+        app.dependency_overrides[get_session] = _get_session
+    return httpx.ASGITransport(app=app)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("scenario", help="TOML or JSON scenario file")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="running server, e.g. http://localhost:8000")
+    target.add_argument(
+        "--in-process", action="store_true", help="drive app.main in this process"
+    )
+    parser.add_argument(
+        "--database-url", help="with --in-process, use this database instead"
+    )
+    parser.add_argument("--output", help="write intervals and totals as JSON")
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario)
+    if args.in_process:
+        client = httpx.AsyncClient(
+            transport=_in_process_transport(args.database_url),
+            base_url="http://loadgen",
+            timeout=30,
+        )
+    else:
+        limits = httpx.Limits(max_connections=scenario.users)
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30)
+
+    async def _run() -> dict[str, Any]:
+        async with client:
+            return await run_scenario(scenario, client)
+
+    report = asyncio.run(_run())
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from app.schemas.db.post import PostDB
+from app.services.jwt import jwt_service
+from app.services.password import PasswordHashParams, make_password, verify_password
+from benchmarks.harness import BenchResult, bench
+from benchmarks.serialization import default_path, fast_path, make_page
+
+
+class _PostRow:
+    # stands in for an ORM Post, from_orm only reads attributes
+    def __init__(self, i: int) -> None:
+        self.id = i
+        self.title = f"Post {i} title"
+        self.description = "Lorem ipsum dolor sit amet " * 4
+        self.create_at = datetime(2024, 1, 1, 12, 0, i % 60)
+        self.user_id = 1
+
+
+async def run_micro(iterations: int) -> list[BenchResult]:
+    when = datetime.utcnow()
+    token = jwt_service.generate_access_token(
+        user_id=1, when=when, email="bench@example.com"
+    )
+    encoded = jwt_service.encode_token(token)
+    params = PasswordHashParams()
+    hashed_password = make_password("bench", params)
+    row = _PostRow(1)
+    results = [
+        await bench(
+            "jwt.encode_token", lambda: jwt_service.encode_token(token), iterations
+        ),
+        await bench(
+            "jwt.decode_token", lambda: jwt_service.decode_token(encoded), iterations
+        ),
+        # hashing takes 100+ ms by design, a handful of samples is enough
+        await bench(
+            f"password.verify_password[{params.scheme}]",
+            lambda: verify_password("bench", hashed_password),
+            max(iterations // 200, 5),
+            warmup=1,
+        ),
+        await bench("PostDB.from_orm", lambda: PostDB.from_orm(row), iterations),
+    ]
+    for rows in (10, 100, 1000):
+        page = make_page(rows)
+        count = max(iterations // rows, 5)
+        results.append(
+            await bench(f"serialize.default[{rows}]", lambda: default_path(page), count)
+        )
+        results.append(
+            await bench(f"serialize.fast[{rows}]", lambda: fast_path(page), count)
+        )
+    return results
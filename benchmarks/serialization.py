@@ -0,0 +1,88 @@
+"""Throughput of the post list serialization paths.
+
+Compares the default FastAPI path (response_model validation, then
+jsonable_encoder, then JSONResponse) with FastJSONRoute (validated DTOs
+rendered by FastJSONResponse) for list pages of different sizes.
+
+    python -m benchmarks.serialization --rows 10 100 1000
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.responses import FastJSONResponse
+from app.api.routing import _exposes_only, _is_response_model
+from app.schemas.db.post import PostDB
+from app.schemas.response.post import PostsListResponse
+
+RESPONSE_FIELD = create_response_field(name="response", type_=PostsListResponse)
+
+
+def make_page(rows: int) -> list[PostDB]:
+    return [
+        PostDB(
+            id=i,
+            title=f"Post {i} title",
+            description="Lorem ipsum dolor sit amet " * 4,
+            create_at=datetime(2024, 1, 1, 12, 0, i % 60, 123456),
+        )
+        for i in range(rows)
+    ]
+
+
+async def default_path(posts: list[PostDB]) -> bytes:
+    content = PostsListResponse(posts=posts, total=len(posts))
+    value = await serialize_response(field=RESPONSE_FIELD, response_content=content)
+    return JSONResponse(value).body
+
+
+async def fast_path(posts: list[PostDB]) -> bytes:
+    content = PostsListResponse.construct(posts=posts, total=len(posts))
+    # the checks FastJSONRoute runs before taking the fast path
+    assert _is_response_model(content, PostsListResponse)
+    assert _exposes_only(content, PostsListResponse)
+    return FastJSONResponse(content).body
+
+
+async def measure(func, posts: list[PostDB], seconds: float) -> float:
+    calls, started = 0, perf_counter()
+    while (elapsed := perf_counter() - started) < seconds:
+        await func(posts)
+        calls += 1
+    return calls * len(posts) / elapsed
+
+
+async def run(rows: list[int], seconds: float) -> list[dict]:
+    results = []
+    for size in rows:
+        posts = make_page(size)
+        assert json.loads(await default_path(posts)) == json.loads(
+            await fast_path(posts)
+        )
+        default = await measure(default_path, posts, seconds)
+        fast = await measure(fast_path, posts, seconds)
+        results.append(
+            {
+                "rows": size,
+                "default_rows_per_s": round(default),
+                "fast_rows_per_s": round(fast),
+                "speedup": round(fast / default, 2),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for result in asyncio.run(run(args.rows, args.seconds)):
+        print(json.dumps(result))
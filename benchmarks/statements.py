@@ -0,0 +1,236 @@
+import re
+import sys
+from datetime import datetime, timedelta
+
+from psycopg import sql
+from sqlalchemy import event, lambda_stmt, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.repositories.post import post
+from app.db.repositories.user import user
+from app.db.repositories.user_session import user_session
+from app.db.tables.base import Base
+from app.db.tables.post import Post
+from app.schemas.request.user import CreateUserInRequest
+from app.services.user import create_user_service
+from benchmarks.e2e import BENCH_EMAIL, BENCH_PASSWORD, _cleanup
+from benchmarks.harness import BenchResult, bench
+
+# psycopg prepare_threshold per mode; "pgbouncer" is what
+# DB_PGBOUNCER_TRANSACTION_MODE sets
+PREPARE_MODES = {"pgbouncer": None, "default": 5, "eager": 0}
+PLANNING_SAMPLES = 21
+
+
+def _queries(user_id: int, post_id: int) -> dict:
+    return {
+        "post.get": lambda session: post.get(
+            session=session, post_id=post_id, user_id=user_id
+        ),
+        "post.list": lambda session: _drain(
+            post.list(session=session, user_id=user_id, limit=10, offset=100)
+        ),
+        "user.get_by_email": lambda session: user.get_by_email(
+            session=session, email=BENCH_EMAIL
+        ),
+        "user_session.get_by_user": lambda session: user_session.get_by_user(
+            session=session, user_id=user_id
+        ),
+    }
+
+
+def _core_list(user_id: int):
+    stmt = select(Post).where(Post.user_id == user_id).offset(100)
+    return stmt.limit(10).order_by(Post.id)
+
+
+def _lambda_list(user_id: int):
+    # same shape as PostRepository.list
+    stmt = lambda_stmt(lambda: select(Post).where(Post.user_id == user_id))
+    stmt += lambda s: s.offset(100)
+    stmt += lambda s: s.limit(10).order_by(Post.id)
+    return stmt
+
+
+async def _drain(rows) -> None:
+    async for _ in rows:
+        pass
+
+
+async def _capture_statements(
+    sessionmaker: async_sessionmaker, queries: dict
+) -> dict[str, tuple[str, dict]]:
+    """The SQL and parameters each query sends to the server."""
+    captured = {}
+    async with sessionmaker() as session:
+        connection = await session.connection()
+        for name, query in queries.items():
+            statements = []
+            connection.sync_connection.info["bench_capture"] = statements
+            await query(session)
+            captured[name] = statements[-1]
+        connection.sync_connection.info.pop("bench_capture")
+    return captured
+
+
+def _server_text(statement: str) -> tuple[str, list[str]]:
+    """The statement as psycopg sends it, with $n placeholders numbered in
+    order of first appearance, and the parameter names in that order."""
+    order: list[str] = []
+
+    def _placeholder(match: re.Match) -> str:
+        if match.group(1) is None:
+            return "%"
+        if match.group(1) not in order:
+            order.append(match.group(1))
+        return f"${order.index(match.group(1)) + 1}"
+
+    return re.sub(r"%(?:\((\w+)\)s|%)", _placeholder, statement), order
+
+
+async def _planning_ms(
+    session: AsyncSession, captured: dict[str, tuple[str, dict]]
+) -> dict[str, float]:
+    """Median server side planning time of each query on this connection.
+
+    A statement psycopg prepared is explained through EXECUTE, so the time
+    is that of the plan cache; any other is planned from scratch."""
+    connection = await session.connection()
+    prepared = {
+        statement: name
+        for name, statement in await connection.exec_driver_sql(
+            "SELECT name, statement FROM pg_prepared_statements"
+        )
+    }
+    planning = {}
+    for name, (statement, parameters) in captured.items():
+        server_text, order = _server_text(statement)
+        if server_text in prepared:
+            # EXECUTE takes no bind parameters, its arguments are literals
+            arguments = ", ".join(
+                sql.Literal(parameters[key]).as_string(None) for key in order
+            )
+            explained = f"EXECUTE {prepared[server_text]}({arguments})"
+            parameters = {}
+        else:
+            explained = statement
+        samples = []
+        for _ in range(PLANNING_SAMPLES):
+            plan = await connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, SUMMARY) {explained}", parameters or None
+            )
+            for (line,) in plan:
+                if line.startswith("Planning Time"):
+                    samples.append(float(line.split()[2]))
+        planning[name] = sorted(samples)[len(samples) // 2]
+    return planning
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany) -> None:
+    statements = conn.info.get("bench_capture")
+    if statements is not None:
+        statements.append((statement, parameters))
+
+
+async def run_statements(
+    database_url: str, iterations: int, seed_posts: int = 1000
+) -> list[BenchResult]:
+    """Times the hot repository queries on one connection per psycopg prepare
+    mode, and the statement construction with and without lambda_stmt.
+    The server side planning time of each query per mode goes to stderr."""
+    engine = create_async_engine(database_url, pool_size=1)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await _cleanup(sessionmaker)
+
+    results = []
+    try:
+        bench_user = await create_user_service(
+            async_session=sessionmaker,
+            create_user=CreateUserInRequest(
+                first_name="Bench",
+                last_name="Bench",
+                email=BENCH_EMAIL,
+                password=BENCH_PASSWORD,
+            ),
+        )
+        async with sessionmaker() as session:
+            rows = [{"title": f"Seed {i}"} for i in range(seed_posts)]
+            created = await post.create_many(
+                session=session, user_id=bench_user.id, rows=rows
+            )
+            await user_session.create(
+                session=session,
+                user_id=bench_user.id,
+                token="bench",
+                expires_at=datetime.utcnow() + timedelta(hours=1),
+            )
+            await session.commit()
+        queries = _queries(bench_user.id, created[len(created) // 2].id)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+        captured = await _capture_statements(sessionmaker, queries)
+        event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+
+        planning = {}
+        for mode, threshold in PREPARE_MODES.items():
+            mode_engine = create_async_engine(
+                database_url,
+                pool_size=1,
+                connect_args={"prepare_threshold": threshold},
+            )
+            mode_sessionmaker = async_sessionmaker(
+                mode_engine, expire_on_commit=False, autoflush=False
+            )
+            try:
+                async with mode_sessionmaker() as session:
+                    for name, query in queries.items():
+                        results.append(
+                            await bench(
+                                f"statements.{mode}.{name}",
+                                lambda query=query: query(session),
+                                iterations,
+                                # past the default threshold, so it is prepared
+                                warmup=10,
+                            )
+                        )
+                    prepared = await session.scalar(
+                        text("SELECT count(*) FROM pg_prepared_statements")
+                    )
+                    print(f"{mode}: {prepared} prepared statements", file=sys.stderr)
+                    # after the timed runs, the steady state of the mode
+                    planning[mode] = await _planning_ms(session, captured)
+            finally:
+                await mode_engine.dispose()
+        print(
+            f"{'planning ms':<28}" + "".join(f"{mode:>12}" for mode in PREPARE_MODES),
+            file=sys.stderr,
+        )
+        for name in queries:
+            print(
+                f"{name:<28}"
+                + "".join(f"{planning[mode][name]:>12.3f}" for mode in PREPARE_MODES),
+                file=sys.stderr,
+            )
+
+        # what SQLAlchemy does per execution before its compiled cache lookup
+        user_id = bench_user.id
+        results.append(
+            await bench(
+                "statements.build[core]",
+                lambda: _core_list(user_id)._generate_cache_key(),
+                iterations * 10,
+            )
+        )
+        results.append(
+            await bench(
+                "statements.build[lambda]",
+                lambda: _lambda_list(user_id)._generate_cache_key(),
+                iterations * 10,
+            )
+        )
+    finally:
+        await _cleanup(sessionmaker)
+        await engine.dispose()
+    return results
@@ -0,0 +1,33 @@
+"""user post_count
+
+Revision ID: 60b3e4970561
+Revises: dd2f8bd97106
+Create Date: 2026-10-18 09:12:40.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "60b3e4970561"
+down_revision = "dd2f8bd97106"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "user",
+        sa.Column(
+            "post_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.execute(
+        'UPDATE "user" SET post_count = '
+        '(SELECT count(post.id) FROM post WHERE post.user_id = "user".id)'
+    )
+
+
+def downgrade():
+    op.drop_column("user", "post_count")
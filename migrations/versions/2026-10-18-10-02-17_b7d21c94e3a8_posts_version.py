@@ -0,0 +1,34 @@
+"""posts_version and post version
+
+Revision ID: b7d21c94e3a8
+Revises: 60b3e4970561
+Create Date: 2026-10-18 10:02:17.304912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d21c94e3a8"
+down_revision = "60b3e4970561"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "user",
+        sa.Column(
+            "posts_version", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.add_column(
+        "post",
+        sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column("post", "version")
+    op.drop_column("user", "posts_version")
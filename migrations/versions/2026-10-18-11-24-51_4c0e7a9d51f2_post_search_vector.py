@@ -0,0 +1,47 @@
+"""post search_vector
+
+Revision ID: 4c0e7a9d51f2
+Revises: b7d21c94e3a8
+Create Date: 2026-10-18 11:24:51.618203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "4c0e7a9d51f2"
+down_revision = "b7d21c94e3a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # a stored generated column rewrites the table once and is then kept up
+    # to date by Postgres itself, including rows written through COPY
+    op.add_column(
+        "post",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_post_search_vector",
+        "post",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade():
+    op.drop_index("ix_post_search_vector", table_name="post")
+    op.drop_column("post", "search_vector")
@@ -0,0 +1,40 @@
+"""hot query indexes
+
+Revision ID: e31f6b0a8c47
+Revises: 4c0e7a9d51f2
+Create Date: 2026-10-18 12:40:08.527164
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e31f6b0a8c47"
+down_revision = "4c0e7a9d51f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_post_user_id_id", "post", ["user_id", "id"], unique=False)
+    # login used to delete and insert in two transactions, so concurrent
+    # logins could leave several sessions behind; keep the newest one
+    op.execute(
+        "DELETE FROM user_sessions s USING user_sessions newer "
+        "WHERE s.user_id = newer.user_id AND s.id < newer.id"
+    )
+    op.create_index(
+        op.f("ix_user_sessions_user_id"), "user_sessions", ["user_id"], unique=True
+    )
+    # the primary keys already index these columns
+    op.drop_index("ix_post_id", table_name="post")
+    op.drop_index("ix_user_id", table_name="user")
+    op.drop_index("ix_user_session_id", table_name="user_sessions")
+
+
+def downgrade():
+    op.create_index("ix_user_session_id", "user_sessions", ["id"], unique=False)
+    op.create_index("ix_user_id", "user", ["id"], unique=False)
+    op.create_index("ix_post_id", "post", ["id"], unique=False)
+    op.drop_index(op.f("ix_user_sessions_user_id"), table_name="user_sessions")
+    op.drop_index("ix_post_user_id_id", table_name="post")
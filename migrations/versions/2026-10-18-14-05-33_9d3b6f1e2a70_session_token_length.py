@@ -0,0 +1,39 @@
+"""user_sessions access_token length
+
+Revision ID: 9d3b6f1e2a70
+Revises: e31f6b0a8c47
+Create Date: 2026-10-18 14:05:33.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9d3b6f1e2a70"
+down_revision = "e31f6b0a8c47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # raising a varchar limit only changes the catalog, no table rewrite
+    op.alter_column(
+        "user_sessions",
+        "access_token",
+        existing_type=sa.String(length=255),
+        type_=sa.String(length=1024),
+        existing_nullable=False,
+    )
+
+
+def downgrade():
+    # sessions of the longer stateless tokens end; their users log in again
+    op.execute("DELETE FROM user_sessions WHERE length(access_token) > 255")
+    op.alter_column(
+        "user_sessions",
+        "access_token",
+        existing_type=sa.String(length=1024),
+        type_=sa.String(length=255),
+        existing_nullable=False,
+    )
@@ -0,0 +1,34 @@
+"""user_sessions refresh token
+
+Revision ID: c58e2a4b7f19
+Revises: 9d3b6f1e2a70
+Create Date: 2026-10-18 15:20:47.118356
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c58e2a4b7f19"
+down_revision = "9d3b6f1e2a70"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # nullable without default: no table rewrite; sessions from before the
+    # upgrade cannot be refreshed and end with their access token
+    op.add_column(
+        "user_sessions",
+        sa.Column("refresh_token_hash", sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        "user_sessions",
+        sa.Column("refresh_family", sa.String(length=32), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("user_sessions", "refresh_family")
+    op.drop_column("user_sessions", "refresh_token_hash")
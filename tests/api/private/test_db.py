@@ -0,0 +1,104 @@
+import os
+from time import sleep
+
+import pytest
+
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.routes.private import db
+from app.core.config import settings
+from app.db.pool import InstrumentedAsyncPool
+
+
+class TestPrivateDbApi:
+    @pytest.mark.asyncio
+    async def test_pool_stats(self, client: TestClient, app: FastAPI, monkeypatch):
+        """Статистика пула соединений"""
+
+        url = app.url_path_for("get_pool_stats")
+        # closed until a token is set or access is opened explicitly
+        response = client.get(url)
+        assert response.status_code == 403
+
+        monkeypatch.setattr(settings, "PRIVATE_API_OPEN", True)
+        response = client.get(url)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["size"] == settings.DB_POOL_SIZE
+        assert stats["max_overflow"] == settings.DB_MAX_OVERFLOW
+        assert stats["checked_out"] == 0
+        assert stats["replica"] is None
+
+        replica = create_async_engine(
+            os.getenv("TEST_DATABASE_URL", "sqlite://"),
+            poolclass=InstrumentedAsyncPool,
+            pool_size=2,
+        )
+        monkeypatch.setattr(db, "async_read_engine", replica)
+        response = client.get(url)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["size"] == settings.DB_POOL_SIZE
+        assert stats["replica"]["size"] == 2
+        assert stats["replica"]["checkouts"] == 0
+        await replica.dispose()
+
+        monkeypatch.setattr(settings, "PRIVATE_API_TOKEN", "secret")
+        response = client.get(url)
+        assert response.status_code == 403
+        response = client.get(url, headers={"X-Private-Token": "wrong"})
+        assert response.status_code == 403
+        response = client.get(url, headers={"X-Private-Token": "secret"})
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_pool_timeouts(self):
+        """Ожидание и таймауты выдачи соединений из пула"""
+
+        engine = create_async_engine(
+            os.getenv("TEST_DATABASE_URL", "sqlite://"),
+            poolclass=InstrumentedAsyncPool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.1,
+        )
+        async with engine.connect():
+            stats = engine.pool.stats()
+            assert stats.checked_out == 1
+            assert stats.idle == 0
+            with pytest.raises(TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = engine.pool.stats()
+        assert stats.checkouts == 1
+        assert stats.connects == 1
+        assert stats.timeouts == 1
+        assert stats.idle == 1
+        assert stats.wait.count == 2
+        assert stats.wait.max >= 0.1
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_wait_excludes_connect(self):
+        """Время открытия нового соединения не входит в ожидание"""
+
+        engine = create_async_engine(
+            os.getenv("TEST_DATABASE_URL", "sqlite://"),
+            poolclass=InstrumentedAsyncPool,
+            pool_size=1,
+        )
+        event.listen(engine.sync_engine, "connect", lambda *args: sleep(0.2))
+        async with engine.connect():
+            pass
+
+        stats = engine.pool.stats()
+        assert stats.connects == 1
+        assert stats.wait.count == 1
+        assert stats.wait.max < 0.2
+        await engine.dispose()
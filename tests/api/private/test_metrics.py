@@ -0,0 +1,119 @@
+import json
+import os
+import time
+
+import pytest
+
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+
+from app.core import metrics
+from app.core.config import settings
+from app.utils.cache import SelectorCache
+from app.utils.metrics import RETIRED_FILE, RouteMetrics, render_prometheus
+
+
+class TestPrivateMetricsApi:
+    @pytest.mark.asyncio
+    async def test_metrics(self, client: TestClient, app: FastAPI, monkeypatch):
+        """Метрики запросов по шаблону маршрута в формате Prometheus"""
+
+        monkeypatch.setattr(settings, "PRIVATE_API_TOKEN", "secret")
+
+        for post_id in (1, 2):
+            response = client.get(app.url_path_for("get_post", post_id=post_id))
+            assert response.status_code == 401
+        client.get("/api/v1/missing")
+
+        response = client.get(
+            app.url_path_for("get_metrics"), headers={"X-Private-Token": "secret"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        route = 'method="GET",route="/api/v1/posts/{post_id}"'
+        assert f'http_requests_total{{{route},status="4xx"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{route},le="+Inf"}} 2' in lines
+        assert f"http_request_duration_seconds_count{{{route}}} 2" in lines
+        assert any('route="<unmatched>"' in line for line in lines)
+        assert "/api/v1/posts/1" not in response.text
+        # the scrape itself is in flight while the page is rendered
+        assert "http_requests_in_flight 1" in lines
+
+    @pytest.mark.asyncio
+    async def test_merge_worker_snapshots(self, tmp_path, monkeypatch):
+        """Сложение метрик нескольких воркеров"""
+
+        worker = RouteMetrics()
+        worker.observe("GET", "/api/v1/posts/", 200, 0.2)
+        worker.observe("GET", "/api/v1/posts/", 503, 20)
+        (tmp_path / "metrics-1.json").write_text(json.dumps(worker.snapshot()))
+
+        own = RouteMetrics()
+        own.observe("GET", "/api/v1/posts/", 200, 0.003)
+        monkeypatch.setattr(settings, "METRICS_MULTIPROCESS_DIR", str(tmp_path))
+        monkeypatch.setattr(metrics, "request_metrics", own)
+        text = render_prometheus(await metrics.collect_metrics())
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+        lines = text.splitlines()
+        route = 'method="GET",route="/api/v1/posts/"'
+        assert f'http_requests_total{{{route},status="2xx"}} 2' in lines
+        assert f'http_requests_total{{{route},status="5xx"}} 1' in lines
+        assert f'http_request_duration_seconds_bucket{{{route},le="0.005"}} 1' in lines
+        assert f'http_request_duration_seconds_bucket{{{route},le="0.25"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{route},le="10.0"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{route},le="+Inf"}} 3' in lines
+
+    @pytest.mark.asyncio
+    async def test_cache_metrics(self, tmp_path, monkeypatch):
+        """Попадания и промахи кэшей, сложенные по воркерам"""
+
+        worker = RouteMetrics().snapshot()
+        worker["caches"] = [["selector.post", 3, 1, 0], ["principal", 5, 2, 0]]
+        (tmp_path / "metrics-1.json").write_text(json.dumps(worker))
+
+        cache = SelectorCache(backend=None, ttl=60)
+        cache._stats["post"] = [1, 1, 2]
+        monkeypatch.setattr(settings, "METRICS_MULTIPROCESS_DIR", str(tmp_path))
+        monkeypatch.setattr(metrics, "request_metrics", RouteMetrics())
+        monkeypatch.setattr(metrics, "selector_cache", cache)
+        lines = render_prometheus(await metrics.collect_metrics()).splitlines()
+        assert "# TYPE cache_hits_total counter" in lines
+        assert 'cache_hits_total{cache="selector.post"} 4' in lines
+        assert 'cache_misses_total{cache="selector.post"} 2' in lines
+        assert 'cache_errors_total{cache="selector.post"} 2' in lines
+        assert any(
+            line.startswith('cache_hits_total{cache="principal"}') for line in lines
+        )
+
+    @pytest.mark.asyncio
+    async def test_exited_workers_retained(self, tmp_path, monkeypatch):
+        """Счётчики завершившегося воркера не пропадают из суммы"""
+
+        worker = RouteMetrics()
+        worker.observe("GET", "/api/v1/posts/", 200, 0.2)
+        worker.in_flight = 3
+        snapshot = worker.snapshot()
+        snapshot["caches"] = [["principal", 5, 2, 0]]
+        path = tmp_path / "metrics-1.json"
+        path.write_text(json.dumps(snapshot))
+
+        monkeypatch.setattr(settings, "METRICS_MULTIPROCESS_DIR", str(tmp_path))
+        monkeypatch.setattr(metrics, "request_metrics", RouteMetrics())
+        route = 'method="GET",route="/api/v1/posts/"'
+        before = render_prometheus(await metrics.collect_metrics()).splitlines()
+        assert f'http_requests_total{{{route},status="2xx"}} 1' in before
+
+        # the worker stopped flushing long ago
+        expired = time.time() - settings.METRICS_FLUSH_INTERVAL * 13
+        os.utime(path, (expired, expired))
+        for _ in range(2):
+            after = await metrics.collect_metrics()
+            lines = render_prometheus(after).splitlines()
+            assert f'http_requests_total{{{route},status="2xx"}} 1' in lines
+            assert f"http_request_duration_seconds_count{{{route}}} 1" in lines
+            assert after["in_flight"] == 0
+        assert not path.exists()
+        assert (tmp_path / RETIRED_FILE).exists()
+        principal = next(row for row in after["caches"] if row[0] == "principal")
+        assert principal[1] >= 5
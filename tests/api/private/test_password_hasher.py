@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+
+from app.api.routes.private import password
+from app.core.config import settings
+from app.services.password import AsyncPasswordHasher, PasswordHashParams
+
+PARAMS = PasswordHashParams(iterations=1000)
+
+
+class TestPrivatePasswordApi:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    async def test_executors(self, executor: str):
+        """Хэширование в пуле потоков и процессов и его статистика"""
+
+        hasher = AsyncPasswordHasher(executor=executor, workers=2, params=PARAMS)
+        try:
+            hashed = await asyncio.gather(
+                *(hasher.make_password(f"secret{i}") for i in range(5))
+            )
+            assert await hasher.verify_password("secret0", hashed[0])
+            assert not await hasher.verify_password("secret1", hashed[0])
+        finally:
+            hasher.shutdown()
+
+        stats = hasher.stats()
+        assert stats.executor == executor
+        assert stats.workers == 2
+        assert stats.in_flight == stats.queue_depth == 0
+        assert stats.hashing.count == stats.wait.count == stats.total.count == 7
+        assert 0 < stats.hashing.p50 <= stats.total.max
+
+    @pytest.mark.asyncio
+    async def test_queue_depth(self):
+        """Глубина очереди при нехватке воркеров"""
+
+        hasher = AsyncPasswordHasher(workers=1, params=PARAMS)
+        try:
+            tasks = [
+                asyncio.create_task(hasher.make_password("secret")) for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            stats = hasher.stats()
+            assert stats.in_flight == 3
+            assert stats.queue_depth == 2
+            await asyncio.gather(*tasks)
+        finally:
+            hasher.shutdown()
+        assert hasher.stats().queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_hasher_stats(self, client: TestClient, app: FastAPI, monkeypatch):
+        """Статистика пула хэширования паролей"""
+
+        hasher = AsyncPasswordHasher(workers=3, params=PARAMS)
+        monkeypatch.setattr(password, "password_hasher", hasher)
+        monkeypatch.setattr(settings, "PRIVATE_API_OPEN", True)
+        await hasher.make_password("secret")
+        hasher.shutdown()
+
+        response = client.get(app.url_path_for("get_password_hasher_stats"))
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["executor"] == "thread"
+        assert stats["workers"] == 3
+        assert stats["queue_depth"] == 0
+        assert stats["hashing"]["count"] == 1
+        assert stats["total"]["max"] >= stats["hashing"]["max"] > 0
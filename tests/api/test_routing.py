@@ -0,0 +1,193 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+import pytest
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.api.routing import FastJSONRoute
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    create_at: datetime
+
+
+class ItemRow(Item):
+    owner_password: str
+
+
+class ItemsPage(BaseModel):
+    items: list[Item]
+    total: int
+
+
+class Note(BaseModel):
+    note_id: int = Field(alias="noteId")
+    body: str | None = None
+
+
+CREATED = datetime(2026, 1, 2, 3, 4, 5)
+
+
+def _row(item_id: int) -> ItemRow:
+    return ItemRow(id=item_id, name="item", create_at=CREATED, owner_password="x")
+
+
+async def _mark(response: Response) -> None:
+    response.headers["X-Mark"] = "dependency"
+
+
+def _client() -> TestClient:
+    router = APIRouter(route_class=FastJSONRoute)
+
+    @router.post("/items", response_model=Item, status_code=201)
+    async def create_item(response: Response):
+        response.headers["X-Item"] = "1"
+        return Item(id=1, name="item", create_at=CREATED)
+
+    @router.get("/items/moved", response_model=Item)
+    async def moved_item(response: Response):
+        response.status_code = 203
+        return Item(id=1, name="item", create_at=CREATED)
+
+    @router.get("/items/cached", response_model=Item)
+    async def cached_item(response: Response):
+        response.headers["X-Ignored"] = "1"
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+
+    @router.get("/items/marked", response_model=Item, dependencies=[Depends(_mark)])
+    async def marked_item(flag: bool = False):
+        return Item(id=1, name="item" if not flag else "flagged", create_at=CREATED)
+
+    @router.get("/items/row", response_model=Item)
+    async def item_row():
+        return _row(1)
+
+    @router.get("/items/page", response_model=ItemsPage)
+    async def items_page():
+        return ItemsPage.construct(items=[_row(1), _row(2)], total=2)
+
+    @router.get("/items/dict", response_model=Item)
+    async def item_dict():
+        return {"id": 1, "name": "item", "create_at": CREATED, "secret": "x"}
+
+    @router.get("/items/dicts", response_model=ItemsPage)
+    async def item_dicts():
+        return {"items": [{"id": 1, "name": "item", "create_at": CREATED}], "total": 1}
+
+    @router.get("/items/dicts/secret", response_model=ItemsPage)
+    async def item_dicts_secret():
+        item = {"id": 1, "name": "item", "create_at": CREATED, "secret": "x"}
+        return {"items": [item], "total": 1}
+
+    @router.get("/items/coerced", response_model=Item)
+    async def item_coerced():
+        return {"id": "1", "name": "item", "create_at": "2026-01-02T03:04:05"}
+
+    @router.get("/items/incomplete", response_model=Item)
+    async def item_incomplete():
+        return {"id": 1, "create_at": CREATED}
+
+    @router.get("/items/list", response_model=list[Item])
+    async def item_list():
+        return [Item(id=1, name="item", create_at=CREATED), _row(2)]
+
+    @router.get("/items/sparse", response_model=Item, response_model_exclude={"name"})
+    async def item_sparse():
+        return Item(id=1, name="item", create_at=CREATED)
+
+    @router.get("/notes/aliased", response_model=Note)
+    async def note_aliased():
+        return Note(noteId=1)
+
+    @router.get("/notes/unset", response_model=Note, response_model_exclude_unset=True)
+    async def note_unset():
+        return {"noteId": 1}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+class TestFastJSONRoute:
+    def test_status_and_headers(self):
+        """Статус и заголовки из sub-response"""
+
+        client = _client()
+        response = client.post("/items")
+        assert response.status_code == 201
+        assert response.headers["X-Item"] == "1"
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {
+            "id": 1,
+            "name": "item",
+            "create_at": "2026-01-02T03:04:05",
+        }
+        assert client.get("/items/moved").status_code == 203
+
+    def test_response_passthrough(self):
+        """Готовый Response возвращается как есть"""
+
+        response = _client().get("/items/cached")
+        assert response.status_code == 304
+        assert response.headers["ETag"] == '"v1"'
+        assert "X-Ignored" not in response.headers
+
+    def test_injected_sub_response(self):
+        """Заголовки зависимостей без параметра Response в эндпоинте"""
+
+        client = _client()
+        response = client.get("/items/marked", params={"flag": True})
+        assert response.status_code == 200
+        assert response.headers["X-Mark"] == "dependency"
+        assert response.json()["name"] == "flagged"
+        # the injected parameter is not part of the API
+        operation = client.get("/openapi.json").json()["paths"]["/items/marked"]
+        assert [param["name"] for param in operation["get"]["parameters"]] == ["flag"]
+
+    def test_undeclared_fields_filtered(self):
+        """Поля вне response_model не попадают в ответ"""
+
+        client = _client()
+        assert client.get("/items/row").json() == {
+            "id": 1,
+            "name": "item",
+            "create_at": "2026-01-02T03:04:05",
+        }
+        page = client.get("/items/page").json()
+        assert page["total"] == 2
+        assert [set(item) for item in page["items"]] == [
+            {"id", "name", "create_at"}
+        ] * 2
+        assert "secret" not in client.get("/items/dict").json()
+        assert client.get("/items/dicts").json()["items"][0]["name"] == "item"
+        assert "secret" not in client.get("/items/dicts/secret").json()["items"][0]
+
+    def test_results_validated(self):
+        """Результат не того класса проверяется и приводится моделью"""
+
+        client = _client()
+        assert client.get("/items/coerced").json() == {
+            "id": 1,
+            "name": "item",
+            "create_at": "2026-01-02T03:04:05",
+        }
+        with pytest.raises(ValidationError):
+            client.get("/items/incomplete")
+        assert [set(item) for item in client.get("/items/list").json()] == [
+            {"id", "name", "create_at"}
+        ] * 2
+
+    def test_response_model_options(self):
+        """Параметры response_model_* соблюдаются"""
+
+        client = _client()
+        assert client.get("/items/sparse").json() == {
+            "id": 1,
+            "create_at": "2026-01-02T03:04:05",
+        }
+        assert client.get("/notes/aliased").json() == {"noteId": 1, "body": None}
+        assert client.get("/notes/unset").json() == {"noteId": 1}
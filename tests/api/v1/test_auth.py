@@ -1,14 +1,24 @@
+import os
+
 import pytest
 
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, update
 
 from app.db.tables.user import User
 from app.db.tables.user_session import UserSession
+from app.core.cache import selector_cache
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.schemas.db.user import UserDB
+from app.selects.user import get_user_selector
+from app.services.auth import auth_check_access_token
+from app.services.password import PasswordHashParams, hash_password, password_hasher
+from app.utils.cache import LocalCacheBackend
+from app.utils.revocation import RevocationList
 from tests.api.test_case import TestUserMixit
 
 
@@ -74,3 +84,226 @@ class TestAuthApi(TestUserMixit):
             assert count == 2
 
         await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_cached_token(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Токен перестает работать сразу после выхода, несмотря на кэш"""
+        await self._setup(db_session)
+        response = client.post(
+            settings.TOKEN_URL,
+            data={"username": "testuser@example.com", "password": "123"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        url = app.url_path_for("curent_user")
+        for _ in range(2):
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert response.json()["email"] == "testuser@example.com"
+
+        response = client.put(app.url_path_for("logout"), headers=headers)
+        assert response.status_code == 200
+
+        response = client.get(url, headers=headers)
+        assert response.status_code == 401
+
+        response = client.get(url, headers={"Authorization": "Bearer broken"})
+        assert response.status_code == 401
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_stateless_tokens(
+        self,
+        db_session: Session,
+        client: TestClient,
+        app: FastAPI,
+        monkeypatch,
+        tmp_path,
+    ):
+        """Проверка токена без обращения к БД и отзыв при входе и выходе"""
+        await self._setup(db_session)
+        login = {"username": "testuser@example.com", "password": "123"}
+        stateful_token = client.post(settings.TOKEN_URL, data=login).json()
+        monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+        monkeypatch.setattr(revocation_list, "_cutoffs", {})
+        monkeypatch.setattr(revocation_list, "path", tmp_path / "revocations.jsonl")
+
+        first_token = client.post(settings.TOKEN_URL, data=login).json()
+        # no session is passed: the claims and the revocation list suffice
+        principal = await auth_check_access_token(
+            session=None, access_token=first_token["access_token"]
+        )
+        assert principal.email == "testuser@example.com"
+        assert principal.first_name is None
+        assert (
+            await auth_check_access_token(
+                session=None, access_token=stateful_token["access_token"]
+            )
+            is None
+        )
+
+        url = app.url_path_for("curent_user")
+        headers = {"Authorization": f"Bearer {first_token['access_token']}"}
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["first_name"] == "TestUserName"
+
+        # a new login replaces the earlier token
+        second_token = client.post(settings.TOKEN_URL, data=login).json()
+        assert client.get(url, headers=headers).status_code == 401
+        headers = {"Authorization": f"Bearer {second_token['access_token']}"}
+        assert client.get(url, headers=headers).status_code == 200
+
+        response = client.put(app.url_path_for("logout"), headers=headers)
+        assert response.status_code == 200
+        assert client.get(url, headers=headers).status_code == 401
+        assert len(revocation_list) == 1
+        # written for the other workers and the next start
+        restarted = RevocationList(str(revocation_list.path))
+        await restarted.sync()
+        assert len(restarted) == 1
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_refresh_token(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Обновление пары токенов без пароля и отзыв при повторном использовании"""
+        await self._setup(db_session)
+        login = {"username": "testuser@example.com", "password": "123"}
+        tokens = client.post(settings.TOKEN_URL, data=login).json()
+        assert 0 < tokens["expires_in"] <= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        me_url = app.url_path_for("curent_user")
+        refresh_url = app.url_path_for("refresh_token")
+
+        def me(access_token: str) -> int:
+            headers = {"Authorization": f"Bearer {access_token}"}
+            return client.get(me_url, headers=headers).status_code
+
+        assert me(tokens["access_token"]) == 200
+        response = client.post(
+            refresh_url, json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 200
+        refreshed = response.json()
+        assert refreshed["refresh_token"] != tokens["refresh_token"]
+        assert me(refreshed["access_token"]) == 200
+
+        # an access token is no refresh token
+        response = client.post(
+            refresh_url, json={"refresh_token": refreshed["access_token"]}
+        )
+        assert response.status_code == 401
+
+        # the first refresh token again: somebody else holds the session
+        response = client.post(
+            refresh_url, json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+        assert me(refreshed["access_token"]) == 401
+        response = client.post(
+            refresh_url, json={"refresh_token": refreshed["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+        # a refresh token of an earlier login is refused without ending
+        # the session of the newer one
+        earlier = client.post(settings.TOKEN_URL, data=login).json()
+        later = client.post(settings.TOKEN_URL, data=login).json()
+        response = client.post(
+            refresh_url, json={"refresh_token": earlier["refresh_token"]}
+        )
+        assert response.status_code == 401
+        assert me(later["access_token"]) == 200
+        response = client.post(
+            refresh_url, json={"refresh_token": later["refresh_token"]}
+        )
+        assert response.status_code == 200
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_rehash_on_login(
+        self, db_session: Session, client: TestClient, app: FastAPI, monkeypatch
+    ):
+        """Перехэширование пароля при входе после смены параметров"""
+        user = await self._setup(db_session)
+        salt = os.urandom(32)
+        legacy = salt + hash_password("123", salt)
+        async with db_session() as session:
+            await session.execute(
+                update(User).where(User.id == user.id).values(hashed_password=legacy)
+            )
+            await session.commit()
+
+        async def stored_hash() -> bytes:
+            async with db_session() as session:
+                stmt = select(User.hashed_password).where(User.id == user.id)
+                return await session.scalar(stmt)
+
+        login = {"username": "testuser@example.com", "password": "123"}
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+        rehashed = await stored_hash()
+        assert rehashed.startswith(b"$pbkdf2-sha256$")
+        assert not password_hasher.needs_rehash(rehashed)
+        # a failed login leaves the hash alone
+        wrong = {**login, "password": "1234"}
+        assert client.post(settings.TOKEN_URL, data=wrong).status_code == 401
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+        assert await stored_hash() == rehashed
+
+        cheaper = PasswordHashParams(scheme="scrypt", log_n=10)
+        monkeypatch.setattr(password_hasher, "params", cheaper)
+        # a refused stateless login of an inactive user writes nothing
+        async with db_session() as session:
+            await session.execute(
+                update(User).where(User.id == user.id).values(is_active=False)
+            )
+            await session.commit()
+        monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 401
+        assert await stored_hash() == rehashed
+        monkeypatch.setattr(settings, "AUTH_STATELESS", False)
+
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+        assert (await stored_hash()).startswith(b"$scrypt$ln=10,r=8,p=1$")
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_login_skips_selector_cache(
+        self, db_session: Session, client: TestClient, app: FastAPI, monkeypatch
+    ):
+        """Вход не читает хэш пароля из общего кэша"""
+        backend = LocalCacheBackend(maxsize=100, ttl=60)
+        monkeypatch.setattr(selector_cache, "backend", backend)
+        user = await self._setup(db_session)
+        async with db_session() as session:
+            await get_user_selector(session=session, user_id=user.id)
+        login = {"username": "testuser@example.com", "password": "123"}
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+        # the cached user row has no hash to read or replace
+        assert backend._cache._data
+        for _, value, _ in backend._cache._data.values():
+            assert b"hashed_password" not in value
+
+        # a hash planted by whoever can write the cache is never consulted
+        forged = UserDB(
+            id=user.id,
+            email="testuser@example.com",
+            hashed_password=await password_hasher.make_password("forged"),
+            is_active=True,
+            first_name=None,
+            last_name=None,
+        )
+        await selector_cache.set(forged, "user_email", "testuser@example.com")
+        forged_login = {**login, "password": "forged"}
+        assert client.post(settings.TOKEN_URL, data=forged_login).status_code == 401
+        assert client.post(settings.TOKEN_URL, data=login).status_code == 200
+
+        await self._teardown(db_session)
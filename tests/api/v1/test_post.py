@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from fastapi.testclient import TestClient
@@ -5,14 +7,21 @@ from fastapi import FastAPI
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, text, update
 
+from app.api.errors.run_time import NotFoundException
+from app.api.routes.v1 import post as post_routes
+from app.commands.post import rebuild_post_counters_command
+from app.core.cache import selector_cache
+from app.core.config import settings
 from app.db.tables.post import Post
+from app.db.tables.user import User
 from tests.api.test_case import TestAuthMixin, TestUserMixit
 from app.services.post import create_post_service
 from app.schemas.request.post import CreatePostInRequest
 from app.services.user import create_user_service
 from app.schemas.request.user import CreateUserInRequest
+from app.utils.cache import LocalCacheBackend
 
 
 class TestPostApi(TestAuthMixin, TestUserMixit):
@@ -344,3 +353,494 @@ class TestPostApi(TestAuthMixin, TestUserMixit):
         assert result_list["posts"][0]["title"] == "Post2 title"
 
         await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_get_list_post_cursor(
+        self, db_session: Session, client: TestClient, app: FastAPI, monkeypatch
+    ):
+        """Постраничность по курсору"""
+
+        current_user = await self._setup(db_session)
+
+        for i in range(10):
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(
+                    title=f"Post{i} title",
+                    description=f"Test Post{i} description",
+                ),
+                user_id=current_user.id,
+            )
+
+        url = app.url_path_for("get_post_list")
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        titles = []
+        response = client.get(url + "?limit=4", headers=headers)
+        while True:
+            assert response.status_code == 200
+            result_list = response.json()
+            assert result_list["total"] == 10
+            titles.extend(post["title"] for post in result_list["posts"])
+            if not result_list["next_cursor"]:
+                break
+            response = client.get(
+                url,
+                params={"limit": 4, "after": result_list["next_cursor"]},
+                headers=headers,
+            )
+        assert titles == [f"Post{i} title" for i in range(10)]
+
+        # ровно на границе страницы следующей страницы нет
+        response = client.get(url + "?limit=10", headers=headers)
+        assert response.json()["next_cursor"] is None
+
+        response = client.get(url + "?after=broken", headers=headers)
+        assert response.status_code == 400
+
+        # пользователь удален, а токен еще действует
+        async def _missing_state(**_):
+            raise NotFoundException()
+
+        monkeypatch.setattr(post_routes, "get_post_list_state_selector", _missing_state)
+        response = client.get(url, headers=headers)
+        assert response.status_code == 404
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_post_counter(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Счетчик заметок пользователя и его пересчет"""
+
+        current_user = await self._setup(db_session)
+
+        posts = [
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(title=f"Post{i} title"),
+                user_id=current_user.id,
+            )
+            for i in range(3)
+        ]
+
+        url = app.url_path_for("get_post_list")
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get(url, headers=headers).json()["total"] == 3
+
+        url = app.url_path_for("delete_post", post_id=posts[0].id)
+        assert client.delete(url, headers=headers).status_code == 200
+        url = app.url_path_for("delete_post", post_id=posts[0].id)
+        assert client.delete(url, headers=headers).status_code == 404
+
+        url = app.url_path_for("get_post_list")
+        assert client.get(url, headers=headers).json()["total"] == 2
+
+        async with db_session() as session:
+            await session.execute(update(User).values(post_count=100))
+            await session.commit()
+            assert await rebuild_post_counters_command(session=session) == 1
+            assert await rebuild_post_counters_command(session=session) == 0
+
+        assert client.get(url, headers=headers).json()["total"] == 2
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_create_post_batch(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Пакетное создание заметок"""
+
+        await self._setup(db_session)
+
+        url = app.url_path_for("create_post_batch")
+        batch = [
+            {"title": "Batch0 title", "description": "Batch0 description"},
+            {"description": "no title"},
+            {"title": "Batch2 title"},
+            {"title": "x" * 151},
+            {"title": "Batch4 title", "description": None},
+        ]
+        response = client.post(url, json=batch)
+        assert response.status_code == 401
+
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        response = client.post(url, headers=headers, json=batch)
+        assert response.status_code == 200
+        result = response.json()
+        assert [post["title"] for post in result["posts"]] == [
+            "Batch0 title",
+            "Batch2 title",
+            "Batch4 title",
+        ]
+        assert [error["index"] for error in result["errors"]] == [1, 3]
+
+        url = app.url_path_for("get_post_list")
+        result_list = client.get(url, headers=headers).json()
+        assert result_list["total"] == 3
+        assert [post["id"] for post in result_list["posts"]] == sorted(
+            post["id"] for post in result["posts"]
+        )
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_update_delete_post_batch(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Пакетное редактирование и удаление заметок"""
+
+        current_user = await self._setup(db_session)
+        posts = [
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(title=f"Post{i} title"),
+                user_id=current_user.id,
+            )
+            for i in range(3)
+        ]
+        user2 = await create_user_service(
+            async_session=db_session,
+            create_user=CreateUserInRequest(
+                first_name="TestUserName2",
+                last_name="TestLastName2",
+                email="testuser2@example.com",
+                password="123",
+            ),
+        )
+        post2 = await create_post_service(
+            async_session=db_session,
+            create_post=CreatePostInRequest(title="getPost title 2"),
+            user_id=user2.id,
+        )
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        url = app.url_path_for("update_post_batch")
+        batch = [
+            {"id": posts[0].id, "title": "New title 0", "description": "New 0"},
+            {"id": posts[2].id, "title": "New title 2", "description": None},
+            {"id": post2.id, "title": "Hacked"},
+            {"id": 100500, "title": "Missing"},
+        ]
+        response = client.patch(url, json=batch)
+        assert response.status_code == 401
+        response = client.patch(url, headers=headers, json=batch)
+        assert response.status_code == 200
+        assert response.json() == {
+            "affected": [posts[0].id, posts[2].id],
+            "not_found": sorted([post2.id, 100500]),
+        }
+
+        async with db_session() as session:
+            rows = await session.scalars(select(Post).order_by(Post.id))
+            assert [row.title for row in rows] == [
+                "New title 0",
+                "Post1 title",
+                "New title 2",
+                "getPost title 2",
+            ]
+
+        url = app.url_path_for("delete_post_batch")
+        ids = [posts[0].id, posts[1].id, post2.id]
+        response = client.request("DELETE", url, json={"ids": ids})
+        assert response.status_code == 401
+        response = client.request("DELETE", url, headers=headers, json={"ids": ids})
+        assert response.status_code == 200
+        assert response.json() == {
+            "affected": [posts[0].id, posts[1].id],
+            "not_found": [post2.id],
+        }
+
+        url = app.url_path_for("get_post_list")
+        result_list = client.get(url, headers=headers).json()
+        assert result_list["total"] == 1
+        assert [post["id"] for post in result_list["posts"]] == [posts[2].id]
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_export_posts(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Выгрузка всех заметок в NDJSON"""
+
+        current_user = await self._setup(db_session)
+        for i in range(5):
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(title=f"Post{i} title"),
+                user_id=current_user.id,
+            )
+
+        url = app.url_path_for("export_posts")
+        response = client.get(url)
+        assert response.status_code == 401
+
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        posts = [json.loads(line) for line in response.text.splitlines()]
+        assert [post["title"] for post in posts] == [f"Post{i} title" for i in range(5)]
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_import_posts(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Импорт заметок из NDJSON и CSV через COPY"""
+
+        current_user = await self._setup(db_session)
+        url = app.url_path_for("import_posts")
+        ndjson = "\n".join(
+            [
+                json.dumps({"title": "Post0 title", "description": "Post0 desc"}),
+                "{not json",
+                json.dumps({"title": "x" * 151}),
+                "",
+                json.dumps(
+                    {"title": "Post1 title", "create_at": "2020-01-02T03:04:05+01:00"}
+                ),
+            ]
+        )
+        files = {"file": ("notes.ndjson", ndjson, "application/x-ndjson")}
+        response = client.post(url, files=files)
+        assert response.status_code == 401
+
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        response = client.post(url, headers=headers, files=files)
+        assert response.status_code == 200
+        report = response.json()
+        assert report["lines"] == 5
+        assert report["imported"] == 2
+        assert report["rejected"] == 2
+        assert [reject["line"] for reject in report["rejects"]] == [2, 3]
+
+        csv_data = "title,description\nPost2 title,Post2 desc\n,no title\n"
+        files = {"file": ("notes.csv", csv_data, "text/csv")}
+        response = client.post(url, headers=headers, files=files)
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert response.json()["rejects"] == [{"line": 3, "error": "title is required"}]
+
+        files = {"file": ("notes.csv", "name\nPost3\n", "text/csv")}
+        response = client.post(url, headers=headers, files=files)
+        assert response.status_code == 400
+
+        async with db_session() as session:
+            posts = (
+                await session.scalars(
+                    select(Post)
+                    .where(Post.user_id == current_user.id)
+                    .order_by(Post.id)
+                )
+            ).all()
+            assert [post.title for post in posts] == [
+                "Post0 title",
+                "Post1 title",
+                "Post2 title",
+            ]
+            assert str(posts[1].create_at) == "2020-01-02 02:04:05"
+            assert posts[2].description == "Post2 desc"
+            post_count = await session.scalar(
+                select(User.post_count).where(User.id == current_user.id)
+            )
+            assert post_count == 3
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_post_etag(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Условные GET по ETag / If-None-Match"""
+
+        current_user = await self._setup(db_session)
+        post = await create_post_service(
+            async_session=db_session,
+            create_post=CreatePostInRequest(title="Post title"),
+            user_id=current_user.id,
+        )
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        list_url = app.url_path_for("get_post_list")
+        response = client.get(list_url, headers=headers)
+        assert response.status_code == 200
+        list_etag = response.headers["etag"]
+
+        post_url = app.url_path_for("get_post", post_id=post.id)
+        response = client.get(post_url, headers=headers)
+        assert response.status_code == 200
+        post_etag = response.headers["etag"]
+
+        response = client.get(
+            list_url, headers={**headers, "If-None-Match": f"W/{list_etag}"}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == list_etag
+        assert response.content == b""
+        response = client.get(post_url, headers={**headers, "If-None-Match": post_etag})
+        assert response.status_code == 304
+
+        response = client.get(
+            list_url,
+            params={"limit": 5},
+            headers={**headers, "If-None-Match": list_etag},
+        )
+        assert response.status_code == 200
+
+        response = client.patch(
+            post_url, headers=headers, json={"title": "New title", "description": None}
+        )
+        assert response.status_code == 200
+        response = client.get(list_url, headers={**headers, "If-None-Match": list_etag})
+        assert response.status_code == 200
+        assert response.json()["posts"][0]["title"] == "New title"
+        response = client.get(post_url, headers={**headers, "If-None-Match": post_etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != post_etag
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_search_posts(
+        self, db_session: Session, client: TestClient, app: FastAPI
+    ):
+        """Полнотекстовый поиск по заметкам"""
+
+        current_user = await self._setup(db_session)
+        other_user = await create_user_service(
+            async_session=db_session,
+            create_user=CreateUserInRequest(
+                first_name="Other",
+                last_name="User",
+                email="other@example.com",
+                password="123",
+            ),
+        )
+        for user_id, title, description in [
+            (current_user.id, "Shopping list", "milk, bread and coffee"),
+            (current_user.id, "Coffee beans", "order arabica"),
+            (current_user.id, "Meeting notes", "budget review"),
+            (current_user.id, "Imported", '<img src=x onerror="alert(1)"> & budget'),
+            (other_user.id, "Coffee machine", "call the repair service"),
+        ]:
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(title=title, description=description),
+                user_id=user_id,
+            )
+
+        url = app.url_path_for("search_posts")
+        response = client.get(url, params={"q": "coffee"})
+        assert response.status_code == 401
+
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        response = client.get(url, headers=headers, params={"q": "coffee"})
+        assert response.status_code == 200
+        posts = response.json()["posts"]
+        # a title hit outranks a description hit, other users are not searched
+        assert [post["title"] for post in posts] == ["Coffee beans", "Shopping list"]
+        assert posts[0]["rank"] > posts[1]["rank"]
+        assert "<mark>coffee</mark>" in posts[1]["headline"]
+
+        # the note text is escaped, <mark> is the only markup left
+        response = client.get(url, headers=headers, params={"q": "budget"})
+        headlines = {p["title"]: p["headline"] for p in response.json()["posts"]}
+        assert headlines["Imported"] == (
+            "Imported &lt;img src=x onerror=&quot;alert(1)&quot;&gt; &amp; "
+            "<mark>budget</mark>"
+        )
+        assert headlines["Meeting notes"] == "Meeting notes <mark>budget</mark> review"
+
+        response = client.get(url, headers=headers, params={"q": "coffee -milk"})
+        assert [post["title"] for post in response.json()["posts"]] == ["Coffee beans"]
+        response = client.get(url, headers=headers, params={"q": "coffee", "limit": 1})
+        assert len(response.json()["posts"]) == 1
+        response = client.get(url, headers=headers, params={"q": "&|!"})
+        assert response.status_code == 200
+        assert response.json()["posts"] == []
+        response = client.get(url, headers=headers, params={"q": ""})
+        assert response.status_code == 422
+
+        async with db_session() as session:
+            await session.execute(text("SET enable_seqscan = off"))
+            plan = await session.scalars(
+                text(
+                    "EXPLAIN SELECT id FROM post WHERE search_vector @@ "
+                    "websearch_to_tsquery('simple', 'coffee')"
+                )
+            )
+            assert "ix_post_search_vector" in "\n".join(plan)
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_post_selector_cache(
+        self, db_session: Session, client: TestClient, app: FastAPI, monkeypatch
+    ):
+        """Кэш чтения заметки и сброс при изменении"""
+
+        monkeypatch.setattr(
+            selector_cache, "backend", LocalCacheBackend(maxsize=100, ttl=60)
+        )
+        current_user = await self._setup(db_session)
+        post = await create_post_service(
+            async_session=db_session,
+            create_post=CreatePostInRequest(title="Cached title"),
+            user_id=current_user.id,
+        )
+        token = self._auth_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        url = app.url_path_for("get_post", post_id=post.id)
+
+        response = client.get(url, headers=headers)
+        assert response.json()["title"] == "Cached title"
+        hits = selector_cache.stats()["post"].hits
+        # a write around the commands is not seen until the entry expires
+        async with db_session() as session:
+            await session.execute(
+                update(Post).where(Post.id == post.id).values(title="Behind cache")
+            )
+            await session.commit()
+        response = client.get(url, headers=headers)
+        assert response.json()["title"] == "Cached title"
+        assert selector_cache.stats()["post"].hits == hits + 1
+
+        response = client.patch(url, headers=headers, json={"title": "Edited"})
+        assert response.status_code == 200
+        response = client.get(url, headers=headers)
+        assert response.json()["title"] == "Edited"
+
+        # the cached note of the owner is no answer for another user
+        await create_user_service(
+            async_session=db_session,
+            create_user=CreateUserInRequest(
+                first_name="TestUserName2",
+                last_name="TestLastName2",
+                email="testuser2@example.com",
+                password="123",
+            ),
+        )
+        response = client.post(
+            settings.TOKEN_URL,
+            data={"username": "testuser2@example.com", "password": "123"},
+        )
+        other_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert client.get(url, headers=other_headers).status_code == 404
+
+        assert client.delete(url, headers=headers).status_code == 200
+        assert client.get(url, headers=headers).status_code == 404
+
+        await self._teardown(db_session)
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session
+
+from app.db.repositories.post import post
+from app.db.repositories.user import user
+from app.db.repositories.user_session import user_session
+from app.db.tables.post import Post
+from tests.api.test_case import TestUserMixit
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if not many and statement.lstrip().upper().startswith(
+            ("SELECT", "UPDATE", "DELETE")
+        ):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+class TestIndexUsage(TestUserMixit):
+    @pytest.mark.asyncio
+    async def _teardown(self, db_session: Session):
+        async with db_session() as session:
+            await session.execute(delete(Post))
+            await session.commit()
+        await super()._teardown(db_session)
+
+    async def _explain(self, db_session: Session, statements) -> list[str]:
+        plans = []
+        async with db_session() as session:
+            connection = await session.connection()
+            # on tables this small the planner prefers seq scans anyway; with
+            # them disabled it still picks one when no index fits the query
+            await connection.exec_driver_sql("SET enable_seqscan = off")
+            for statement, parameters in statements:
+                rows = await connection.exec_driver_sql(
+                    f"EXPLAIN {statement}", parameters
+                )
+                plans.append("\n".join(row[0] for row in rows))
+        return plans
+
+    @pytest.mark.asyncio
+    async def test_repository_queries_use_indexes(self, db_session: Session):
+        """Запросы репозиториев идут по индексам, без Seq Scan"""
+
+        current_user = await self._setup(db_session)
+        async with db_session() as session:
+            post_id = await post.create(
+                session=session, title="Post title", user_id=current_user.id
+            )
+            await user_session.create(
+                session=session,
+                user_id=current_user.id,
+                token="token",
+                expires_at=datetime.utcnow() + timedelta(minutes=5),
+            )
+            await session.commit()
+            engine = session.bind.sync_engine
+
+        with capture_statements(engine) as statements:
+            async with db_session() as session:
+                kwargs = {"session": session, "user_id": current_user.id}
+                await post.get(post_id=post_id, **kwargs)
+                await post.get_version(post_id=post_id, **kwargs)
+                [_ async for _ in post.list(limit=10, **kwargs)]
+                [_ async for _ in post.list(limit=10, after=post_id, **kwargs)]
+                [_ async for _ in post.stream(fetch_size=10, **kwargs)]
+                await post.search_text(query="title", limit=10, **kwargs)
+                await post.list_state(**kwargs)
+                await post.update(title="New title", post_id=post_id, **kwargs)
+                await post.update_many(
+                    rows=[{"id": post_id, "title": "Title", "description": None}],
+                    **kwargs,
+                )
+                await post.delete(post_id=0, **kwargs)
+                await post.delete_many(post_ids=[0], **kwargs)
+                await user.get_by_email(session=session, email=current_user.email)
+                await user_session.get_by_user(**kwargs)
+                await user_session.get_principal(
+                    session=session, email=current_user.email, access_token="token"
+                )
+                await user_session.delete_session(**kwargs)
+
+        plans = await self._explain(db_session, statements)
+        assert len(plans) >= 15
+        for (statement, _), plan in zip(statements, plans):
+            assert "Seq Scan" not in plan, f"{statement}\n{plan}"
+
+        list_plan, session_plan = plans[2], plans[-3]
+        assert "ix_post_user_id_id" in list_plan
+        assert "ix_user_sessions_user_id" in session_plan
+
+        await self._teardown(db_session)
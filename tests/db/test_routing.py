@@ -0,0 +1,142 @@
+import asyncio
+import importlib
+import pkgutil
+from contextlib import contextmanager
+
+import pytest
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app import selects
+from app.commands.post import create_post_command
+from app.db.routing import (
+    ReplicaHealth,
+    RoutingSession,
+    reads_from_replica,
+    route_selects,
+)
+from app.db.tables.post import Post
+from app.selects import post as post_selects
+from app.selects import user as user_selects
+from app.selects.post import get_all_post_selector, get_post_selector
+from tests.api.test_case import TestUserMixit
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+        )
+
+
+@reads_from_replica
+async def read_post(session, user_id, post_id):
+    return await get_post_selector(session=session, user_id=user_id, post_id=post_id)
+
+
+@reads_from_replica
+async def read_posts(session, user_id):
+    async for post in get_all_post_selector(
+        session=session, user_id=user_id, limit=10, offset=0
+    ):
+        yield post
+
+
+class TestReplicaRouting(TestUserMixit):
+    @pytest.mark.asyncio
+    async def _teardown(self, db_session: Session):
+        async with db_session() as session:
+            await session.execute(delete(Post))
+            await session.commit()
+        await super()._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_selects_go_to_replica(self, db_session: Session):
+        """Селекторы читают с реплики, запись закрепляет запрос за primary"""
+
+        current_user = await self._setup(db_session)
+        async with db_session() as session:
+            engine = session.bind
+        # the same database behind a second engine stands in for a replica
+        replica = create_async_engine(engine.url)
+        health = ReplicaHealth(max_lag=5, retry_after=60)
+        routing_session = async_sessionmaker(
+            engine,
+            sync_session_class=RoutingSession,
+            info={"replica": replica.sync_engine, "replica_health": health},
+            expire_on_commit=False,
+        )
+
+        async def _request():
+            async with routing_session() as session:
+                post_id = await create_post_command(
+                    session=session, title="Post title", user_id=current_user.id
+                )
+            async with routing_session() as session:
+                return await read_post(session, current_user.id, post_id)
+
+        with count_statements(engine) as primary, count_statements(replica) as read:
+            # a request that wrote reads its own write from the primary
+            post = await asyncio.create_task(_request())
+            assert post.title == "Post title"
+            assert read == []
+            assert any(s.startswith("SELECT") for s in primary)
+            primary.clear()
+
+            # a request that only reads is served by the replica
+            async def _read_request():
+                async with routing_session() as session:
+                    await read_post(session, current_user.id, post.id)
+                    return [p.id async for p in read_posts(session, current_user.id)]
+
+            assert await asyncio.create_task(_read_request()) == [post.id]
+            assert len(read) == 2
+            assert primary == []
+
+            # queries outside of selectors stay on the primary
+            async with routing_session() as session:
+                await session.get(Post, post.id)
+            assert len(read) == 2 and len(primary) == 1
+
+            # an unhealthy replica falls back to the primary
+            health.mark_down("test")
+            await asyncio.create_task(_read_request())
+            assert len(read) == 2 and len(primary) == 3
+
+        assert await health.probe(replica)
+        assert health.healthy and health.lag == 0
+        await replica.dispose()
+        await self._teardown(db_session)
+
+    def test_cached_selects_stay_on_primary(self):
+        """Кэширующие селекторы не читают с реплики"""
+
+        # route_selects patches every selector module in place
+        originals = {
+            cls: vars(cls)["__call__"]
+            for module in pkgutil.iter_modules(selects.__path__)
+            for cls in vars(
+                importlib.import_module(f"app.selects.{module.name}")
+            ).values()
+            if isinstance(cls, type) and "__call__" in vars(cls)
+        }
+        try:
+            route_selects()
+            assert post_selects.GetAllPosts.__call__.__replica__
+            # a lagging replica would refill the cache with invalidated rows
+            assert not hasattr(post_selects.GetPost.__call__, "__replica__")
+            assert not hasattr(user_selects.GetUsers.__call__, "__replica__")
+        finally:
+            for cls, call in originals.items():
+                cls.__call__ = call
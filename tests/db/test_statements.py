@@ -0,0 +1,78 @@
+import pytest
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import _prepare_threshold
+from app.db.repositories.post import post
+from app.db.tables.post import Post
+from tests.api.test_case import TestUserMixit
+
+
+class TestPreparedStatements(TestUserMixit):
+    @pytest.mark.asyncio
+    async def _teardown(self, db_session: Session):
+        async with db_session() as session:
+            await session.execute(delete(Post))
+            await session.commit()
+        await super()._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_lambda_statements_bind_each_call(self, db_session: Session):
+        """Кэшированные lambda-запросы подставляют параметры каждого вызова"""
+
+        current_user = await self._setup(db_session)
+        async with db_session() as session:
+            created = await post.create_many(
+                session=session,
+                user_id=current_user.id,
+                rows=[{"title": f"Post{i} title"} for i in range(5)],
+            )
+            ids = [row.id for row in created]
+
+            for post_id in ids[:2]:
+                row = await post.get(
+                    session=session, post_id=post_id, user_id=current_user.id
+                )
+                assert row.id == post_id
+            assert (await post.get(session=session, post_id=ids[0], user_id=0)) is None
+
+            kwargs = {"session": session, "user_id": current_user.id, "limit": 2}
+            assert [p.id async for p in post.list(offset=1, **kwargs)] == ids[1:3]
+            assert [p.id async for p in post.list(offset=3, **kwargs)] == ids[3:5]
+            assert [p.id async for p in post.list(after=ids[2], **kwargs)] == ids[3:5]
+
+        await self._teardown(db_session)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("threshold, prepared", [(0, True), (None, False)])
+    async def test_prepare_threshold(
+        self, db_session: Session, threshold: int | None, prepared: bool
+    ):
+        """Запросы репозиториев готовятся на сервере, если это не запрещено"""
+
+        current_user = await self._setup(db_session)
+        async with db_session() as session:
+            url = session.bind.url
+        engine = create_async_engine(url, connect_args={"prepare_threshold": threshold})
+        async with async_sessionmaker(engine)() as session:
+            await post.get(session=session, post_id=1, user_id=current_user.id)
+            statements = (
+                await session.scalars(
+                    text("SELECT statement FROM pg_prepared_statements")
+                )
+            ).all()
+            assert any("FROM post" in s for s in statements) is prepared
+        await engine.dispose()
+
+        await self._teardown(db_session)
+
+    def test_pgbouncer_mode_disables_prepares(self, monkeypatch):
+        """В режиме PgBouncer (transaction) prepare отключён"""
+
+        monkeypatch.setattr(settings, "DB_PREPARE_THRESHOLD", 2)
+        assert _prepare_threshold() == 2
+        monkeypatch.setattr(settings, "DB_PGBOUNCER_TRANSACTION_MODE", True)
+        assert _prepare_threshold() is None
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import socket
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator
+
+import pytest
+
+from redis.asyncio import Redis
+
+from app.schemas.db.post import PostDB
+from app.schemas.db.user import UserDB
+from app.utils.cache import LocalCacheBackend, RedisCacheBackend, SelectorCache
+
+PREFIX = "test_selector_cache:"
+
+
+@asynccontextmanager
+async def _redis() -> AsyncIterator[Redis]:
+    """Client of the real server at TEST_REDIS_URL, with the keys of the
+    test removed afterwards."""
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+    client = Redis.from_url(url, socket_timeout=1)
+    try:
+        yield client
+    finally:
+        keys = [key async for key in client.scan_iter(f"{PREFIX}*")]
+        if keys:
+            await client.delete(*keys)
+        await client.aclose()
+
+
+def _user() -> UserDB:
+    return UserDB(
+        id=1,
+        email="cached@example.com",
+        # salt and hash are raw bytes, not valid UTF-8
+        hashed_password=bytes(range(256)),
+        is_active=True,
+        first_name="Cached",
+        last_name=None,
+    )
+
+
+class TestSelectorCache:
+    @pytest.mark.asyncio
+    async def test_redis_backend(self):
+        """Кэш селекторов поверх Redis"""
+
+        async with _redis() as client:
+            cache = SelectorCache(
+                backend=RedisCacheBackend(client), ttl=60, prefix=PREFIX
+            )
+            assert await cache.get(UserDB, "user", 1) is None
+            await cache.set(_user(), "user", 1)
+            assert await cache.get(UserDB, "user", 1) == _user()
+            assert await client.exists(f"{PREFIX}user:1")
+
+            post = PostDB(
+                id=7, title="Note", description=None, create_at=datetime(2026, 1, 2)
+            )
+            await cache.set(post, "post", 1, 7)
+            assert await cache.get(PostDB, "post", 1, 7) == post
+            # the owner is part of the key
+            assert await cache.get(PostDB, "post", 2, 7) is None
+
+            await cache.invalidate("post", (1, 7), (1, 8))
+            assert await cache.get(PostDB, "post", 1, 7) is None
+            assert await cache.get(UserDB, "user", 1) == _user()
+
+            stats = cache.stats()
+            assert (stats["user"].hits, stats["user"].misses) == (2, 1)
+            assert (stats["post"].hits, stats["post"].misses) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_expiry(self):
+        """Истечение TTL"""
+
+        async with _redis() as client:
+            cache = SelectorCache(
+                backend=RedisCacheBackend(client), ttl=0.05, prefix=PREFIX
+            )
+            await cache.set(_user(), "user", 1)
+            assert await cache.get(UserDB, "user", 1) is not None
+            await asyncio.sleep(0.1)
+            assert await cache.get(UserDB, "user", 1) is None
+
+    @pytest.mark.asyncio
+    async def test_backend_errors(self):
+        """Недоступный сервер как промах"""
+
+        # a port nothing listens on
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = Redis(port=port, socket_connect_timeout=1)
+        cache = SelectorCache(backend=RedisCacheBackend(client), ttl=60)
+        await cache.set(_user(), "user", 1)
+        assert await cache.get(UserDB, "user", 1) is None
+        await cache.invalidate("user", (1,))
+        assert cache.stats()["user"].errors == 3
+        await cache.backend.close()
+
+    @pytest.mark.asyncio
+    async def test_local_backend(self):
+        """Кэш селекторов в памяти процесса"""
+
+        cache = SelectorCache(backend=LocalCacheBackend(maxsize=1, ttl=60), ttl=60)
+        await cache.set(_user(), "user", 1)
+        assert await cache.get(UserDB, "user", 1) == _user()
+        await cache.set(_user(), "user", 2)
+        # evicted by the second entry
+        assert await cache.get(UserDB, "user", 1) is None
+        await cache.invalidate("user", (2,))
+        assert await cache.get(UserDB, "user", 2) is None
+
+        disabled = SelectorCache(backend=None, ttl=60)
+        await disabled.set(_user(), "user", 1)
+        assert await disabled.get(UserDB, "user", 1) is None
+        assert disabled.stats() == {}
+
+    async def _check_late_refill(self, cache: SelectorCache) -> None:
+        stale = _user()
+        await cache.set(stale, "user", 1)
+        # a read fetched the row, then a write invalidated it before the
+        # read stored its copy
+        await cache.invalidate("user", (1,))
+        await cache.set(stale, "user", 1)
+        assert await cache.get(UserDB, "user", 1) is None
+
+        await asyncio.sleep(0.1)
+        fresh = stale.copy(update={"first_name": "Fresh"})
+        await cache.set(fresh, "user", 1)
+        assert await cache.get(UserDB, "user", 1) == fresh
+        # a live entry is not overwritten by a refill either
+        await cache.set(stale, "user", 1)
+        assert await cache.get(UserDB, "user", 1) == fresh
+
+    @pytest.mark.asyncio
+    async def test_invalidate_then_late_refill(self):
+        """Устаревшее чтение не возвращает строку в кэш после инвалидации"""
+
+        await self._check_late_refill(
+            SelectorCache(
+                backend=LocalCacheBackend(maxsize=10, ttl=60),
+                ttl=60,
+                tombstone_ttl=0.05,
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_redis_late_refill(self):
+        """Поздняя запись после инвалидации поверх Redis"""
+
+        async with _redis() as client:
+            await self._check_late_refill(
+                SelectorCache(
+                    backend=RedisCacheBackend(client),
+                    ttl=60,
+                    prefix=PREFIX,
+                    tombstone_ttl=0.05,
+                )
+            )
+            cache = SelectorCache(
+                backend=RedisCacheBackend(client), ttl=60, prefix=PREFIX
+            )
+            await cache.invalidate("post", *((1, post_id) for post_id in range(3)))
+            for post_id in range(3):
+                key = cache.key("post", 1, post_id)
+                assert await client.get(key) == b""
+                assert 0 < await client.pttl(key) <= cache.tombstone_ttl * 1000
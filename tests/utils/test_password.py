@@ -0,0 +1,71 @@
+import os
+
+from app.calibrate_password_hash import calibrate_pbkdf2, calibrate_scrypt, measure
+from app.services.password import (
+    PasswordHashParams,
+    hash_password,
+    make_password,
+    needs_rehash,
+    parse_password,
+    verify_password,
+)
+
+PBKDF2 = PasswordHashParams(scheme="pbkdf2-sha256", iterations=1000)
+SCRYPT = PasswordHashParams(scheme="scrypt", log_n=10, r=8, p=1)
+
+
+class TestPasswordHash:
+    def test_versioned_format(self):
+        """Формат с алгоритмом и параметрами, проверка пароля"""
+
+        for params in (PBKDF2, SCRYPT):
+            hashed_password = make_password("secret", params)
+            assert hashed_password.startswith(f"${params.scheme}$".encode())
+            parsed_params, salt, digest = parse_password(hashed_password)
+            assert parsed_params == params
+            assert len(salt) == 16 and len(digest) == 32
+            assert verify_password("secret", hashed_password)
+            assert not verify_password("Secret", hashed_password)
+            # a fresh salt every time
+            assert make_password("secret", params) != hashed_password
+
+        assert make_password("secret", PBKDF2).startswith(b"$pbkdf2-sha256$i=1000$")
+        assert make_password("secret", SCRYPT).startswith(b"$scrypt$ln=10,r=8,p=1$")
+
+    def test_legacy_format(self):
+        """Старые хэши без параметров проверяются и требуют перехэширования"""
+
+        salt = os.urandom(32)
+        legacy = salt + hash_password("secret", salt)
+        assert parse_password(legacy) is None
+        assert verify_password("secret", legacy)
+        assert not verify_password("other", legacy)
+        assert needs_rehash(legacy, PBKDF2)
+        assert parse_password(b"$scrypt$ln=x$$") is None
+
+    def test_needs_rehash(self):
+        """Перехэширование при смене алгоритма или стоимости"""
+
+        hashed_password = make_password("secret", PBKDF2)
+        assert not needs_rehash(hashed_password, PBKDF2)
+        # fields of the other scheme do not count
+        assert not needs_rehash(
+            hashed_password,
+            PasswordHashParams(scheme="pbkdf2-sha256", iterations=1000, log_n=20),
+        )
+        assert needs_rehash(hashed_password, PasswordHashParams(iterations=2000))
+        assert needs_rehash(hashed_password, SCRYPT)
+        hashed_password = make_password("secret", SCRYPT)
+        assert not needs_rehash(hashed_password, SCRYPT)
+        assert needs_rehash(hashed_password, PasswordHashParams(scheme="scrypt"))
+
+    def test_calibrate(self):
+        """Подбор стоимости под целевое время"""
+
+        params = calibrate_pbkdf2(target=0.02, rounds=1)
+        assert params.scheme == "pbkdf2-sha256" and params.iterations >= 1000
+        assert measure(params) < 0.1
+
+        params = calibrate_scrypt(target=0.02, rounds=1)
+        assert params.scheme == "scrypt" and params.log_n >= 10
+        assert measure(params, rounds=1) < 0.1
@@ -0,0 +1,62 @@
+import pytest
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.db.repositories.post import post
+from app.db.tables.post import Post
+from app.schemas.request.post import CreatePostInRequest
+from app.schemas.request.search import SearchQueryFilter
+from app.services.post import create_post_service
+from tests.api.test_case import TestUserMixit
+
+
+class TestPgSearch(TestUserMixit):
+    @pytest.mark.asyncio
+    async def _teardown(self, db_session: Session):
+        async with db_session() as session:
+            await session.execute(delete(Post))
+            await session.commit()
+        await super()._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_search_page_and_total(self, db_session: Session):
+        current_user = await self._setup(db_session)
+        for i in range(7):
+            await create_post_service(
+                async_session=db_session,
+                create_post=CreatePostInRequest(title=f"Post{i} title"),
+                user_id=current_user.id,
+            )
+        await create_post_service(
+            async_session=db_session,
+            create_post=CreatePostInRequest(title="Other title"),
+            user_id=current_user.id,
+        )
+
+        query_filter = SearchQueryFilter(
+            filter_fields=["title"],
+            values=["Post%"],
+            ops=["like"],
+            sort_fields=["id"],
+            directions=["desc"],
+            offset=1,
+            limit=2,
+        )
+        async with db_session() as session:
+            items, total = await post.search(
+                session, query_filter, Post.user_id == current_user.id
+            )
+            assert [item.title for item in items] == ["Post5 title", "Post4 title"]
+            assert total == 7
+
+            items, total = await post.search(session, query_filter, with_total=False)
+            assert len(items) == 2
+            assert total is None
+
+            query_filter.offset = 100
+            items, total = await post.search(session, query_filter)
+            assert items == []
+            assert total == 7
+
+        await self._teardown(db_session)
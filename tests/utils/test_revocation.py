@@ -0,0 +1,81 @@
+import pytest
+
+from pydantic import ValidationError
+
+from app.core.config import SettingsSchema
+from app.utils.revocation import RevocationList
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRevocationList:
+    @pytest.mark.asyncio
+    async def test_cutoffs_expire(self):
+        """Отсечки по пользователю и их истечение вместе с токенами"""
+
+        clock = Clock()
+        revocations = RevocationList(timer=clock)
+        await revocations.revoke(user_id=1, before=100, ttl=60)
+        assert revocations.is_revoked(1, 99)
+        assert not revocations.is_revoked(1, 100)
+        assert not revocations.is_revoked(2, 99)
+
+        # an older cutoff never lowers a newer one
+        await revocations.revoke(user_id=1, before=50, ttl=60)
+        assert revocations.is_revoked(1, 99)
+
+        clock.now += 61
+        await revocations.sync()
+        assert len(revocations) == 0
+
+    @pytest.mark.asyncio
+    async def test_shared_file(self, tmp_path):
+        """Отзыв доходит до других воркеров и переживает перезапуск"""
+
+        clock = Clock()
+        path = str(tmp_path / "revocations.jsonl")
+        worker1 = RevocationList(path, timer=clock)
+        worker2 = RevocationList(path, timer=clock)
+        await worker2.sync()
+
+        await worker1.revoke(user_id=1, before=100, ttl=60)
+        await worker1.revoke(user_id=2, before=100, ttl=600)
+        assert not worker2.is_revoked(1, 99)
+        await worker2.sync()
+        assert worker2.is_revoked(1, 99) and worker2.is_revoked(2, 99)
+
+        clock.now += 61
+        await worker2.compact()
+        assert len((tmp_path / "revocations.jsonl").read_text().splitlines()) == 1
+        # worker1 follows the compacted file and keeps appending to it
+        await worker1.revoke(user_id=3, before=100, ttl=60)
+        await worker2.sync()
+        assert worker2.is_revoked(3, 99)
+
+        restarted = RevocationList(path, timer=clock)
+        await restarted.sync()
+        assert not restarted.is_revoked(1, 99)
+        assert restarted.is_revoked(2, 99) and restarted.is_revoked(3, 99)
+
+    def test_stateless_requires_file(self, tmp_path):
+        """Без файла отзывов режим без сессий не запускается"""
+
+        database = dict(
+            POSTGRES_USER="user",
+            POSTGRES_PASSWORD="password",
+            POSTGRES_DB="db",
+            POSTGRES_SERVER="localhost",
+        )
+        with pytest.raises(ValidationError, match="AUTH_REVOCATION_FILE"):
+            SettingsSchema(**database, AUTH_STATELESS=True)
+        path = str(tmp_path / "revocations.jsonl")
+        settings = SettingsSchema(
+            **database, AUTH_STATELESS=True, AUTH_REVOCATION_FILE=path
+        )
+        assert settings.AUTH_REVOCATION_FILE == path
@@ -0,0 +1,180 @@
+import json
+import threading
+
+import pytest
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import instrument_engine, instrument_layers, tracer
+from app.db.repositories.post import PostRepository
+from app.db.tables.post import Post
+from app.schemas.request.post import CreatePostInRequest
+from app.selects.post import get_all_post_selector, get_post_selector
+from app.services.post import create_post_service, update_post_service
+from app.utils.tracing import InMemoryExporter, OTLPFileExporter, Tracer, current_span
+from tests.api.test_case import TestUserMixit
+
+
+class TestTracing(TestUserMixit):
+    @pytest.mark.asyncio
+    async def _teardown(self, db_session: Session):
+        async with db_session() as session:
+            await session.execute(delete(Post))
+            await session.commit()
+        await super()._teardown(db_session)
+
+    @pytest.mark.asyncio
+    async def test_layer_spans(self, db_session: Session, monkeypatch):
+        """Вложенные спаны сервисов, команд, селектов, репозиториев и SQL"""
+
+        current_user = await self._setup(db_session)
+        post = await create_post_service(
+            async_session=db_session,
+            create_post=CreatePostInRequest(title="Post title"),
+            user_id=current_user.id,
+        )
+        # with the default sample rate of 0 nothing is wrapped
+        assert settings.TRACING_SAMPLE_RATE == 0
+        assert not getattr(PostRepository.update, "__traced__", False)
+        instrument_layers()
+        instrument_engine()
+        # selectors hold repository methods bound before the wrapping
+        assert getattr(get_post_selector._get_row, "__traced__", False)
+        exporter = InMemoryExporter()
+        monkeypatch.setattr(tracer, "exporter", exporter)
+        monkeypatch.setattr(tracer, "sample_rate", 1.0)
+
+        with tracer.span("request", kind="server"):
+            await update_post_service(
+                async_session=db_session,
+                update_data=CreatePostInRequest(title="New title"),
+                user_id=current_user.id,
+                post_id=post.id,
+            )
+            async with db_session() as session:
+                posts = [
+                    row
+                    async for row in get_all_post_selector(
+                        session=session, user_id=current_user.id, limit=10, offset=0
+                    )
+                ]
+                assert len(posts) == 1
+
+        spans = {span.span_id: span for span in exporter.spans}
+        assert len({span.trace_id for span in spans.values()}) == 1
+
+        def parent_name(name: str) -> str:
+            span = next(span for span in spans.values() if span.name == name)
+            return spans[span.parent_id].name
+
+        assert parent_name("UpdatePostService") == "request"
+        assert parent_name("UpdatePostCommand") == "UpdatePostService"
+        assert parent_name("PostRepository.update") == "UpdatePostCommand"
+        assert parent_name("GetAllPosts") == "request"
+        assert parent_name("PostRepository.list") == "GetAllPosts"
+        queries = [span for span in spans.values() if span.name == "db.query"]
+        update = next(
+            span
+            for span in queries
+            if span.attributes["db.statement"].startswith("UPDATE post")
+        )
+        assert spans[update.parent_id].name == "PostRepository.update"
+        assert update.attributes["db.rows"] == 1
+        select = next(
+            span for span in queries if "LIMIT" in span.attributes["db.statement"]
+        )
+        assert spans[select.parent_id].name == "PostRepository.list"
+        assert all(span.end_ns >= span.start_ns > 0 for span in spans.values())
+
+        exporter.clear()
+        monkeypatch.setattr(tracer, "sample_rate", 0.0)
+        with tracer.span("request", kind="server"):
+            await update_post_service(
+                async_session=db_session,
+                update_data=CreatePostInRequest(title="Other title"),
+                user_id=current_user.id,
+                post_id=post.id,
+            )
+        assert not exporter.spans
+
+        await self._teardown(db_session)
+
+    def test_child_after_root(self):
+        """Спан, завершившийся после корня, выгружается сразу"""
+
+        exporter = InMemoryExporter()
+        local_tracer = Tracer(exporter, sample_rate=1.0)
+        with local_tracer.span("request") as root:
+            with local_tracer.span("child"):
+                pass
+            token = current_span.set(root)
+            late = local_tracer.start_span("stream")
+            current_span.reset(token)
+        assert [span.name for span in exporter.spans] == ["child", "request"]
+
+        local_tracer.end_span(late)
+        assert [span.name for span in exporter.spans] == ["child", "request", "stream"]
+        assert late.parent_id == root.span_id
+        assert not local_tracer._pending and not local_tracer._open
+
+        # two requests of one trace in this process export once both end
+        exporter.clear()
+        remote_parent = ("1" * 32, "2" * 16, True)
+        first = local_tracer.start_span("first", remote_parent=remote_parent)
+        second = local_tracer.start_span("second", remote_parent=remote_parent)
+        local_tracer.end_span(first)
+        assert not exporter.spans
+        local_tracer.end_span(second)
+        assert [span.name for span in exporter.spans] == ["first", "second"]
+        assert not local_tracer._pending and not local_tracer._open
+
+    def test_otlp_file_exporter(self, tmp_path, monkeypatch):
+        """Выгрузка трассы в OTLP/JSON файл"""
+
+        exporter = OTLPFileExporter(str(tmp_path / "traces.jsonl"), "test")
+        monkeypatch.setattr(tracer, "exporter", exporter)
+        monkeypatch.setattr(tracer, "sample_rate", 1.0)
+        with tracer.span(
+            "request", kind="server", attributes={"http.status_code": 200}
+        ):
+            with pytest.raises(ValueError):
+                with tracer.span("child"):
+                    raise ValueError("boom")
+        exporter.close()
+
+        (line,) = (tmp_path / "traces.jsonl").read_text().splitlines()
+        spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        child, root = spans
+        assert root["kind"] == 2 and "parentSpanId" not in root
+        assert root["attributes"] == [
+            {"key": "http.status_code", "value": {"intValue": "200"}}
+        ]
+        assert child["parentSpanId"] == root["spanId"]
+        assert child["status"] == {"code": 2, "message": "ValueError: boom"}
+
+    def test_otlp_file_exporter_background(self, tmp_path):
+        """Запись трасс в фоновом потоке и сброс очереди при закрытии"""
+
+        exporter = OTLPFileExporter(str(tmp_path / "traces.jsonl"), "test")
+        for i in range(100):
+            exporter.export([tracer.start_span(f"request{i}")])
+        assert exporter._thread.name == "otlp-file-exporter"
+        exporter.close()
+        assert exporter._thread is None
+
+        lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+        names = [
+            json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"]
+            for line in lines
+        ]
+        assert names == [f"request{i}" for i in range(100)]
+        assert exporter.dropped == 0
+
+        # a writer that falls behind drops traces instead of blocking
+        exporter = OTLPFileExporter(str(tmp_path / "full.jsonl"), "test", max_queue=1)
+        exporter._thread = threading.Thread(target=lambda: None)
+        for _ in range(3):
+            exporter.export([tracer.start_span("request")])
+        assert exporter.dropped == 2